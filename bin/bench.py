@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# Techton Benchmark Suite
+# Synthetic k6 / JMeter result files and a benchmark of the analysis pipeline
+# on them. Each dataset size is timed cold (raw parse, writes the .tcol sidecar)
+# and warm (sidecar hit): parse throughput, peak RSS and end-to-end report time.
+# Results are appended to a JSON-lines history, so versions can be compared.
+#
+#   bench.py generate <out.csv> [--format=k6|jtl] [--samples=1000000] [--rate=1000]
+#                     [--tags=8] [--bursts=3] [--seed=1]
+#   bench.py run [--sizes=100k,1m] [--formats=k6,jtl] [--dir=results/bench] [--label=GIT_SHA]
+#   bench.py compare [--dir=results/bench] [--base=LABEL] [--head=LABEL]
+import sys
+import os
+import json
+import math
+import time
+import random
+import platform
+import subprocess
+from datetime import datetime
+
+from report_gen import split_options, format_id_number, sidecar_path, histogram_path
+from ldap_engine import K6_CSV_HEADER
+
+# Configuration
+BIN_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORT_GEN = os.path.join(BIN_DIR, "report_gen.py")
+DEFAULT_DIR = os.path.join(os.path.dirname(BIN_DIR), "results", "bench")
+HISTORY_FILE = "bench.jsonl"
+DEFAULT_SIZES = "100k,1m"
+DEFAULT_FORMATS = "k6,jtl"
+DEFAULT_RATE = 1000 # Samples per second of synthetic run time
+DEFAULT_TAGS = 8
+DEFAULT_BURSTS = 3
+START_TS = 1767225600 # Fixed epoch so datasets are byte-identical per seed
+JTL_HEADER = ["timeStamp", "elapsed", "label", "responseCode", "responseMessage", "threadName", "dataType",
+              "success", "failureMessage", "bytes", "sentBytes", "grpThreads", "allThreads", "URL",
+              "Latency", "IdleTime", "Connect"]
+
+# Operation mix: (op tag, check name, median latency ms). Extra --tags beyond
+# these become OP_<n> with medians spread between them.
+OPERATIONS = [
+    ('BIND', 'bind', 8), ('SEARCH_COMPLEX', 'search', 35), ('MEMBERSHIP', 'recursive search', 60),
+    ('WRITE_STRESS', 'write simulation', 15), ('PASSWORD_SPRAY', 'handled failure', 12),
+    ('TITAN_STRESS', 'titan search', 120),
+]
+ERRORS = ["timeout", "busy (51)", "unavailable (52)", "invalidCredentials (49)", "connect: connection refused"]
+SIGMA = 0.6 # Lognormal spread of service time
+SOAK_DRIFT = 0.5 # Latency grows by this fraction from start to end (leak-like soak)
+STALL_EVERY_S, STALL_S, STALL_FACTOR = 300, 2, 10 # Periodic GC/replication stalls
+BURST_ERROR_RATE, BURST_FACTOR, BURST_DROP = 0.4, 4, 0.3
+BASE_ERROR_RATE = 0.002
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+def size_label(n):
+    if n % 1000000 == 0: return f"{n // 1000000}m"
+    if n % 1000 == 0: return f"{n // 1000}k"
+    return str(n)
+
+def operations(tags):
+    ops = OPERATIONS[:tags]
+    for i in range(len(ops), tags):
+        ops.append((f"OP_{i}", f"op {i}", 5 + 115 * (i % 7) / 6))
+    return ops
+
+def generate(path, fmt='k6', samples=1000000, rate=DEFAULT_RATE, tags=DEFAULT_TAGS, bursts=DEFAULT_BURSTS, seed=1):
+    # A run of `samples` operations at `rate`/s: lognormal service time per
+    # operation, slow soak drift, periodic stalls and `bursts` error bursts
+    # (error spike, slower answers, dropped arrivals). Returns the row count.
+    rng = random.Random(seed)
+    ops = operations(max(1, tags))
+    duration = max(1, math.ceil(samples / rate))
+    burst_len = max(5, duration // 100)
+    burst_at = sorted(rng.randrange(0, max(1, duration - burst_len)) for _ in range(bursts))
+    mu = {op: math.log(median) for op, _, median in ops}
+    rows = 0
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', newline='') as f:
+        f.write(",".join(K6_CSV_HEADER if fmt == 'k6' else JTL_HEADER) + "\n")
+        left = samples
+        for sec in range(duration):
+            n = min(rate, left)
+            left -= n
+            in_burst = any(b <= sec < b + burst_len for b in burst_at)
+            stalled = sec % STALL_EVERY_S < STALL_S and sec >= STALL_EVERY_S
+            factor = (1 + SOAK_DRIFT * sec / duration) * (BURST_FACTOR if in_burst else 1) * (STALL_FACTOR if stalled else 1)
+            error_rate = BURST_ERROR_RATE if in_burst else BASE_ERROR_RATE
+            out = []
+            for i in range(n):
+                ts = START_TS + sec + i / rate
+                op, check, _ = ops[rng.randrange(len(ops))]
+                lat = rng.lognormvariate(mu[op], SIGMA) * factor
+                error = rng.choice(ERRORS) if rng.random() < error_rate else ''
+                if fmt == 'k6':
+                    tail = f",,,,,,bench,,,,,,op={op},\n"
+                    out.append(f"iteration_duration,{ts:.3f},{lat:.3f},,,{tail}")
+                    if error: out.append(f"checks,{ts:.3f},0,{check}: {error},{error},{tail}")
+                    else: out.append(f"checks,{ts:.3f},1,{check},,{tail}")
+                    rows += 2
+                else:
+                    ok = 'false' if error else 'true'
+                    code = '49' if error.startswith('invalid') else ('0' if not error else '52')
+                    out.append(f"{int(ts * 1000)},{int(lat)},{op},{code},{error or 'OK'},Load {1 + i % 50},text,"
+                               f"{ok},{error},{rng.randrange(200, 4000)},120,{n},{n},,{int(lat * 0.9)},0,{int(lat * 0.1)}\n")
+                    rows += 1
+            if fmt == 'k6' and in_burst:
+                # Arrivals the saturated generator never sent
+                row = f"dropped_iterations,{START_TS + sec:.3f},1,,,,,,,,,bench,,,,,,,\n"
+                dropped = int(n * BURST_DROP)
+                out.extend([row] * dropped)
+                rows += dropped
+            f.write(''.join(out))
+    os.replace(tmp, path)
+    return rows
+
+def count_rows(path):
+    n = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk: break
+            n += chunk.count(b'\n')
+    return max(0, n - 1)
+
+def git_label():
+    try:
+        out = subprocess.run(['git', '-C', BIN_DIR, 'rev-parse', '--short', 'HEAD'],
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or "local"
+    except (OSError, subprocess.SubprocessError):
+        return "local"
+
+def timed_report(result_file, out_html, profile_path):
+    # One report_gen run in a child process: wall time, its own peak RSS
+    # (wait4 rusage) and report_gen's phase timings
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, REPORT_GEN, result_file, "bench", "BENCH", out_html,
+                             f"--profile={profile_path}"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - started
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise RuntimeError(f"report_gen failed on {result_file} (exit {proc.returncode})")
+    with open(profile_path, 'r') as f:
+        profile = json.load(f)
+    return {'wall_s': round(wall, 3), 'peak_rss_mb': round(usage.ru_maxrss / 1024, 1), 'phases': profile['phases']}
+
+def bench_dataset(path, work_dir):
+    if os.path.exists(sidecar_path(path)): os.remove(sidecar_path(path))
+    out_html = os.path.join(work_dir, "bench_report.html")
+    profile_path = os.path.join(work_dir, "bench_profile.json")
+    cold = timed_report(path, out_html, profile_path)
+    warm = timed_report(path, out_html, profile_path)
+    for tmp in (out_html, histogram_path(out_html), profile_path):
+        if os.path.exists(tmp): os.remove(tmp)
+    rows = count_rows(path)
+    parse_s = cold['phases'].get('parse', 0)
+    return {
+        'rows': rows,
+        'bytes': os.path.getsize(path),
+        'parse_s': parse_s,
+        'rows_per_s': int(rows / parse_s) if parse_s else 0,
+        'cold_s': cold['wall_s'],
+        'warm_s': warm['wall_s'],
+        'cold_rss_mb': cold['peak_rss_mb'],
+        'warm_rss_mb': warm['peak_rss_mb'],
+        'phases_cold': cold['phases'],
+        'phases_warm': warm['phases'],
+    }
+
+def run(bench_dir, sizes, formats, label, seed=1):
+    data_dir = os.path.join(bench_dir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    results = []
+    print(f" Benchmark {label} ({platform.python_version()}, {os.cpu_count()} CPUs)")
+    print(f" {'Dataset':<12}{'Rows':>12}{'MB':>8}{'Rows/s':>12}{'Cold':>9}{'Warm':>9}{'RSS cold':>10}{'RSS warm':>10}")
+    for fmt in formats:
+        for samples in sizes:
+            path = os.path.join(data_dir, f"{fmt}_{size_label(samples)}_s{seed}.csv")
+            if not os.path.exists(path):
+                generate(path, fmt, samples, seed=seed)
+            r = bench_dataset(path, bench_dir)
+            r.update({'label': label, 'time': stamp, 'python': platform.python_version(), 'cpus': os.cpu_count(),
+                      'format': fmt, 'samples': samples, 'dataset': f"{fmt}_{size_label(samples)}"})
+            results.append(r)
+            print(f" {r['dataset']:<12}{format_id_number(r['rows']):>12}{format_id_number(r['bytes'] / 1e6, 1):>8}"
+                  f"{format_id_number(r['rows_per_s']):>12}{format_id_number(r['cold_s'], 2) + 's':>9}"
+                  f"{format_id_number(r['warm_s'], 2) + 's':>9}{format_id_number(r['cold_rss_mb'], 1):>10}"
+                  f"{format_id_number(r['warm_rss_mb'], 1):>10}", flush=True)
+    with open(os.path.join(bench_dir, HISTORY_FILE), 'a') as f:
+        for r in results:
+            f.write(json.dumps(r, separators=(',', ':')) + "\n")
+    return results
+
+def load_history(bench_dir):
+    records = []
+    try:
+        with open(os.path.join(bench_dir, HISTORY_FILE), 'r') as f:
+            for line in f:
+                try: records.append(json.loads(line))
+                except ValueError: continue
+    except OSError:
+        pass
+    return records
+
+def compare(bench_dir, base=None, head=None):
+    # Latest result per (label, dataset); head defaults to the newest label,
+    # base to the label benchmarked before it
+    records = load_history(bench_dir)
+    labels = []
+    for r in records:
+        if r['label'] in labels: labels.remove(r['label'])
+        labels.append(r['label'])
+    head = head or (labels[-1] if labels else None)
+    if base is None:
+        older = [l for l in labels if l != head]
+        base = older[-1] if older else None
+    if head is None or base is None:
+        print("Need benchmark results of two labels to compare.")
+        return 1
+    latest = {(r['label'], r['dataset']): r for r in records}
+    datasets = [d for (l, d) in latest if l == head and (base, d) in latest]
+    print(f" {base} -> {head}")
+    print(f" {'Dataset':<12}{'Rows/s':>22}{'Cold':>22}{'Warm':>22}{'RSS cold MB':>22}")
+
+    def cell(b, h, ndigits):
+        delta = (h - b) / b * 100 if b else 0
+        return f"{format_id_number(h, ndigits)} ({'+' if delta >= 0 else ''}{format_id_number(delta, 1)}%)"
+
+    for d in sorted(set(datasets)):
+        b, h = latest[(base, d)], latest[(head, d)]
+        print(f" {d:<12}{cell(b['rows_per_s'], h['rows_per_s'], 0):>22}{cell(b['cold_s'], h['cold_s'], 2):>22}"
+              f"{cell(b['warm_s'], h['warm_s'], 2):>22}{cell(b['cold_rss_mb'], h['cold_rss_mb'], 1):>22}")
+    return 0
+
+def main():
+    argv, opts = split_options(sys.argv)
+    if len(argv) >= 3 and argv[1] == 'generate':
+        fmt = opts.get('format', 'k6')
+        rows = generate(argv[2], fmt, parse_size(opts.get('samples', '1m')), int(opts.get('rate', DEFAULT_RATE)),
+                        int(opts.get('tags', DEFAULT_TAGS)), int(opts.get('bursts', DEFAULT_BURSTS)),
+                        int(opts.get('seed', 1)))
+        print(f"Generated {format_id_number(rows)} rows ({fmt}) -> {argv[2]}")
+        return
+    if len(argv) >= 2 and argv[1] == 'run':
+        sizes = [parse_size(s) for s in opts.get('sizes', DEFAULT_SIZES).split(',') if s.strip()]
+        formats = [f.strip() for f in opts.get('formats', DEFAULT_FORMATS).split(',') if f.strip() in ('k6', 'jtl')]
+        try:
+            run(opts.get('dir', DEFAULT_DIR), sizes, formats, opts.get('label') or git_label(), int(opts.get('seed', 1)))
+        except RuntimeError as e:
+            print(e)
+            sys.exit(1)
+        return
+    if len(argv) >= 2 and argv[1] == 'compare':
+        sys.exit(compare(opts.get('dir', DEFAULT_DIR), opts.get('base'), opts.get('head')))
+    print("Usage: bench.py generate <out.csv> [--format=k6|jtl] [--samples=1m] [--rate=1000] [--tags=8] [--bursts=3] [--seed=1]\n"
+          f"       bench.py run [--sizes={DEFAULT_SIZES}] [--formats={DEFAULT_FORMATS}] [--dir=results/bench] [--label=GIT_SHA]\n"
+          "       bench.py compare [--dir=results/bench] [--base=LABEL] [--head=LABEL]")
+    sys.exit(1)
+
+if __name__ == "__main__":
+    main()
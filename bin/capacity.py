@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+# Techton Capacity Search
+# Finds the highest arrival rate a target sustains within its SLOs in one
+# unattended run. Short steps at a fixed rate are run through any engine
+# (ramp: rate x growth per step until a step fails, then bisection between
+# the last passing and the first failing rate). Each step is followed live
+# with the safety guard rules and stopped the moment they are breached. A step
+# passes when it ran to the end without a breach and delivered close to the
+# offered rate. The step results are merged into the run's results.csv and
+# summarised in capacity.json / capacity.html with the knee of the latency
+# curve.
+#
+#   capacity.py run <run_dir> --cmd=TEMPLATE [--start=10] [--max=100000] [--growth=2]
+#                   [--resolution=0.05] [--max-steps=16] [--budget=1800]
+#                   [--rules=p95>500@5s,error_rate>1@5s] [--min-throughput=90]
+#   capacity.py report <run_dir>
+#
+# --cmd placeholders: {rate} {duration} {output} {index}. Steps also get
+# TECHTON_RATE / TECHTON_STEP_DURATION in their environment, so a k6 script can
+# read the rate from __ENV.
+import sys
+import os
+import json
+import math
+import time
+import shlex
+import signal
+import subprocess
+from datetime import datetime
+
+from report_gen import (TEMPLATE_HTML, TICK_MS, load_results, split_options, format_id_number, js_literal,
+                        render_template, chart_library)
+from live_analyzer import FileFollower, LiveAnalyzer
+from safety_guard import Guard, parse_rules
+from coordinator import merge_run
+
+# Configuration
+STEP_DIR = "steps"
+MANIFEST = "capacity.json"
+REPORT_HTML = "capacity.html"
+DEFAULT_RULES = "p95>500@5s,error_rate>1@5s"
+DEFAULT_START = 10
+DEFAULT_MAX = 100000
+GROWTH = 2.0 # Ramp factor between steps until the first failure
+RESOLUTION = 0.05 # Bisection stops when (fail - pass) / pass is below this
+MAX_STEPS = 16
+BUDGET_S = 1800 # Total wall-clock budget for all steps
+MIN_STEP_SAMPLES = 3000 # Enough tail samples for a stable P99
+MIN_STEP_S = 20
+MAX_STEP_S = 120
+STEP_WARMUP_S = 5 # Guard ignores the first seconds of a step
+COOLDOWN_S = 5 # Pause between steps so the target can drain
+MIN_THROUGHPUT_PCT = 90.0 # Delivered vs offered rate for a step to pass
+POLL_INTERVAL = 0.25
+# Same look as the single-run report
+STYLE = TEMPLATE_HTML[TEMPLATE_HTML.index('<style>'):TEMPLATE_HTML.index('</style>') + len('</style>')]
+
+TEMPLATE_CAPACITY_HTML = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Techton Capacity Report</title>
+    <script>{{ chart_lib }}</script>
+    {{ style }}
+</head>
+<body>
+
+    <div class="header">
+        <div class="brand">
+            <span>⚡ TECHTON</span>
+            <span style="font-weight: 400; color: white;">Capacity Report</span>
+        </div>
+        <div class="meta-info">
+            <div>SLO: <strong>{{ rules }}</strong></div>
+            <div>Date: {{ date }}</div>
+            <div>Steps: {{ step_count }}</div>
+        </div>
+    </div>
+
+    <div class="grid">
+        <div class="card">
+            <div class="stat-label">Max Sustainable Throughput</div>
+            <div class="stat-value text-success">{{ max_rps }} Req/s</div>
+            <div class="sub-stat">{{ max_detail }}</div>
+        </div>
+        <div class="card">
+            <div class="stat-label">Latency Knee</div>
+            <div class="stat-value text-warning">{{ knee_rps }} Req/s</div>
+            <div class="sub-stat">{{ knee_detail }}</div>
+        </div>
+        <div class="card">
+            <div class="stat-label">First Failing Rate</div>
+            <div class="stat-value text-danger">{{ fail_rate }}</div>
+            <div class="sub-stat">{{ fail_reason }}</div>
+        </div>
+    </div>
+
+    <div class="chart-container">
+        <canvas id="curveChart"></canvas>
+    </div>
+
+    <div class="chart-container">
+        <canvas id="stepChart"></canvas>
+    </div>
+
+    <div class="table-container">
+        <h3 style="margin-top: 0;">Steps</h3>
+        <table>
+            <thead>
+                <tr>
+                    <th>#</th>
+                    <th>Offered</th>
+                    <th>Delivered</th>
+                    <th>Duration</th>
+                    <th>Requests</th>
+                    <th>Errors</th>
+                    <th>P50</th>
+                    <th>P95</th>
+                    <th>P99</th>
+                    <th>Result</th>
+                </tr>
+            </thead>
+            <tbody>
+                {{ step_rows }}
+            </tbody>
+        </table>
+    </div>
+
+    <script>
+        const axisColor = { grid: { color: '#334155' }, ticks: { color: '#94a3b8' } };
+        new Chart(document.getElementById('curveChart'), {
+            type: 'scatter',
+            data: {
+                datasets: [
+                    { label: 'P50 (ms)', data: {{ curve_p50 }}, borderColor: '#38bdf8', backgroundColor: '#38bdf8', showLine: true },
+                    { label: 'P95 (ms)', data: {{ curve_p95 }}, borderColor: '#facc15', backgroundColor: '#facc15', showLine: true },
+                    { label: 'P99 (ms)', data: {{ curve_p99 }}, borderColor: '#f87171', backgroundColor: '#f87171', showLine: true },
+                    { label: 'Knee', data: {{ knee_point }}, borderColor: '#ffffff', backgroundColor: '#ffffff', pointRadius: 8, pointStyle: 'crossRot' }
+                ]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                plugins: {
+                    legend: { labels: { color: '#94a3b8' } },
+                    title: { display: true, text: 'Latency vs Delivered Throughput', color: '#f8fafc', font: { size: 16 } }
+                },
+                scales: {
+                    y: { ...axisColor, title: { display: true, text: 'Milliseconds', color: '#64748b' } },
+                    x: { ...axisColor, title: { display: true, text: 'Requests per Second', color: '#64748b' } }
+                }
+            }
+        });
+        Chart.lazy('stepChart', (canvas) => new Chart(canvas, {
+            type: 'bar',
+            data: {
+                labels: {{ step_labels }},
+                datasets: [
+                    { label: 'Offered Req/s', data: {{ step_offered }}, backgroundColor: '#475569' },
+                    { label: 'Delivered Req/s', data: {{ step_delivered }}, backgroundColor: {{ step_colors }} }
+                ]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                plugins: {
+                    legend: { labels: { color: '#94a3b8' } },
+                    title: { display: true, text: 'Search Steps (green = pass, red = fail)', color: '#f8fafc', font: { size: 16 } }
+                },
+                scales: { y: { ...axisColor }, x: { ...axisColor } }
+            }
+        }));
+    </script>
+</body>
+</html>
+"""
+
+def step_duration(rate):
+    # Long enough for MIN_STEP_SAMPLES at this rate, within the step bounds
+    return int(min(MAX_STEP_S, max(MIN_STEP_S, math.ceil(MIN_STEP_SAMPLES / rate) + STEP_WARMUP_S)))
+
+def next_rate(passed, failed, start, growth, max_rate, resolution):
+    # Ramp until the first failure, then bisect; None when the search is done
+    if failed is None:
+        if passed is None: return start
+        if passed >= max_rate: return None
+        return min(max_rate, max(passed + 1, int(passed * growth)))
+    if passed is None:
+        rate = int(failed / growth)
+        return rate if rate >= 1 and rate < failed else None
+    if (failed - passed) / passed <= resolution or failed - passed <= 1:
+        return None
+    return (passed + failed) // 2
+
+def knee(points):
+    # Kneedle on (throughput, p95): with both axes scaled to 0..1, the knee is
+    # the point furthest below the chord from the first to the last point
+    points = sorted(points)
+    if len(points) < 3: return None
+    (x0, y0), (x1, y1) = points[0], points[-1]
+    if x1 == x0 or y1 == y0: return None
+    best, best_gap = None, 0.0
+    for x, y in points[1:-1]:
+        gap = (x - x0) / (x1 - x0) - (y - y0) / (y1 - y0)
+        if gap > best_gap:
+            best, best_gap = (x, y), gap
+    return best
+
+class CapacitySearch:
+    def __init__(self, run_dir, cmd, rules=DEFAULT_RULES, start=DEFAULT_START, max_rate=DEFAULT_MAX,
+                 growth=GROWTH, resolution=RESOLUTION, max_steps=MAX_STEPS, budget=BUDGET_S,
+                 min_throughput=MIN_THROUGHPUT_PCT, max_dropped=None):
+        self.run_dir = run_dir
+        self.cmd = cmd
+        self.rules = rules
+        parse_rules(rules) # Fail fast on a bad rule
+        self.start = max(1, int(start))
+        self.max_rate = max(self.start, int(max_rate))
+        self.growth = growth
+        self.resolution = resolution
+        self.max_steps = max_steps
+        self.budget = budget
+        self.min_throughput = min_throughput
+        self.max_dropped = max_dropped # Share of arrivals the generator may drop (%), None = not checked
+        self.step_dir = os.path.join(run_dir, STEP_DIR)
+        self.steps = []
+        self.proc = None
+        self.stopping = False
+
+    def stop(self, *args):
+        self.stopping = True
+        self._kill()
+
+    def _kill(self):
+        if self.proc and self.proc.poll() is None:
+            try: os.killpg(self.proc.pid, signal.SIGTERM)
+            except OSError: pass
+
+    def run_step(self, index, rate):
+        duration = step_duration(rate)
+        output = os.path.join(self.step_dir, f"step_{index}.csv")
+        log_path = os.path.join(self.step_dir, f"step_{index}.log")
+        if os.path.exists(output): os.remove(output)
+        # Placeholders are filled per argument after splitting, so braces in
+        # quoted passwords or filters are left alone
+        fields = {'{rate}': rate, '{duration}': duration, '{output}': output, '{index}': index}
+        argv = []
+        for arg in shlex.split(self.cmd):
+            for key, value in fields.items(): arg = arg.replace(key, str(value))
+            argv.append(arg)
+        env = dict(os.environ, TECHTON_RATE=str(rate), TECHTON_STEP_DURATION=f"{duration}s")
+        print(f"step {index}: {format_id_number(rate)} ops/s for {duration}s", flush=True)
+        started = time.time()
+        with open(log_path, 'w') as log:
+            self.proc = subprocess.Popen(argv, env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+            guard = Guard(parse_rules(self.rules), self._kill, log_path=os.path.join(self.step_dir, "guard.log"),
+                          warmup=STEP_WARMUP_S, planned=duration)
+            follower = FileFollower(output)
+            analyzer = LiveAnalyzer()
+            while True:
+                exited = self.proc.poll() is not None
+                lines = follower.read_lines()
+                while lines:
+                    analyzer.feed_lines(lines, follower.decoder)
+                    lines = follower.read_lines()
+                if guard.triggered is None and not self.stopping and not exited:
+                    guard.check(analyzer, None)
+                if exited: break
+                time.sleep(POLL_INTERVAL)
+        return self.measure(index, rate, duration, output, started, guard.triggered)
+
+    def measure(self, index, rate, duration, output, started, triggered):
+        step = {'index': index, 'rate': rate, 'duration_s': duration, 'output': os.path.relpath(output, self.run_dir),
+                'started': round(started, 3), 'elapsed_s': round(time.time() - started, 1)}
+        data = load_results(output) if os.path.exists(output) and os.path.getsize(output) > 0 else None
+        if not data:
+            step.update(samples=0, errors=0, rps=0.0, error_rate=0.0, p50=0.0, p95=0.0, p99=0.0, dropped=0,
+                        passed=False, reason="no samples")
+            return step
+        # Delivered rate over the span of the samples (100ms ticks); whole
+        # seconds would undercount a short step that straddles a boundary
+        span_s = len(data.tick_count) * TICK_MS / 1000
+        pcts = data.histogram.percentiles((50, 95, 99))
+        rps = data.total / span_s if span_s else 0.0
+        dropped_pct = data.dropped / (data.total + data.dropped) * 100
+        step.update(samples=data.total, errors=data.error_count, rps=round(rps, 2),
+                    error_rate=round(data.error_count / data.total * 100, 3),
+                    p50=round(pcts[50], 3), p95=round(pcts[95], 3), p99=round(pcts[99], 3),
+                    dropped=data.dropped)
+        if triggered:
+            step.update(passed=False, reason=f"SLO breached: {triggered['rule']} (value {triggered['value']:g})")
+        elif self.stopping:
+            step.update(passed=False, reason="interrupted")
+        elif self.max_dropped is not None and dropped_pct > self.max_dropped:
+            step.update(passed=False, reason=f"generator dropped {dropped_pct:.1f}% of arrivals")
+        elif rps < rate * self.min_throughput / 100:
+            step.update(passed=False, reason=f"delivered {rps:.1f}/s of {rate}/s offered")
+        else:
+            step.update(passed=True, reason="within SLO")
+        return step
+
+    def run(self):
+        os.makedirs(self.step_dir, exist_ok=True)
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        deadline = time.time() + self.budget
+        passed = failed = None
+        while not self.stopping and len(self.steps) < self.max_steps:
+            rate = next_rate(passed, failed, self.start, self.growth, self.max_rate, self.resolution)
+            if rate is None: break
+            if time.time() + step_duration(rate) > deadline:
+                print("capacity: time budget exhausted", flush=True)
+                break
+            step = self.run_step(len(self.steps), rate)
+            self.steps.append(step)
+            print(f"step {step['index']}: {'PASS' if step['passed'] else 'FAIL'} delivered={step['rps']}/s "
+                  f"p95={step['p95']}ms errors={step['error_rate']}% ({step['reason']})", flush=True)
+            if step['passed']: passed = rate
+            else: failed = rate
+            if not self.stopping and next_rate(passed, failed, self.start, self.growth, self.max_rate,
+                                               self.resolution) is not None:
+                time.sleep(COOLDOWN_S)
+        return self.result()
+
+    def result(self):
+        good = [s for s in self.steps if s['passed']]
+        bad = sorted((s for s in self.steps if not s['passed']), key=lambda s: s['rate'])
+        best = max(good, key=lambda s: s['rps']) if good else None
+        point = knee([(s['rps'], s['p95']) for s in self.steps if s['samples']])
+        return {
+            'rules': self.rules,
+            'steps': self.steps,
+            'max_sustainable_rps': best['rps'] if best else 0,
+            'max_sustainable_rate': best['rate'] if best else 0,
+            'first_failing_rate': bad[0]['rate'] if bad else None,
+            'first_failure': bad[0]['reason'] if bad else None,
+            'knee': {'rps': point[0], 'p95': point[1]} if point else None,
+        }
+
+def render(run_dir, result):
+    steps = result['steps']
+    rows = ""
+    for s in steps:
+        verdict = "<span class='text-success'>PASS</span>" if s['passed'] else f"<span class='text-danger'>FAIL</span> {s['reason']}"
+        rows += (f"<tr><td>{s['index']}</td><td>{format_id_number(s['rate'])}/s</td>"
+                 f"<td>{format_id_number(s['rps'], 1)}/s</td><td>{s['duration_s']}s</td>"
+                 f"<td>{format_id_number(s['samples'])}</td><td>{format_id_number(s['error_rate'], 2)}%</td>"
+                 f"<td>{format_id_number(s['p50'], 1)} ms</td><td>{format_id_number(s['p95'], 1)} ms</td>"
+                 f"<td>{format_id_number(s['p99'], 1)} ms</td><td>{verdict}</td></tr>")
+    measured = sorted((s for s in steps if s['samples']), key=lambda s: s['rps'])
+    curve = {p: [{'x': s['rps'], 'y': s[p]} for s in measured] for p in ('p50', 'p95', 'p99')}
+    point = result['knee']
+    best = next((s for s in steps if s['passed'] and s['rps'] == result['max_sustainable_rps']), None)
+    html = render_template(TEMPLATE_CAPACITY_HTML, {
+        'chart_lib': chart_library(),
+        'style': STYLE,
+        'rules': result['rules'],
+        'date': datetime.now().strftime("%Y-%m-%d %H:%M"),
+        'step_count': str(len(steps)),
+        'max_rps': format_id_number(result['max_sustainable_rps'], 1),
+        'max_detail': f"Step {best['index']}, P95 {format_id_number(best['p95'], 1)} ms" if best else "No step passed",
+        'knee_rps': format_id_number(point['rps'], 1) if point else "-",
+        'knee_detail': f"P95 {format_id_number(point['p95'], 1)} ms" if point else "Needs at least 3 steps",
+        'fail_rate': f"{format_id_number(result['first_failing_rate'])} Req/s" if result['first_failing_rate'] else "-",
+        'fail_reason': result['first_failure'] or "Never failed within the search range",
+        'step_rows': rows,
+        'curve_p50': json.dumps(curve['p50']),
+        'curve_p95': json.dumps(curve['p95']),
+        'curve_p99': json.dumps(curve['p99']),
+        'knee_point': json.dumps([{'x': point['rps'], 'y': point['p95']}] if point else []),
+        'step_labels': js_literal([f"#{s['index']}" for s in steps]),
+        'step_offered': json.dumps([s['rate'] for s in steps]),
+        'step_delivered': json.dumps([s['rps'] for s in steps]),
+        'step_colors': json.dumps(['#22c55e' if s['passed'] else '#ef4444' for s in steps]),
+    })
+    with open(os.path.join(run_dir, REPORT_HTML), 'w') as f:
+        f.write(html)
+
+def finish(run_dir, result):
+    # Manifest + report, then the step files merged into the run's results.csv
+    # so the normal report, history and regression gate see the whole search
+    merged = None
+    outputs = [os.path.join(run_dir, s['output']) for s in result['steps']]
+    try: merged = merge_run(run_dir, outputs)
+    except (OSError, ValueError) as e: print(f"Merge failed: {e}")
+    if merged: result['merged'] = merged
+    with open(os.path.join(run_dir, MANIFEST), 'w') as f:
+        json.dump(result, f, indent=2)
+    render(run_dir, result)
+    point = result['knee']
+    print(f"capacity: max sustainable {format_id_number(result['max_sustainable_rps'], 1)} ops/s "
+          f"(offered {format_id_number(result['max_sustainable_rate'])}/s)")
+    if point:
+        print(f"capacity knee: {format_id_number(point['rps'], 1)} ops/s at p95={point['p95']:.2f}ms")
+    if merged:
+        # Same lines as the coordinator; techton reads "merged latency" / "merged errors"
+        print(f"merged steps: {len(result['steps'])} ({format_id_number(merged['samples'])} samples)")
+        print(f"merged latency: avg={merged['avg']:.2f}ms p(95)={merged['p95']:.2f}ms "
+              f"p(99)={merged['p99']:.2f}ms max={merged['max']:.2f}ms")
+        print(f"merged errors: {merged['errors']}")
+        if merged.get('dropped'): print(f"merged dropped: {merged['dropped']}")
+    print(f"Capacity report generated: {os.path.join(run_dir, REPORT_HTML)}")
+
+def main():
+    argv, opts = split_options(sys.argv)
+    if len(argv) >= 3 and argv[1] == 'report':
+        with open(os.path.join(argv[2], MANIFEST), 'r') as f:
+            result = json.load(f)
+        render(argv[2], result)
+        print(f"Capacity report generated: {os.path.join(argv[2], REPORT_HTML)}")
+        return
+    if len(argv) < 3 or argv[1] != 'run' or not isinstance(opts.get('cmd'), str):
+        print(f"Usage: capacity.py run <run_dir> --cmd=TEMPLATE [--start={DEFAULT_START}] [--max={DEFAULT_MAX}] "
+              f"[--growth={GROWTH}] [--resolution={RESOLUTION}] [--max-steps={MAX_STEPS}] [--budget={BUDGET_S}] "
+              f"[--rules={DEFAULT_RULES}] [--min-throughput={MIN_THROUGHPUT_PCT:g}]")
+        print("       capacity.py report <run_dir>")
+        sys.exit(1)
+    try:
+        search = CapacitySearch(argv[2], opts['cmd'], opts.get('rules', DEFAULT_RULES),
+                                int(opts.get('start', DEFAULT_START)), int(opts.get('max', DEFAULT_MAX)),
+                                float(opts.get('growth', GROWTH)), float(opts.get('resolution', RESOLUTION)),
+                                int(opts.get('max-steps', MAX_STEPS)), int(opts.get('budget', BUDGET_S)),
+                                float(opts.get('min-throughput', MIN_THROUGHPUT_PCT)))
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    result = search.run()
+    if not result['steps']:
+        print("No steps were run.")
+        sys.exit(1)
+    finish(argv[2], result)
+
+if __name__ == "__main__":
+    main()
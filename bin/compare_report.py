@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# Techton Comparison Report
+# One HTML page for many runs: overlaid latency / throughput curves, a
+# per-run percentile table and trend lines across dates. Result files are
+# parsed concurrently in a process pool (each worker also leaves the usual
+# .tcol cache behind, so re-running a comparison only reads the caches).
+#
+#   compare_report.py <output_html> <run_dir|result_file> [...] [--bucket=10s] [--jobs=N]
+#   compare_report.py <output_html> --history=results/history.db [--target=..] [--mode=..]
+#                     [--status=..] [--since=YYYY-MM-DD] [--until=YYYY-MM-DD] [--last=N]
+import sys
+import os
+import json
+from html import escape
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from report_gen import (TEMPLATE_HTML, load_results, split_options, parse_bucket, bucket_label, lttb,
+                        minmax_envelope, chart_points, format_id_number, js_literal, render_template, chart_library,
+                        pack_series, REPORT_PERCENTILES)
+from history_db import connect, query_runs, normalize_ts, result_file
+
+# Configuration
+DEFAULT_BUCKET = "10s" # Overlaid curves of long runs stay readable at 10s
+MAX_OVERLAY_POINTS = 300 # Points per run per overlaid curve
+MAX_OVERLAY_RUNS = 12 # Newest runs drawn on the overlay charts (all runs stay in the table/trend)
+PALETTE = ('#38bdf8', '#facc15', '#f87171', '#4ade80', '#c084fc', '#fb923c',
+           '#2dd4bf', '#f472b6', '#a3e635', '#818cf8', '#fbbf24', '#94a3b8')
+# Same look as the single-run report
+STYLE = TEMPLATE_HTML[TEMPLATE_HTML.index('<style>'):TEMPLATE_HTML.index('</style>') + len('</style>')]
+
+TEMPLATE_COMPARE_HTML = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Techton Comparison Report</title>
+    <script>{{ chart_lib }}</script>
+    {{ style }}
+</head>
+<body>
+
+    <div class="header">
+        <div class="brand">
+            <span>⚡ TECHTON</span>
+            <span style="font-weight: 400; color: white;">Comparison Report</span>
+        </div>
+        <div class="meta-info">
+            <div>Scope: <strong>{{ title }}</strong></div>
+            <div>Date: {{ date }}</div>
+            <div>Runs: {{ span }}</div>
+        </div>
+    </div>
+
+    <div class="grid">
+        <div class="card">
+            <div class="stat-label">Runs Compared</div>
+            <div class="stat-value">{{ run_count }}</div>
+        </div>
+        <div class="card">
+            <div class="stat-label">P95 Latency (Latest)</div>
+            <div class="stat-value">{{ last_p95 }}</div>
+            <div class="sub-stat">First run: {{ base_p95 }}</div>
+        </div>
+        <div class="card">
+            <div class="stat-label">Throughput (Latest)</div>
+            <div class="stat-value">{{ last_rps }} Req/s</div>
+            <div class="sub-stat">First run: {{ base_rps }} Req/s</div>
+        </div>
+        <div class="card">
+            <div class="stat-label">Error Rate (Latest)</div>
+            <div class="stat-value">{{ last_err }}%</div>
+        </div>
+    </div>
+
+    <div class="chart-container">
+        <canvas id="trendChart"></canvas>
+    </div>
+
+    <div class="chart-container">
+        <canvas id="latencyChart"></canvas>
+    </div>
+
+    <div class="chart-container">
+        <canvas id="throughputChart"></canvas>
+    </div>
+
+    <div class="table-container">
+        <h3 style="margin-top: 0;">Per-Run Percentiles</h3>
+        <table>
+            <thead>
+                <tr>
+                    <th>Date</th>
+                    <th>Run</th>
+                    <th>Target</th>
+                    <th>Mode</th>
+                    <th>Requests</th>
+                    <th>Req/s</th>
+                    <th>Errors</th>
+                    <th>Avg</th>
+                    <th>P50</th>
+                    <th>P90</th>
+                    <th>P95</th>
+                    <th>P99</th>
+                    <th>P99.9</th>
+                    <th>Max</th>
+                    <th>P95 vs First</th>
+                    <th>Req/s vs First</th>
+                </tr>
+            </thead>
+            <tbody>
+                {{ run_rows }}
+            </tbody>
+        </table>
+    </div>
+
+    <script>
+        const S = Chart.series({{ series }});
+        const withData = (sets) => sets.map((d) => Object.assign({}, d, { data: S[d.series] }));
+        const axisColor = { grid: { color: '#334155' }, ticks: { color: '#94a3b8' } };
+        new Chart(document.getElementById('trendChart'), {
+            type: 'line',
+            data: {
+                labels: {{ trend_labels }},
+                datasets: [
+                    { label: 'P50 (s)', data: {{ trend_p50 }}, borderColor: '#38bdf8', yAxisID: 'y' },
+                    { label: 'P95 (s)', data: {{ trend_p95 }}, borderColor: '#facc15', yAxisID: 'y' },
+                    { label: 'P99 (s)', data: {{ trend_p99 }}, borderColor: '#f87171', yAxisID: 'y' },
+                    { label: 'Req/s', data: {{ trend_rps }}, borderColor: '#4ade80', borderDash: [6, 4], yAxisID: 'rps' },
+                    { label: 'Error %', data: {{ trend_err }}, borderColor: '#ef4444', borderDash: [2, 3], yAxisID: 'rps', hidden: true }
+                ]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                interaction: { mode: 'index', intersect: false },
+                plugins: {
+                    legend: { labels: { color: '#94a3b8' } },
+                    title: { display: true, text: 'Trend Across Runs', color: '#f8fafc', font: { size: 16 } }
+                },
+                scales: {
+                    y: { ...axisColor, position: 'left', title: { display: true, text: 'Seconds', color: '#64748b' } },
+                    rps: { ...axisColor, position: 'right', grid: { drawOnChartArea: false }, title: { display: true, text: 'Requests per Second', color: '#64748b' } },
+                    x: { ...axisColor, ticks: { color: '#94a3b8', maxRotation: 60 } }
+                }
+            }
+        });
+
+        const overlayOptions = (title, yTitle) => ({
+            responsive: true,
+            maintainAspectRatio: false,
+            interaction: { mode: 'nearest', axis: 'x', intersect: false },
+            plugins: {
+                legend: { labels: { color: '#94a3b8' } },
+                title: { display: true, text: title, color: '#f8fafc', font: { size: 16 } }
+            },
+            scales: {
+                y: { ...axisColor, title: { display: true, text: yTitle, color: '#64748b' } },
+                x: {
+                    type: 'linear',
+                    grid: { color: '#334155' },
+                    ticks: { color: '#94a3b8', maxTicksLimit: 20, callback: function(value) { return value + 's'; } },
+                    title: { display: true, text: 'Test Duration (s), {{ bucket }} buckets', color: '#64748b' }
+                }
+            }
+        });
+        Chart.lazy('latencyChart', (canvas) => new Chart(canvas, {
+            type: 'line',
+            data: { datasets: withData({{ latency_sets }}) },
+            options: overlayOptions('P95 Latency Overlay (last {{ overlay_count }} runs)', 'Seconds')
+        }));
+        Chart.lazy('throughputChart', (canvas) => new Chart(canvas, {
+            type: 'line',
+            data: { datasets: withData({{ throughput_sets }}) },
+            options: overlayOptions('Throughput Overlay (last {{ overlay_count }} runs)', 'Requests per Second')
+        }));
+    </script>
+</body>
+</html>
+"""
+
+def run_started(path):
+    # run_2024-05-01_13-45-10_5u -> 2024-05-01 13:45:10, else the file time
+    name = os.path.basename(os.path.normpath(path))
+    if name.startswith('run_'):
+        ts = normalize_ts(name[4:])
+        if ts != name[4:].strip(): return ts
+    return datetime.fromtimestamp(os.path.getmtime(path)).strftime('%Y-%m-%d %H:%M:%S')
+
+def summarize(source, bucket_ms):
+    # Worker: everything the comparison needs from one run, as plain data
+    data = load_results(source)
+    if not data: return None
+    hist = data.histogram
+    per_sec = data.rollup(1000)
+    active = sum(1 for c, e in zip(per_sec.count, per_sec.errors) if c + e)
+    series = data.rollup(bucket_ms)
+    width_s = bucket_ms / 1000
+    xs = series.starts()
+    lat_p95 = [v / 1000 for v in series.p95]
+    tp = [c / width_s for c in series.count]
+    return {
+        'samples': data.total,
+        'errors': data.error_count,
+        'error_rate': data.error_count / data.total * 100,
+        'rps': data.total / active if active else 0,
+        'peak_rps': max((c + e for c, e in zip(per_sec.count, per_sec.errors)), default=0),
+        'avg': hist.mean() / 1000,
+        'pcts': {str(p): v / 1000 for p, v in hist.percentiles().items()},
+        'max': (hist.max or 0) / 1000,
+        'p95_curve': chart_points(xs, lat_p95, lttb(xs, lat_p95, MAX_OVERLAY_POINTS)),
+        'tp_curve': chart_points(xs, tp, minmax_envelope(tp, MAX_OVERLAY_POINTS), 1),
+    }
+
+def collect_inputs(paths):
+    runs = []
+    for path in paths:
+        if os.path.isdir(path):
+            source, _ = result_file(path)
+            if source is None:
+                print(f"Skipping {path}: no results.csv / result.jtl")
+                continue
+            runs.append({'label': os.path.basename(os.path.normpath(path)), 'source': source,
+                         'started': run_started(path), 'target': '', 'mode': ''})
+        elif os.path.isfile(path):
+            runs.append({'label': os.path.basename(os.path.dirname(os.path.abspath(path))) or path, 'source': path,
+                         'started': run_started(os.path.dirname(os.path.abspath(path))), 'target': '', 'mode': ''})
+        else:
+            print(f"Skipping {path}: not found")
+    return sorted(runs, key=lambda r: r['started'])
+
+def collect_history(db_path, opts):
+    conn = connect(db_path)
+    rows = query_runs(conn, target=opts.get('target'), mode=opts.get('mode'), status=opts.get('status'),
+                      since=opts.get('since'), until=opts.get('until'))
+    conn.close()
+    runs = []
+    for row in rows:
+        source, _ = result_file(row['path']) if row['path'] and os.path.isdir(row['path']) else (None, None)
+        if source is None: continue
+        runs.append({'label': os.path.basename(row['path']), 'source': source, 'started': row['started'],
+                     'target': row['target'] or '', 'mode': row['mode'] or ''})
+    return runs
+
+def summarize_all(runs, bucket_ms, jobs):
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(summarize, r['source'], bucket_ms) for r in runs]
+        for run, future in zip(runs, futures):
+            try:
+                run['stats'] = future.result()
+            except Exception as e:
+                print(f"Skipping {run['label']}: {e}")
+                run['stats'] = None
+    return [r for r in runs if r['stats']]
+
+def delta_cell(value, base):
+    if not base: return "<td>-</td>"
+    change = (value - base) / base * 100
+    cls = "text-danger" if change > 10 else ("text-success" if change < -10 else "")
+    return f"<td><span class='{cls}'>{'+' if change >= 0 else ''}{format_id_number(change, 1)}%</span></td>"
+
+def render(runs, output_file, bucket_ms, title):
+    base = runs[0]['stats']
+    rows_html = ""
+    for run in runs:
+        st = run['stats']
+        pcts = st['pcts']
+        err_class = "text-danger" if st['error_rate'] > 5 else ("text-warning" if st['error_rate'] > 0 else "text-success")
+        rows_html += (
+            f"<tr><td>{escape(run['started'])}</td><td>{escape(run['label'])}</td>"
+            f"<td>{escape(run['target'])}</td><td>{escape(run['mode'])}</td>"
+            f"<td>{format_id_number(st['samples'])}</td><td>{format_id_number(st['rps'], 1)}</td>"
+            f"<td><span class='{err_class}'>{format_id_number(st['error_rate'], 2)}%</span></td>"
+            f"<td>{format_id_number(st['avg'], 3)}s</td>"
+            + "".join(f"<td>{format_id_number(pcts[str(p)], 3)}s</td>" for p in REPORT_PERCENTILES)
+            + f"<td>{format_id_number(st['max'], 3)}s</td>"
+            + delta_cell(pcts['95'], base['pcts']['95'])
+            + delta_cell(st['rps'], base['rps'])
+            + "</tr>"
+        )
+
+    overlay = runs[-MAX_OVERLAY_RUNS:]
+    lat_sets, tp_sets, series = [], [], {}
+    for i, run in enumerate(overlay):
+        color = PALETTE[i % len(PALETTE)]
+        label = f"{run['started']} {run['target']}".strip()
+        series[f"p95_{i}"] = run['stats']['p95_curve']
+        series[f"tp_{i}"] = run['stats']['tp_curve']
+        lat_sets.append({'label': label, 'series': f"p95_{i}", 'borderColor': color,
+                         'pointRadius': 0, 'borderWidth': 1.5, 'tension': 0.3})
+        tp_sets.append({'label': label, 'series': f"tp_{i}", 'borderColor': color,
+                        'pointRadius': 0, 'borderWidth': 1.5, 'tension': 0.3})
+
+    trend_labels = [r['started'] for r in runs]
+    trend = {str(p): [round(r['stats']['pcts'][str(p)], 4) for r in runs] for p in (50, 95, 99)}
+    trend_rps = [round(r['stats']['rps'], 1) for r in runs]
+    trend_err = [round(r['stats']['error_rate'], 3) for r in runs]
+
+    last = runs[-1]['stats']
+    html = render_template(TEMPLATE_COMPARE_HTML, {
+        'chart_lib': chart_library(),
+        'style': STYLE,
+        'title': escape(title),
+        'date': datetime.now().strftime("%Y-%m-%d %H:%M"),
+        'run_count': format_id_number(len(runs)),
+        'span': escape(f"{runs[0]['started'][:10]} → {runs[-1]['started'][:10]}"),
+        'last_p95': f"{format_id_number(last['pcts']['95'], 3)}s",
+        'base_p95': f"{format_id_number(base['pcts']['95'], 3)}s",
+        'last_rps': format_id_number(last['rps'], 1),
+        'base_rps': format_id_number(base['rps'], 1),
+        'last_err': format_id_number(last['error_rate'], 2),
+        'bucket': bucket_label(bucket_ms),
+        'overlay_count': str(len(overlay)),
+        'run_rows': rows_html,
+        'series': pack_series(series),
+        'latency_sets': js_literal(lat_sets),
+        'throughput_sets': js_literal(tp_sets),
+        'trend_labels': js_literal(trend_labels),
+        'trend_p50': json.dumps(trend['50']),
+        'trend_p95': json.dumps(trend['95']),
+        'trend_p99': json.dumps(trend['99']),
+        'trend_rps': json.dumps(trend_rps),
+        'trend_err': json.dumps(trend_err),
+    })
+    with open(output_file, 'w') as f:
+        f.write(html)
+
+def main():
+    argv, opts = split_options(sys.argv)
+    if len(argv) < 2 or (len(argv) < 3 and not isinstance(opts.get('history'), str)):
+        print("Usage: compare_report.py <output_html> <run_dir|result_file> [...] [--bucket=10s] [--jobs=N]")
+        print("       compare_report.py <output_html> --history=results/history.db [--target=..] [--mode=..] "
+              "[--status=..] [--since=YYYY-MM-DD] [--until=YYYY-MM-DD] [--last=N]")
+        sys.exit(1)
+    output_file = argv[1]
+    try:
+        bucket_ms = parse_bucket(opts.get('bucket', DEFAULT_BUCKET))
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    last = None
+    if 'last' in opts:
+        last = opts['last']
+        if not isinstance(last, str) or not last.isdigit() or int(last) < 1:
+            print("--last expects a number of runs, 1 or more")
+            sys.exit(1)
+        last = int(last)
+    jobs = int(opts.get('jobs', os.cpu_count() or 1))
+
+    if isinstance(opts.get('history'), str):
+        runs = collect_history(opts['history'], opts) + collect_inputs(argv[2:])
+        runs.sort(key=lambda r: r['started'])
+        title = " / ".join(v for v in (opts.get('target'), opts.get('mode')) if isinstance(v, str)) or "All runs"
+    else:
+        runs = collect_inputs(argv[2:])
+        title = "Selected runs"
+    if last:
+        runs = runs[-last:]
+    if not runs:
+        print("No runs with result files to compare.")
+        sys.exit(1)
+
+    runs = summarize_all(runs, bucket_ms, max(1, min(jobs, len(runs))))
+    if not runs:
+        print("No metric data found in the selected runs.")
+        sys.exit(1)
+    render(runs, output_file, bucket_ms, title)
+    print(f"Comparison report generated: {output_file} ({len(runs)} runs)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# Techton Shard Coordinator
+# Splits one k6 run across N generator processes (local, pinned to cores) or N
+# remote agents using k6 execution segments, so each shard runs its share of
+# the VUs or arrival rate. All shards start on the same wall-clock second;
+# their result files are merged into one run directory afterwards.
+#
+#   coordinator.py run <run_dir> <script.js> [--shards=N] [--nodes=host1,host2]
+#                      [--cmd=TEMPLATE] [--lead=3] [--k6=bin/k6]
+#   coordinator.py merge <run_dir>
+#
+# --cmd placeholders: {segment} {sequence} {output} {script} {cpus} {index}
+# {count}. Shards also get TECHTON_SHARD_INDEX / _COUNT / _SEGMENT in their
+# environment, so any process writing a k6 or JTL CSV can stand in for k6.
+import sys
+import os
+import csv
+import json
+import time
+import heapq
+import shlex
+import signal
+import threading
+import subprocess
+from fractions import Fraction
+
+from report_gen import load_results, save_histograms, detect_format, split_options, format_id_number
+from user_list import USERS_FILE, SHARD_FILE
+
+# Configuration
+SHARD_DIR = "shards"
+MERGED_CSV = "results.csv"
+MERGED_HISTOGRAM = "shards_histogram.json"
+MANIFEST = "coordinator.json"
+START_LEAD_S = 3 # Seconds between spawning and the synchronised start
+DEFAULT_K6 = os.path.join(os.path.dirname(os.path.abspath(__file__)), "k6")
+DEFAULT_CMD = ("{k6} run --execution-segment={segment} --execution-segment-sequence={sequence} "
+               "--out csv={output} {script}")
+REMOTE_DIR = "/tmp/techton_shard" # Working directory on remote agents
+TIMESTAMP_COLUMNS = ('timestamp', 'timeStamp')
+
+def segments(count):
+    # k6 execution segments "0:1/4", "1/4:1/2", ... and the shared sequence
+    bounds = [Fraction(i, count) for i in range(count + 1)]
+    sequence = ",".join(str(b) for b in bounds)
+    return [f"{bounds[i]}:{bounds[i + 1]}" for i in range(count)], sequence
+
+def cpu_sets(count):
+    # Disjoint core sets per shard; shards share cores only when there are
+    # more shards than cores
+    try: cores = sorted(os.sched_getaffinity(0))
+    except AttributeError: cores = list(range(os.cpu_count() or 1))
+    if count >= len(cores):
+        return [[cores[i % len(cores)]] for i in range(count)]
+    per = len(cores) // count
+    return [cores[i * per:(i + 1) * per] for i in range(count)]
+
+class Shard:
+    def __init__(self, index, count, segment, sequence, output, node=None, cpus=None):
+        self.index = index
+        self.count = count
+        self.segment = segment
+        self.sequence = sequence
+        self.output = output
+        self.node = node
+        self.cpus = cpus or []
+        self.log_path = os.path.splitext(output)[0] + ".log"
+        self.proc = None
+        self.log = None
+        self.exit_code = None
+        self.started_at = None
+
+    def fields(self, script, k6, output=None):
+        return {
+            'segment': self.segment,
+            'sequence': self.sequence,
+            'output': output or self.output,
+            'script': script,
+            'cpus': ",".join(str(c) for c in self.cpus),
+            'index': self.index,
+            'count': self.count,
+            'k6': k6,
+        }
+
+    def env(self):
+        env = dict(os.environ)
+        env['TECHTON_SHARD_INDEX'] = str(self.index)
+        env['TECHTON_SHARD_COUNT'] = str(self.count)
+        env['TECHTON_SHARD_SEGMENT'] = self.segment
+        return env
+
+class Coordinator:
+    def __init__(self, run_dir, script, count, nodes=None, cmd=DEFAULT_CMD, lead=START_LEAD_S, k6=DEFAULT_K6):
+        self.run_dir = run_dir
+        self.script = script
+        self.nodes = nodes or []
+        self.cmd = cmd
+        self.lead = lead
+        self.k6 = k6
+        if self.nodes: count = len(self.nodes)
+        self.count = count
+        self.shard_dir = os.path.join(run_dir, SHARD_DIR)
+        segs, sequence = segments(count)
+        cpus = [None] * count if self.nodes else cpu_sets(count)
+        self.shards = [
+            Shard(i, count, segs[i], sequence, os.path.join(self.shard_dir, f"shard_{i}.csv"),
+                  self.nodes[i] if self.nodes else None, cpus[i])
+            for i in range(count)
+        ]
+        self.start_at = None
+        self.stopping = False
+
+    def _local_command(self, shard):
+        return shlex.split(self.cmd.format(**shard.fields(self.script, self.k6)))
+
+    def _upload(self, shard):
+        # Copy the script and this shard's user list slice (or the whole
+        # users.tsv when the list is not split) to the agent
+        base = f"{REMOTE_DIR}_{shard.index}"
+        uploads = [self.script]
+        script_dir = os.path.dirname(self.script) or "."
+        for name in (SHARD_FILE.format(shard.index), USERS_FILE):
+            users = os.path.join(script_dir, name)
+            if os.path.exists(users):
+                uploads.append(users)
+                break
+        subprocess.run(['ssh', shard.node, f"mkdir -p {base}"], check=True)
+        subprocess.run(['scp', '-q'] + uploads + [f"{shard.node}:{base}/"], check=True)
+
+    def _remote_command(self, shard):
+        # Wait on the agent's own clock for the shared start second, then run;
+        # the CSV is fetched back afterwards
+        base = f"{REMOTE_DIR}_{shard.index}"
+        remote_script = f"{base}/{os.path.basename(self.script)}"
+        remote_output = f"{base}/shard.csv"
+        run = self.cmd.format(**shard.fields(remote_script, "k6", remote_output))
+        env = f"TECHTON_SHARD_INDEX={shard.index} TECHTON_SHARD_COUNT={shard.count} TECHTON_SHARD_SEGMENT={shard.segment}"
+        remote = (f"cd {base} && until [ \"$(date +%s)\" -ge {self.start_at} ]; do sleep 0.05; done; "
+                  f"{env} {run}")
+        return ['ssh', shard.node, remote], remote_output
+
+    def _relay(self, shard):
+        # Shard 0's console goes to our stdout too, so the HUD keeps a progress feed
+        for line in shard.proc.stdout:
+            shard.log.write(line)
+            sys.stdout.write(line)
+            sys.stdout.flush()
+
+    def stop(self, *args):
+        self.stopping = True
+        for shard in self.shards:
+            if shard.proc and shard.proc.poll() is None:
+                try: os.killpg(shard.proc.pid, signal.SIGTERM)
+                except OSError: pass
+
+    def run(self):
+        os.makedirs(self.shard_dir, exist_ok=True)
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        # Uploads first: however long they take, the lead is still ahead of
+        # every shard when the start second is fixed
+        for shard in self.shards:
+            if shard.node: self._upload(shard)
+        # Whole second, so remote agents can wait on `date +%s`
+        self.start_at = int(time.time() + self.lead) + 1
+        launches = []
+        for shard in self.shards:
+            if shard.node:
+                argv, remote_output = self._remote_command(shard)
+                launches.append((shard, argv, remote_output))
+            else:
+                launches.append((shard, self._local_command(shard), None))
+        relays = []
+        # Remote shards wait on their side; local ones are spawned together at start_at
+        for shard, argv, remote_output in launches:
+            if shard.node: self._spawn(shard, argv, relays)
+        delay = self.start_at - time.time()
+        if delay > 0: time.sleep(delay)
+        for shard, argv, remote_output in launches:
+            if not shard.node and not self.stopping: self._spawn(shard, argv, relays)
+        for shard, argv, remote_output in launches:
+            if shard.proc:
+                shard.exit_code = shard.proc.wait()
+        for t in relays: t.join()
+        for shard, argv, remote_output in launches:
+            if shard.log: shard.log.close()
+            if shard.node and shard.proc:
+                subprocess.run(['scp', '-q', f"{shard.node}:{remote_output}", shard.output])
+        return 1 if any(s.exit_code for s in self.shards) else 0
+
+    def _spawn(self, shard, argv, relays):
+        shard.log = open(shard.log_path, 'w')
+        cpus = set(shard.cpus) if shard.cpus and not shard.node else None
+        # Pin the engine before exec so every thread it starts inherits the set
+        preexec = (lambda: os.sched_setaffinity(0, cpus)) if cpus and hasattr(os, 'sched_setaffinity') else None
+        relay = shard.index == 0
+        # Own session (and process group), so stop() reaches wrapper shells and their children
+        shard.proc = subprocess.Popen(argv, env=shard.env(), preexec_fn=preexec, start_new_session=True,
+                                      stdout=subprocess.PIPE if relay else shard.log,
+                                      stderr=subprocess.STDOUT, text=relay)
+        shard.started_at = round(time.time(), 3)
+        if relay:
+            t = threading.Thread(target=self._relay, args=(shard,), daemon=True)
+            t.start()
+            relays.append(t)
+
+    def manifest(self, merged=None):
+        doc = {
+            'script': self.script,
+            'start_at': self.start_at,
+            'shards': [{
+                'index': s.index,
+                'node': s.node or 'local',
+                'segment': s.segment,
+                'cpus': s.cpus,
+                'output': os.path.relpath(s.output, self.run_dir),
+                'started_at': s.started_at,
+                'exit_code': s.exit_code,
+            } for s in self.shards],
+        }
+        if merged: doc['merged'] = merged
+        with open(os.path.join(self.run_dir, MANIFEST), 'w') as f:
+            json.dump(doc, f, indent=2)
+
+def _timestamp_index(header):
+    for name in TIMESTAMP_COLUMNS:
+        if name in header: return header.index(name)
+    raise ValueError("Shard file has no timestamp column")
+
+def _shard_rows(reader, ts_idx, mapping, width):
+    for row in reader:
+        if len(row) <= ts_idx: continue
+        try: ts = float(row[ts_idx])
+        except ValueError: continue
+        out = [''] * width
+        for i, value in enumerate(row):
+            if i < len(mapping): out[mapping[i]] = value
+        yield ts, out
+
+def merge_csv(paths, output):
+    # k-way merge on the timestamp column; each shard file is already in time
+    # order, so this streams with one row per shard in memory. Columns missing
+    # from a shard (extra tags) are left empty.
+    files = [open(p, 'r', newline='', encoding='utf-8', errors='ignore') for p in paths]
+    try:
+        readers = [csv.reader(f) for f in files]
+        headers = [next(r, []) for r in readers]
+        header = []
+        for h in headers:
+            header.extend(c for c in h if c not in header)
+        streams = []
+        for reader, h in zip(readers, headers):
+            if not h: continue
+            mapping = [header.index(c) for c in h]
+            streams.append(_shard_rows(reader, _timestamp_index(h), mapping, len(header)))
+        rows = 0
+        tmp = output + ".tmp"
+        with open(tmp, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for ts, row in heapq.merge(*streams, key=lambda item: item[0]):
+                writer.writerow(row)
+                rows += 1
+        os.replace(tmp, output)
+        return rows
+    finally:
+        for f in files: f.close()
+
+def merge_run(run_dir, shard_paths=None):
+    if shard_paths is None:
+        shard_dir = os.path.join(run_dir, SHARD_DIR)
+        names = sorted((n for n in os.listdir(shard_dir) if n.startswith('shard_') and n.endswith('.csv')),
+                       key=lambda n: int(n[6:-4]))
+        shard_paths = [os.path.join(shard_dir, n) for n in names]
+    shard_paths = [p for p in shard_paths if os.path.exists(p) and os.path.getsize(p) > 0]
+    if not shard_paths:
+        raise ValueError("No shard results to merge")
+    for p in shard_paths:
+        if detect_format(p) == 'jtl-xml':
+            raise ValueError(f"{p}: only CSV results (k6 or JTL CSV) can be merged")
+    merged_csv = os.path.join(run_dir, MERGED_CSV)
+    rows = merge_csv(shard_paths, merged_csv)
+    # Histograms come from the merged stream, not from adding per-shard ones:
+    # shard offsets are floored to whole seconds from each shard's own first
+    # sample, so realigning them would put samples a second off. Parsing the
+    # merged file buckets every sample on the run's one timeline, and leaves
+    # the .tcol cache the run report reuses.
+    data = load_results(merged_csv)
+    if not data:
+        raise ValueError("Shard results contain no samples")
+    overall = data.histogram
+    save_histograms(os.path.join(run_dir, MERGED_HISTOGRAM), overall, data.per_second)
+    return {
+        'shards': len(shard_paths),
+        'rows': rows,
+        'samples': overall.count,
+        'errors': data.error_count,
+        'dropped': data.dropped,
+        'avg': round(overall.mean(), 3),
+        'p95': round(overall.percentile(95), 3),
+        'p99': round(overall.percentile(99), 3),
+        'max': round(overall.max or 0, 3),
+    }
+
+def print_merged(merged):
+    # Last lines of the console log; techton reads "merged latency" / "merged errors"
+    print(f"merged shards: {merged['shards']} ({format_id_number(merged['samples'])} samples)")
+    print(f"merged latency: avg={merged['avg']:.2f}ms p(95)={merged['p95']:.2f}ms "
+          f"p(99)={merged['p99']:.2f}ms max={merged['max']:.2f}ms")
+    print(f"merged errors: {merged['errors']}")
+    if merged.get('dropped'): print(f"merged dropped: {merged['dropped']}")
+
+def main():
+    argv, opts = split_options(sys.argv)
+    if len(argv) >= 3 and argv[1] == 'merge':
+        try: merged = merge_run(argv[2])
+        except (OSError, ValueError) as e:
+            print(f"Merge failed: {e}")
+            sys.exit(1)
+        print_merged(merged)
+        return
+    if len(argv) < 4 or argv[1] != 'run':
+        print("Usage: coordinator.py run <run_dir> <script.js> [--shards=N] [--nodes=host1,host2] "
+              f"[--cmd=TEMPLATE] [--lead={START_LEAD_S}] [--k6=PATH]")
+        print("       coordinator.py merge <run_dir>")
+        sys.exit(1)
+
+    nodes = [n for n in opts.get('nodes', '').split(',') if n] if 'nodes' in opts else []
+    count = int(opts.get('shards', os.cpu_count() or 1))
+    if count < 1 and not nodes:
+        print("--shards must be at least 1")
+        sys.exit(1)
+    coordinator = Coordinator(argv[2], argv[3], count, nodes, opts.get('cmd', DEFAULT_CMD),
+                              float(opts.get('lead', START_LEAD_S)), opts.get('k6', DEFAULT_K6))
+    code = coordinator.run()
+    merged = None
+    try:
+        merged = merge_run(argv[2], [s.output for s in coordinator.shards])
+    except (OSError, ValueError) as e:
+        print(f"Merge failed: {e}")
+    coordinator.manifest(merged)
+    if merged: print_merged(merged)
+    sys.exit(code)
+
+if __name__ == "__main__":
+    main()
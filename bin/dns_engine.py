@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# Techton DNS Engine
+# Asyncio UDP query generator for the DNS_FLOOD vector. Queries for random
+# labels under the target zone (cache-busting, like dns_flood.sh) are built
+# from a pre-generated pool and paced by a token bucket that follows the
+# LINEAR / SPIKE / POISSON profiles. Every query's RTT and RCODE is written in
+# the k6 CSV format, so DNS runs get the same reports as LDAP runs.
+#
+#   dns_engine.py run --target=HOST[:PORT] [--domain=corp.local] [--rate=1000]
+#                     [--duration=60] [--ramp=0] [--profile=LINEAR|SPIKE|POISSON]
+#                     [--qtype=A] [--sockets=16] [--timeout=2] [--out=results.csv]
+import sys
+import os
+import time
+import random
+import struct
+import signal
+import asyncio
+from collections import deque
+from fractions import Fraction
+
+from report_gen import LatencyHistogram, split_options, format_id_number
+from ldap_engine import K6_CSV_HEADER, SCENARIOS, rate_at, run_length
+
+# Configuration
+DNS_PORT = 53
+DEFAULT_DOMAIN = "corp.local"
+DEFAULT_RATE = 1000 # Queries per second at full load
+DEFAULT_SOCKETS = 16 # Source ports; each has its own 16-bit query ID space
+DEFAULT_TIMEOUT = 2.0 # Seconds before an unanswered query counts as lost
+LABEL_POOL = 65536 # Pre-built random questions
+LABEL_LENGTH = 8
+LABEL_CHARS = "abcdefghijklmnopqrstuvwxyz0123456789"
+TICK_S = 0.001 # Token bucket refill interval
+BURST_S = 0.05 # Bucket depth in seconds of rate; tokens beyond it are dropped
+SWEEP_S = 0.1 # Timeout sweep interval
+FLUSH_S = 1.0
+QTYPES = {'A': 1, 'NS': 2, 'CNAME': 5, 'SOA': 6, 'PTR': 12, 'MX': 15, 'TXT': 16, 'AAAA': 28, 'SRV': 33, 'ANY': 255}
+RCODES = {0: 'NOERROR', 1: 'FORMERR', 2: 'SERVFAIL', 3: 'NXDOMAIN', 4: 'NOTIMP', 5: 'REFUSED'}
+ANSWERED = (0, 3) # Random labels normally come back NXDOMAIN; both mean the server coped
+HEADER = struct.Struct('>HHHHHH')
+RECURSION_DESIRED = 0x0100
+
+def encode_name(name):
+    out = b''
+    for label in name.strip('.').split('.'):
+        if label:
+            raw = label.encode('idna') if not label.isascii() else label.encode()
+            out += bytes([len(raw)]) + raw
+    return out + b'\x00'
+
+def question_pool(domain, qtype, size=LABEL_POOL, rng=None):
+    # Question sections for `size` random labels, built once up front
+    rng = rng or random.Random()
+    tail = encode_name(domain) + struct.pack('>HH', QTYPES[qtype], 1)
+    pool = []
+    for _ in range(size):
+        label = ''.join(rng.choice(LABEL_CHARS) for _ in range(LABEL_LENGTH)).encode()
+        pool.append(bytes([len(label)]) + label + tail)
+    return pool
+
+def rcode_name(code):
+    return f"{RCODES.get(code, 'RCODE')} ({code})"
+
+class DnsResultWriter:
+    # k6 CSV rows, formatted by hand: at tens of thousands of queries per
+    # second csv.writer is a noticeable share of the budget
+    def __init__(self, path, scenario, op='DNS_FLOOD'):
+        self.f = open(path, 'w', newline='')
+        self.f.write(",".join(K6_CSV_HEADER) + "\n")
+        self.rows = []
+        # metric,timestamp,value,check,error,error_code,...,scenario,service,status,...,extra_tags,metadata
+        self.tail = f",,,,,,{scenario},,{{}},,,,op={op},\n"
+
+    def answer(self, ts, rtt_ms, corrected_ms, rcode, ok):
+        tail = self.tail.format(rcode_name(rcode))
+        self.rows.append(f"iteration_duration,{ts:.3f},{rtt_ms:.3f},,,{tail}")
+        self.rows.append(f"corrected_duration,{ts:.3f},{corrected_ms:.3f},,,{tail}")
+        if ok: self.rows.append(f"checks,{ts:.3f},1,dns answer,,{tail}")
+        else: self.rows.append(f"checks,{ts:.3f},0,dns answer: {rcode_name(rcode)},{rcode_name(rcode)},{rcode}{tail}")
+
+    def lost(self, ts, reason):
+        self.rows.append(f"checks,{ts:.3f},0,dns answer: {reason},{reason},{self.tail.format('')}")
+
+    def dropped(self, ts, n):
+        row = f"dropped_iterations,{ts:.3f},1,,,{self.tail.format('')}"
+        self.rows.extend([row] * n)
+
+    def flush(self):
+        if self.rows:
+            self.f.write(''.join(self.rows))
+            self.rows = []
+        self.f.flush()
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+class QuerySocket(asyncio.DatagramProtocol):
+    # One UDP socket; outstanding queries are matched by ID and expired in
+    # send order from a deque, so the timeout sweep never scans everything
+    def __init__(self, engine):
+        self.engine = engine
+        self.transport = None
+        self.next_id = random.randrange(0x10000)
+        self.pending = {}
+        self.order = deque()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def send(self, question, now, ts, intended):
+        qid = self.next_id
+        self.next_id = (qid + 1) & 0xffff
+        if qid in self.pending:
+            # ID space wrapped before the old query was answered
+            self.engine.expire(self.pending.pop(qid)[1], "id reuse")
+        self.pending[qid] = (now, ts, intended)
+        self.order.append((qid, now))
+        self.transport.sendto(HEADER.pack(qid, RECURSION_DESIRED, 1, 0, 0, 0) + question)
+
+    def datagram_received(self, data, addr):
+        if len(data) < 4: return
+        qid, flags = struct.unpack_from('>HH', data)
+        sent = self.pending.pop(qid, None)
+        if sent is None: return
+        self.engine.answered(sent, time.perf_counter(), flags & 0x0f)
+
+    def error_received(self, exc):
+        self.engine.icmp_errors += 1
+
+    def sweep(self, now, timeout):
+        order, pending = self.order, self.pending
+        while order and now - order[0][1] >= timeout:
+            qid, sent = order.popleft()
+            entry = pending.get(qid)
+            if entry is not None and entry[0] == sent:
+                del pending[qid]
+                self.engine.expire(entry[1], "timeout")
+        # Answered queries leave stale entries behind; trim them once old enough
+        while order and order[0][0] not in pending:
+            order.popleft()
+
+class DnsEngine:
+    def __init__(self, opts):
+        host, _, port = opts['target'].partition(':')
+        self.addr = (host, int(port or DNS_PORT))
+        self.profile = opts.get('profile', 'LINEAR').upper()
+        if self.profile not in SCENARIOS:
+            raise ValueError(f"Unknown profile {self.profile} (use {', '.join(SCENARIOS)})")
+        qtype = opts.get('qtype', 'A').upper()
+        if qtype not in QTYPES:
+            raise ValueError(f"Unknown qtype {qtype} (use {', '.join(QTYPES)})")
+        self.rate = float(opts.get('rate', DEFAULT_RATE))
+        segment = opts.get('segment') or os.environ.get('TECHTON_SHARD_SEGMENT')
+        if segment:
+            lo, _, hi = segment.partition(':')
+            self.rate *= float(Fraction(hi) - Fraction(lo))
+        self.duration = float(opts.get('duration', 60))
+        self.ramp = float(opts.get('ramp', 0))
+        self.timeout = float(opts.get('timeout', DEFAULT_TIMEOUT))
+        self.socket_count = max(1, int(opts.get('sockets', DEFAULT_SOCKETS)))
+        self.rng = random.Random()
+        self.questions = question_pool(opts.get('domain', DEFAULT_DOMAIN), qtype, LABEL_POOL, self.rng)
+        self.out = DnsResultWriter(opts.get('out', 'results.csv'), SCENARIOS[self.profile])
+        self.hist = LatencyHistogram()
+        self.corrected = LatencyHistogram()
+        self.sent = self.answers = self.failed = self.dropped = self.icmp_errors = 0
+        self.stopping = False
+        # perf_counter -> wall clock, so rows carry epoch timestamps without
+        # calling time.time() per query
+        self.wall_offset = time.time() - time.perf_counter()
+
+    def answered(self, sent, now, rcode):
+        send_time, ts, intended = sent
+        rtt = (now - send_time) * 1000
+        corrected = (now - intended) * 1000
+        ok = rcode in ANSWERED
+        self.out.answer(ts, rtt, corrected, rcode, ok)
+        self.hist.record(rtt)
+        self.corrected.record(corrected)
+        self.answers += 1
+        if not ok: self.failed += 1
+
+    def expire(self, ts, reason):
+        self.out.lost(ts, reason)
+        self.failed += 1
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stop)
+        sockets = []
+        for _ in range(self.socket_count):
+            _, proto = await loop.create_datagram_endpoint(lambda: QuerySocket(self), remote_addr=self.addr)
+            sockets.append(proto)
+        print(f"dns engine: {self.addr[0]}:{self.addr[1]}, {self.socket_count} sockets, "
+              f"{format_id_number(len(self.questions))} pre-built questions", flush=True)
+
+        questions, n_q = self.questions, len(self.questions)
+        n_s = self.socket_count
+        total = run_length(self.profile, self.duration, self.ramp)
+        start = last = time.perf_counter()
+        next_sweep = next_flush = start
+        tokens = 0.0
+        next_arrival = start + self.rng.expovariate(self.rate) if self.profile == 'POISSON' else None
+        last_sent = last_report = 0
+        i = 0
+        while not self.stopping:
+            now = time.perf_counter()
+            t = now - start
+            if t >= total: break
+            r = rate_at(self.profile, t, self.rate, self.duration, self.ramp)
+            # Token bucket: refill at the profile rate (exponential gaps for
+            # POISSON), cap at BURST_S of rate so a stalled loop cannot burst
+            if next_arrival is not None:
+                while next_arrival <= now:
+                    tokens += 1
+                    next_arrival += self.rng.expovariate(self.rate)
+            else:
+                tokens += r * (now - last)
+            burst = max(1.0, r * BURST_S)
+            if tokens > burst:
+                overflow = int(tokens - burst)
+                if overflow:
+                    self.dropped += overflow
+                    self.out.dropped(self.wall_offset + now, overflow)
+                tokens -= overflow
+            last = now
+            sends = int(tokens)
+            tokens -= sends
+            ts = self.wall_offset + now
+            # The batch's tokens accrued over the last sends / r seconds; each
+            # query's intended send time is its place in that accrual
+            gap = 1 / r if r > 0 else 0.0
+            for k in range(sends - 1, -1, -1):
+                sockets[i % n_s].send(questions[i % n_q], now, ts, now - k * gap)
+                i += 1
+            self.sent += sends
+            if now >= next_sweep:
+                for s in sockets: s.sweep(now, self.timeout)
+                next_sweep = now + SWEEP_S
+            if now >= next_flush:
+                self.out.flush()
+                qps = (self.sent - last_sent) / (now - last_report if last_report else FLUSH_S)
+                print(f"running ({t:.1f}s), sent={self.sent} ({qps:.0f}/s), answered={self.answers}, "
+                      f"failed={self.failed}, dropped={self.dropped}", flush=True)
+                last_sent, last_report = self.sent, now
+                next_flush = now + FLUSH_S
+            await asyncio.sleep(TICK_S)
+
+        # Give the last queries their full timeout before declaring them lost
+        deadline = time.perf_counter() + self.timeout
+        while any(s.pending for s in sockets) and time.perf_counter() < deadline and not self.stopping:
+            await asyncio.sleep(SWEEP_S)
+        now = time.perf_counter()
+        for s in sockets:
+            s.sweep(now + self.timeout, self.timeout)
+            s.transport.close()
+        self.out.close()
+        self.summary(now - start)
+
+    def stop(self):
+        self.stopping = True
+
+    def summary(self, elapsed):
+        # k6-style end-of-test lines; techton reads avg= and the check counts
+        h = self.hist
+        passed = self.sent - self.failed
+        pct = passed / self.sent * 100 if self.sent else 0
+        print(f"\n     checks.........................: {pct:.2f}% ✓ {passed} ✗ {self.failed}")
+        print(f"     dropped_iterations.............: {self.dropped}")
+        print(f"     iteration_duration.............: avg={h.mean():.2f}ms min={(h.min or 0):.2f}ms "
+              f"med={h.percentile(50):.2f}ms max={(h.max or 0):.2f}ms p(90)={h.percentile(90):.2f}ms "
+              f"p(95)={h.percentile(95):.2f}ms")
+        c = self.corrected
+        print(f"     corrected_duration.............: avg={c.mean():.2f}ms min={(c.min or 0):.2f}ms "
+              f"med={c.percentile(50):.2f}ms max={(c.max or 0):.2f}ms p(90)={c.percentile(90):.2f}ms "
+              f"p(95)={c.percentile(95):.2f}ms")
+        print(f"     iterations.....................: {format_id_number(self.sent)} {self.sent / elapsed if elapsed else 0:.2f}/s")
+        if self.icmp_errors: print(f"     icmp_errors....................: {self.icmp_errors}")
+
+def main():
+    argv, opts = split_options(sys.argv)
+    if len(argv) < 2 or argv[1] != 'run' or 'target' not in opts:
+        print(f"Usage: dns_engine.py run --target=HOST[:PORT] [--domain={DEFAULT_DOMAIN}] [--rate={DEFAULT_RATE}] "
+              "[--duration=60] [--ramp=0] [--profile=LINEAR|SPIKE|POISSON] [--qtype=A] "
+              f"[--sockets={DEFAULT_SOCKETS}] [--timeout={DEFAULT_TIMEOUT:g}] [--out=results.csv]")
+        sys.exit(1)
+    try:
+        engine = DnsEngine(opts)
+    except (ValueError, OSError) as e:
+        print(e)
+        sys.exit(1)
+    asyncio.run(engine.run())
+
+if __name__ == "__main__":
+    main()
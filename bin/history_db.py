@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# Techton History Index
+# SQLite index of every run: metadata, summary percentiles and artifact list,
+# indexed by target / mode / date. The history menu pages through it instead
+# of re-reading history.csv, and retention pruning only touches runs that are
+# actually due instead of walking results/ on every launch.
+#
+#   history_db.py add <db> --ts=.. --target=.. --mode=.. --users=.. --duration=..
+#                          --latency=.. --errors=.. --status=.. --path=RUN_DIR
+#   history_db.py list <db> [--page=1] [--per-page=20] [--target=..] [--mode=..]
+#                           [--status=..] [--since=YYYY-MM-DD] [--until=YYYY-MM-DD]
+#   history_db.py show <db> <id>
+#   history_db.py prune <db> <results_dir> [--days=30]
+#   history_db.py import <db> <history.csv>
+#   history_db.py baseline <db> [<id>]   (pin a run as the regression baseline of its target/mode)
+import sys
+import os
+import re
+import csv
+import time
+import shutil
+import sqlite3
+
+from report_gen import load_results, split_options, percentile_label, format_id_number, REPORT_PERCENTILES
+
+# Configuration
+SCHEMA_VERSION = 1
+PER_PAGE = 20
+RETENTION_DAYS = 30
+ORPHAN_SCAN_S = 86400 # Directory sweep for runs missing from the index, at most daily
+RESULT_FILES = (('results.csv', 'K6'), ('result.jtl', 'JMeter'))
+SUMMARY_COLUMNS = ('samples', 'error_rate', 'avg', 'p50', 'p90', 'p95', 'p99', 'p999', 'max')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started TEXT NOT NULL,
+    target TEXT,
+    mode TEXT,
+    users INTEGER,
+    duration INTEGER,
+    avg_latency INTEGER,
+    errors INTEGER,
+    status TEXT,
+    path TEXT UNIQUE,
+    engine TEXT,
+    samples INTEGER,
+    error_rate REAL,
+    avg REAL,
+    p50 REAL,
+    p90 REAL,
+    p95 REAL,
+    p99 REAL,
+    p999 REAL,
+    max REAL,
+    expired INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs(started);
+CREATE INDEX IF NOT EXISTS runs_target ON runs(target, started);
+CREATE INDEX IF NOT EXISTS runs_mode ON runs(mode, started);
+CREATE INDEX IF NOT EXISTS runs_retention ON runs(expired, started);
+CREATE TABLE IF NOT EXISTS artifacts (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    size INTEGER,
+    PRIMARY KEY (run_id, name)
+);
+CREATE TABLE IF NOT EXISTS baselines (
+    target TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    pinned TEXT NOT NULL,
+    PRIMARY KEY (target, mode)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    conn.execute("INSERT OR IGNORE INTO meta VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+    return conn
+
+def _meta(conn, key, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row['value'] if row else default
+
+def _set_meta(conn, key, value):
+    conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, str(value)))
+
+def normalize_ts(ts):
+    # Older history rows used the directory form 2024-05-01_13-45-10
+    m = re.match(r'^(\d{4}-\d{2}-\d{2})[ _](\d{2})[:-](\d{2})[:-](\d{2})', ts.strip())
+    return f"{m.group(1)} {m.group(2)}:{m.group(3)}:{m.group(4)}" if m else ts.strip()
+
+def _int(value):
+    try: return int(float(value))
+    except (TypeError, ValueError): return None
+
+def result_file(path):
+    for name, engine in RESULT_FILES:
+        if os.path.exists(os.path.join(path, name)):
+            return os.path.join(path, name), engine
+    return None, None
+
+def summarize_run(path):
+    # Summary columns from the run's result file (reads the .tcol cache when present)
+    source, engine = result_file(path)
+    if source is None: return None, {}
+    data = load_results(source)
+    if not data: return engine, {}
+    hist = data.histogram
+    pcts = hist.percentiles((50, 90, 95, 99, 99.9))
+    return engine, {
+        'samples': data.total,
+        'error_rate': round(data.error_count / data.total * 100, 3),
+        'avg': round(hist.mean(), 3),
+        'p50': round(pcts[50], 3),
+        'p90': round(pcts[90], 3),
+        'p95': round(pcts[95], 3),
+        'p99': round(pcts[99], 3),
+        'p999': round(pcts[99.9], 3),
+        'max': round(hist.max or 0, 3),
+    }
+
+def _store_artifacts(conn, run_id, path):
+    conn.execute("DELETE FROM artifacts WHERE run_id = ?", (run_id,))
+    try: entries = list(os.scandir(path))
+    except OSError: return
+    conn.executemany("INSERT INTO artifacts VALUES (?, ?, ?)",
+                     [(run_id, e.name, e.stat().st_size if e.is_file() else None) for e in entries])
+
+def _store_summary(conn, run_id, path):
+    engine, summary = summarize_run(path)
+    if engine is None and not summary: return False
+    sets = ', '.join(f"{c} = ?" for c in summary)
+    conn.execute(f"UPDATE runs SET engine = ?{', ' + sets if sets else ''} WHERE id = ?",
+                 (engine, *summary.values(), run_id))
+    _store_artifacts(conn, run_id, path)
+    return True
+
+def add_run(conn, ts, target, mode, users, duration, latency, errors, status, path, summarize=True):
+    cur = conn.execute(
+        "INSERT OR IGNORE INTO runs (started, target, mode, users, duration, avg_latency, errors, status, path) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (normalize_ts(ts), target, mode, _int(users), _int(duration), _int(latency), _int(errors), status, path))
+    if not cur.rowcount: return None
+    run_id = cur.lastrowid
+    if summarize and os.path.isdir(path):
+        _store_summary(conn, run_id, path)
+    return run_id
+
+def import_csv(conn, csv_path):
+    # Legacy history.csv rows; summaries are filled in lazily by `show`
+    added = 0
+    with open(csv_path, 'r', encoding='utf-8', errors='ignore', newline='') as f:
+        for row in csv.reader(f):
+            if not row or row[0] == 'Timestamp': continue
+            if len(row) == 8:
+                # Before the Mode column existed
+                row = row[:2] + ['LOGIN'] + row[2:]
+            if len(row) < 9: continue
+            if add_run(conn, *row[:9], summarize=False) is not None: added += 1
+    return added
+
+def _where(target=None, mode=None, status=None, since=None, until=None):
+    where, args = [], []
+    if target: where.append("target LIKE ?"); args.append(f"%{target}%")
+    if mode: where.append("mode LIKE ?"); args.append(f"%{mode}%")
+    if status: where.append("status = ?"); args.append(status.upper())
+    if since: where.append("started >= ?"); args.append(since)
+    if until: where.append("started < date(?, '+1 day')"); args.append(until)
+    return (f"WHERE {' AND '.join(where)}" if where else ""), args
+
+def query_runs(conn, **filters):
+    # Every matching run, oldest first (comparison / trend reports)
+    clause, args = _where(**filters)
+    return conn.execute(f"SELECT * FROM runs {clause} ORDER BY started, id", args).fetchall()
+
+def list_runs(conn, page=1, per_page=PER_PAGE, target=None, mode=None, status=None, since=None, until=None):
+    clause, args = _where(target, mode, status, since, until)
+    total = conn.execute(f"SELECT COUNT(*) FROM runs {clause}", args).fetchone()[0]
+    pages = max(1, (total + per_page - 1) // per_page)
+    page = min(max(1, page), pages)
+    rows = conn.execute(f"SELECT * FROM runs {clause} ORDER BY started DESC, id DESC LIMIT ? OFFSET ?",
+                        args + [per_page, (page - 1) * per_page]).fetchall()
+    return rows, page, pages, total
+
+def prune(conn, results_dir, days=RETENTION_DAYS):
+    # Retention: indexed lookup of runs past the cutoff, plus a directory sweep
+    # (at most daily) for run folders the index never saw
+    cutoff = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(time.time() - days * 86400))
+    results_dir = os.path.realpath(results_dir)
+    removed = 0
+    # Pinned baselines are kept past retention
+    due = conn.execute("SELECT id, path FROM runs WHERE expired = 0 AND started < ? "
+                       "AND id NOT IN (SELECT run_id FROM baselines)", (cutoff,)).fetchall()
+    for row in due:
+        path = row['path'] or ''
+        # Never delete anything outside the results directory
+        if path and os.path.realpath(path).startswith(results_dir + os.sep) and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        conn.execute("UPDATE runs SET expired = 1 WHERE id = ?", (row['id'],))
+    now = time.time()
+    if now - float(_meta(conn, 'orphan_scan', 0)) >= ORPHAN_SCAN_S:
+        known = {os.path.realpath(r['path']) for r in conn.execute("SELECT path FROM runs WHERE path IS NOT NULL")}
+        for entry in os.scandir(results_dir):
+            if entry.is_dir() and entry.name.startswith('run_') and os.path.realpath(entry.path) not in known \
+                    and now - entry.stat().st_mtime > days * 86400:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        _set_meta(conn, 'orphan_scan', now)
+    return removed
+
+def show_run(conn, run_id):
+    row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+    if row is None: return None
+    # Rows imported from history.csv get their summary on first view
+    if row['samples'] is None and not row['expired'] and row['path'] and os.path.isdir(row['path']):
+        if _store_summary(conn, run_id, row['path']):
+            row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+    artifacts = conn.execute("SELECT name, size FROM artifacts WHERE run_id = ? ORDER BY name", (run_id,)).fetchall()
+    return row, artifacts
+
+def pin_baseline(conn, run_id):
+    row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+    if row is None: return None
+    conn.execute("INSERT OR REPLACE INTO baselines VALUES (?, ?, ?, ?)",
+                 (row['target'] or '', row['mode'] or '', run_id, time.strftime('%Y-%m-%d %H:%M:%S')))
+    return row
+
+def get_baseline(conn, target, mode):
+    return conn.execute("SELECT runs.* FROM baselines JOIN runs ON runs.id = baselines.run_id "
+                        "WHERE baselines.target = ? AND baselines.mode = ?", (target or '', mode or '')).fetchone()
+
+def find_run(conn, path):
+    return conn.execute("SELECT * FROM runs WHERE path IN (?, ?)",
+                        (path, os.path.abspath(path).rstrip(os.sep))).fetchone()
+
+def _is_expired(row):
+    return bool(row['expired']) or not (row['path'] and os.path.isdir(row['path']))
+
+def print_list(rows, page, pages, total):
+    # Tab-separated for the bash menu: header line, then one run per line
+    print(f"{page}\t{pages}\t{total}")
+    for r in rows:
+        status = 'EXPIRED' if _is_expired(r) else (r['status'] or '')
+        print('\t'.join(str(v if v is not None else '') for v in
+                        (r['id'], r['started'], r['target'], r['mode'], r['users'], r['avg_latency'], status)))
+
+def print_show(row, artifacts):
+    print(f" Timestamp : {row['started']}")
+    print(f" Target    : {row['target']}")
+    print(f" Mode      : {row['mode']}")
+    print(f" Load      : {row['users']} users / {row['duration']}s")
+    print(f" Status    : {row['status']}")
+    print(f" Path      : {row['path']}")
+    if _is_expired(row):
+        print("\n \033[31m[!] Logs for this run have been deleted/expired.\033[0m")
+        return
+    if row['samples'] is None:
+        print("\n \033[33m[!] Analysis data not available (result file missing).\033[0m")
+    else:
+        print(f"\n Engine: {row['engine']}")
+        print(f" Total Requests  : {row['samples']}")
+        print(f" Avg Latency     : {row['avg']:.2f} ms")
+        for p, col in zip(REPORT_PERCENTILES, ('p50', 'p90', 'p95', 'p99', 'p999')):
+            print(f" {percentile_label(p) + ' Latency':<16}: {row[col]:.2f} ms")
+        print(f" Max Latency     : {row['max']:.2f} ms")
+        print(f" Error Rate      : {row['error_rate']:.2f}%")
+        if row['avg'] > 2000: print(" \033[31m[!] CRITICAL: High Latency (>2s)\033[0m")
+        elif row['avg'] > 500: print(" \033[33m[!] WARNING: Moderate Latency (>500ms)\033[0m")
+        else: print(" \033[32m[OK] Latency is healthy\033[0m")
+    print("\n 📂 Artifacts:")
+    for a in artifacts:
+        size = f" ({format_id_number(a['size'])} B)" if a['size'] is not None else "/"
+        print(f"  - {a['name']}{size}")
+
+def main():
+    argv, opts = split_options(sys.argv)
+    if len(argv) < 3 or argv[1] not in ('add', 'list', 'show', 'prune', 'import', 'baseline'):
+        print("Usage: history_db.py add <db> --ts=.. --target=.. --mode=.. --users=.. --duration=.. "
+              "--latency=.. --errors=.. --status=.. --path=RUN_DIR")
+        print(f"       history_db.py list <db> [--page=1] [--per-page={PER_PAGE}] [--target=..] [--mode=..] "
+              "[--status=..] [--since=YYYY-MM-DD] [--until=YYYY-MM-DD]")
+        print("       history_db.py show <db> <id>")
+        print(f"       history_db.py prune <db> <results_dir> [--days={RETENTION_DAYS}]")
+        print("       history_db.py import <db> <history.csv>")
+        print("       history_db.py baseline <db> [<id>]")
+        sys.exit(1)
+    cmd = argv[1]
+    conn = connect(argv[2])
+    with conn:
+        if cmd == 'add':
+            run_id = add_run(conn, opts.get('ts', time.strftime('%Y-%m-%d %H:%M:%S')), opts.get('target'),
+                             opts.get('mode'), opts.get('users'), opts.get('duration'), opts.get('latency'),
+                             opts.get('errors'), opts.get('status'), opts.get('path'))
+            print(run_id if run_id is not None else "Run already indexed")
+        elif cmd == 'list':
+            print_list(*list_runs(conn, int(opts.get('page', 1)), int(opts.get('per-page', PER_PAGE)),
+                                  opts.get('target'), opts.get('mode'), opts.get('status'),
+                                  opts.get('since'), opts.get('until')))
+        elif cmd == 'show':
+            found = show_run(conn, int(argv[3])) if len(argv) > 3 and argv[3].isdigit() else None
+            if found is None:
+                print(" Run not found.")
+                sys.exit(1)
+            print_show(*found)
+        elif cmd == 'prune':
+            if len(argv) < 4:
+                print("Usage: history_db.py prune <db> <results_dir> [--days=30]")
+                sys.exit(1)
+            removed = prune(conn, argv[3], int(opts.get('days', RETENTION_DAYS)))
+            if removed: print(f"Cleaned {removed} expired logs")
+        elif cmd == 'import':
+            if len(argv) < 4 or not os.path.exists(argv[3]):
+                print("Usage: history_db.py import <db> <history.csv>")
+                sys.exit(1)
+            print(f"Imported {import_csv(conn, argv[3])} runs")
+        elif cmd == 'baseline':
+            if len(argv) > 3:
+                row = pin_baseline(conn, int(argv[3])) if argv[3].isdigit() else None
+                if row is None:
+                    print(" Run not found.")
+                    sys.exit(1)
+                print(f" Baseline for {row['target']} / {row['mode']}: #{row['id']} ({row['started']})")
+            else:
+                for b in conn.execute("SELECT baselines.target, baselines.mode, baselines.pinned, runs.id, runs.started "
+                                      "FROM baselines JOIN runs ON runs.id = baselines.run_id ORDER BY 1, 2"):
+                    print(f"{b['target']}\t{b['mode']}\t{b['id']}\t{b['started']}\t{b['pinned']}")
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# Techton Host Monitor
+# Samples the load generator itself during a run, so a flat throughput curve
+# can be told apart from a saturated generator: CPU per core, run queue,
+# softirq, TCP socket states, ephemeral ports, file descriptors and the cgroup
+# (CPU throttling, memory, pids) of the techton_* containers or the local
+# engine processes (those running CMD itself, not helpers that only carry it
+# as an argument). One CSV row per interval goes to <run_dir>/host.csv;
+# report_gen overlays it on the run report and flags generator saturation.
+#
+#   host_monitor.py run <host.csv> [--container=techton_...] [--pattern=CMD] [--interval=1]
+#   host_monitor.py check <host.csv>
+#
+# `check` exits 2 when the generator was saturated, 0 otherwise.
+import sys
+import os
+import csv
+import time
+import signal
+import subprocess
+
+from report_gen import split_options
+
+# Configuration
+HOST_CSV = "host.csv"
+INTERVAL_S = 1.0
+REFRESH_S = 5 # Seconds between re-resolving containers / engine processes
+CGROUP_ROOT = "/sys/fs/cgroup"
+TCP_STATES = {'01': 'estab', '02': 'syn_sent', '06': 'time_wait', '08': 'close_wait'}
+LISTEN = '0A'
+COLUMNS = ['ts', 'cpu_pct', 'core_max_pct', 'iowait_pct', 'softirq_pct', 'run_queue', 'load1',
+           'tcp_estab', 'tcp_syn_sent', 'tcp_time_wait', 'tcp_close_wait', 'tcp_total', 'ports_pct',
+           'fds', 'fds_pct', 'files_pct', 'cg_cpu_cores', 'cg_throttled_pct', 'mem_pct', 'pids', 'core_pct']
+EXIT_SATURATED = 2
+INTERPRETERS = ('python', 'bash', 'sh') # Launchers skipped before matching an engine command
+
+# Saturation rules: (column, threshold, finding). A rule fires when at least
+# SATURATED_SHARE of the samples (and SATURATED_MIN of them) exceed it.
+SATURATED_SHARE = 0.1
+SATURATED_MIN = 3
+RUN_QUEUE_PER_CORE = 2
+RULES = (
+    ('cpu_pct', 90, "Generator CPU above 90%"),
+    ('core_max_pct', 98, "A generator core pegged at 100% (single-threaded engine worker or interrupt load)"),
+    ('softirq_pct', 30, "Softirq above 30% of CPU (network interrupt processing)"),
+    ('cg_throttled_pct', 10, "Container CPU throttled by its cgroup quota"),
+    ('ports_pct', 80, "Ephemeral ports above 80% in use (TIME_WAIT exhaustion)"),
+    ('fds_pct', 80, "Engine file descriptors above 80% of the open files limit"),
+    ('files_pct', 80, "System-wide open files above 80% of fs.file-max"),
+    ('mem_pct', 90, "Container memory above 90% of its limit"),
+)
+
+def read_file(path, default=None):
+    try:
+        with open(path, 'r') as f:
+            return f.read()
+    except OSError:
+        return default
+
+def read_int(path):
+    text = read_file(path)
+    try: return int(text.split()[0]) if text else None
+    except ValueError: return None
+
+def cpu_times():
+    # {'cpu': (busy, total, iowait, softirq), 'cpu0': ...} in jiffies
+    times = {}
+    run_queue = 0
+    for line in read_file('/proc/stat', '').splitlines():
+        if line.startswith('cpu'):
+            name, *vals = line.split()
+            vals = [int(v) for v in vals[:8]]
+            idle, iowait, softirq = vals[3], vals[4], vals[6]
+            total = sum(vals)
+            times[name] = (total - idle - iowait, total, iowait, softirq)
+        elif line.startswith('procs_running'):
+            run_queue = int(line.split()[1])
+    return times, run_queue
+
+def command_pids(command):
+    # Processes running `command` itself: argv starts with its words, directly
+    # or behind an interpreter (python3 ldap_engine.py run ...). The guard and
+    # this monitor only carry the command in a --pattern= argument, so neither
+    # matches the other.
+    words = command.split()
+    me = os.getpid()
+    found = []
+    for name in os.listdir('/proc'):
+        if not name.isdigit() or int(name) == me: continue
+        argv = read_file(f'/proc/{name}/cmdline', '').split('\0')
+        if os.path.basename(argv[0]).split('.')[0].rstrip('0123456789') in INTERPRETERS:
+            argv = argv[1:]
+        if argv[:len(words)] == words: found.append(int(name))
+    return found
+
+def percent(part, whole):
+    return round(part / whole * 100, 1) if whole > 0 else 0.0
+
+class Target:
+    # Processes the generator runs as: containers matched by name prefix (their
+    # cgroup, all processes in it, their network namespace) and/or local
+    # processes running the `pattern` command
+    def __init__(self, container=None, pattern=None):
+        self.container = container
+        self.pattern = pattern
+        self.pids = []
+        self.cgroups = []
+        self.netns = {}
+        self.refreshed = 0
+
+    def refresh(self):
+        roots, containers = [], []
+        if self.container and self.container is not True:
+            try:
+                ids = subprocess.run(['docker', 'ps', '-q', '--no-trunc', '--filter', f"name={self.container}"],
+                                     capture_output=True, text=True, timeout=5).stdout.split()
+                if ids:
+                    out = subprocess.run(['docker', 'inspect', '-f', '{{.State.Pid}}', *ids],
+                                         capture_output=True, text=True, timeout=5).stdout.split()
+                    containers = [int(p) for p in out if p.isdigit() and p != '0']
+            except (OSError, subprocess.SubprocessError):
+                pass
+        if self.pattern and self.pattern is not True:
+            roots = command_pids(self.pattern)
+        cgroups, netns, pids = [], {}, set(roots)
+        for pid in containers + roots:
+            cg = cgroup_dir(pid)
+            if cg and cg not in cgroups:
+                cgroups.append(cg)
+                # Every process in a container's cgroup holds fds of the engine
+                if pid in containers:
+                    procs = read_file(os.path.join(cg['dir'], 'cgroup.procs'), '')
+                    pids.update(int(p) for p in procs.split() if p.isdigit())
+            try: netns.setdefault(os.readlink(f'/proc/{pid}/ns/net'), pid)
+            except OSError: pass
+        self.pids, self.cgroups, self.netns = sorted(pids), cgroups, netns
+        self.refreshed = time.time()
+
+def cgroup_dir(pid):
+    # cgroup v2: one unified path; v1: the cpu/cpuacct, memory and pids controllers
+    text = read_file(f'/proc/{pid}/cgroup')
+    if not text: return None
+    v1 = {}
+    for line in text.splitlines():
+        _, controllers, path = line.split(':', 2)
+        if path == '/': continue
+        if controllers == '':
+            base = os.path.join(CGROUP_ROOT, path.lstrip('/'))
+            if os.path.exists(os.path.join(base, 'cpu.stat')):
+                return {'version': 2, 'dir': base}
+        for c in controllers.split(','):
+            v1[c] = os.path.join(CGROUP_ROOT, controllers, path.lstrip('/'))
+    if not v1: return None
+    return {'version': 1, 'dir': v1.get('cpu') or next(iter(v1.values())),
+            'cpuacct': v1.get('cpuacct'), 'memory': v1.get('memory'), 'pids': v1.get('pids')}
+
+def cgroup_counters(cg):
+    # (cpu usage µs, periods, throttled periods, memory bytes, memory limit, pids)
+    if cg['version'] == 2:
+        stat = dict(line.split() for line in read_file(os.path.join(cg['dir'], 'cpu.stat'), '').splitlines() if ' ' in line)
+        limit = read_file(os.path.join(cg['dir'], 'memory.max'), 'max').strip()
+        return (int(stat.get('usage_usec', 0)), int(stat.get('nr_periods', 0)), int(stat.get('nr_throttled', 0)),
+                read_int(os.path.join(cg['dir'], 'memory.current')) or 0,
+                int(limit) if limit.isdigit() else None,
+                read_int(os.path.join(cg['dir'], 'pids.current')) or 0)
+    stat = dict(line.split() for line in read_file(os.path.join(cg['dir'], 'cpu.stat'), '').splitlines() if ' ' in line)
+    usage = read_int(os.path.join(cg['cpuacct'], 'cpuacct.usage')) if cg.get('cpuacct') else None
+    memory = read_int(os.path.join(cg['memory'], 'memory.usage_in_bytes')) if cg.get('memory') else None
+    limit = read_int(os.path.join(cg['memory'], 'memory.limit_in_bytes')) if cg.get('memory') else None
+    pids = read_int(os.path.join(cg['pids'], 'pids.current')) if cg.get('pids') else None
+    # v1 reports "no limit" as a huge page-aligned number
+    return ((usage or 0) // 1000, int(stat.get('nr_periods', 0)), int(stat.get('nr_throttled', 0)),
+            memory or 0, limit if limit and limit < 1 << 60 else None, pids or 0)
+
+def socket_stats(netns):
+    # TCP states and ephemeral port use, per network namespace of the target
+    # (the host's own when there is none)
+    lo, hi = (int(v) for v in read_file('/proc/sys/net/ipv4/ip_local_port_range', '32768 60999').split())
+    states = {name: 0 for name in TCP_STATES.values()}
+    total = 0
+    ports_pct = 0.0
+    for pid in (netns.values() if netns else ['self']):
+        ports = set()
+        for table in ('tcp', 'tcp6'):
+            text = read_file(f'/proc/{pid}/net/{table}', '')
+            for line in text.splitlines()[1:]:
+                fields = line.split(None, 4)
+                if len(fields) < 4 or fields[3] == LISTEN: continue
+                total += 1
+                name = TCP_STATES.get(fields[3])
+                if name: states[name] += 1
+                port = int(fields[1].rsplit(':', 1)[1], 16)
+                if lo <= port <= hi: ports.add(port)
+        ports_pct = max(ports_pct, percent(len(ports), hi - lo + 1))
+    return states, total, ports_pct
+
+def fd_stats(pids):
+    # Open fds of the target processes and the worst used/limit ratio
+    fds, worst = 0, 0.0
+    for pid in pids:
+        try: n = len(os.listdir(f'/proc/{pid}/fd'))
+        except OSError: continue
+        fds += n
+        for line in read_file(f'/proc/{pid}/limits', '').splitlines():
+            if line.startswith('Max open files'):
+                soft = line.split()[3]
+                if soft.isdigit(): worst = max(worst, percent(n, int(soft)))
+    return fds, worst
+
+class HostMonitor:
+    def __init__(self, target):
+        self.target = target
+        self.last_cpu = None
+        self.last_cg = {}
+        self.last_t = None
+
+    def sample(self):
+        now = time.time()
+        if now - self.target.refreshed >= REFRESH_S: self.target.refresh()
+        times, run_queue = cpu_times()
+        row = {'ts': round(now, 3), 'run_queue': run_queue}
+        prev = self.last_cpu or {}
+        cores = []
+        for name, (busy, total, iowait, softirq) in times.items():
+            p = prev.get(name)
+            if p is None: continue
+            d_total = total - p[1]
+            if name == 'cpu':
+                row['cpu_pct'] = percent(busy - p[0], d_total)
+                row['iowait_pct'] = percent(iowait - p[2], d_total)
+                row['softirq_pct'] = percent(softirq - p[3], d_total)
+            else:
+                cores.append(percent(busy - p[0], d_total))
+        self.last_cpu = times
+        row['core_max_pct'] = max(cores) if cores else 0.0
+        row['core_pct'] = ';'.join(f"{c:g}" for c in cores)
+        row['load1'] = float((read_file('/proc/loadavg', '0') or '0').split()[0])
+
+        states, total, row['ports_pct'] = socket_stats(self.target.netns)
+        for name, n in states.items(): row[f'tcp_{name}'] = n
+        row['tcp_total'] = total
+        row['fds'], row['fds_pct'] = fd_stats(self.target.pids)
+        file_nr = (read_file('/proc/sys/fs/file-nr', '0 0 0') or '0 0 0').split()
+        row['files_pct'] = percent(int(file_nr[0]), int(file_nr[2]))
+
+        # cgroup deltas, summed over containers (shards); memory is the worst ratio
+        usage = periods = throttled = 0
+        mem_pct, pids = 0.0, 0
+        for cg in self.target.cgroups:
+            counters = cgroup_counters(cg)
+            last = self.last_cg.get(cg['dir'])
+            self.last_cg[cg['dir']] = counters
+            if counters[4]: mem_pct = max(mem_pct, percent(counters[3], counters[4]))
+            pids += counters[5]
+            if last is None: continue
+            usage += counters[0] - last[0]
+            periods += counters[1] - last[1]
+            throttled += counters[2] - last[2]
+        elapsed = now - self.last_t if self.last_t else 0
+        self.last_t = now
+        row['cg_cpu_cores'] = round(usage / 1e6 / elapsed, 2) if elapsed else 0.0
+        row['cg_throttled_pct'] = percent(throttled, periods)
+        row['mem_pct'] = mem_pct
+        row['pids'] = pids
+        return row if 'cpu_pct' in row else None
+
+def run(path, target, interval=INTERVAL_S):
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    monitor = HostMonitor(target)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, COLUMNS)
+        writer.writeheader()
+        while not stopping:
+            row = monitor.sample()
+            if row is not None:
+                writer.writerow(row)
+                f.flush()
+            time.sleep(interval)
+
+def load_samples(path):
+    # Rows as dicts of floats (core_pct stays a list); [] when the file is missing
+    samples = []
+    try:
+        with open(path, 'r', newline='') as f:
+            for row in csv.DictReader(f):
+                cores = [float(c) for c in row.pop('core_pct', '').split(';') if c]
+                try: sample = {k: float(v or 0) for k, v in row.items()}
+                except ValueError: continue
+                sample['core_pct'] = cores
+                samples.append(sample)
+    except OSError:
+        pass
+    return samples
+
+def saturation(samples):
+    # Findings for the generator having been the bottleneck, worst first
+    findings = []
+    if not samples: return findings
+    need = max(SATURATED_MIN, len(samples) * SATURATED_SHARE)
+    cores = max((len(s['core_pct']) for s in samples), default=1) or 1
+    rules = RULES + (('run_queue', RUN_QUEUE_PER_CORE * cores, f"Run queue above {RUN_QUEUE_PER_CORE}x the {cores} cores"),)
+    for column, threshold, text in rules:
+        over = [s[column] for s in samples if s.get(column, 0) > threshold]
+        if len(over) >= need:
+            findings.append((len(over) / len(samples), f"{text}: {len(over)}/{len(samples)} samples, peak {max(over):g}"))
+    return [text for _, text in sorted(findings, reverse=True)]
+
+def main():
+    argv, opts = split_options(sys.argv)
+    if len(argv) >= 3 and argv[1] == 'run':
+        target = Target(opts.get('container'), opts.get('pattern'))
+        try: run(argv[2], target, float(opts.get('interval', INTERVAL_S)))
+        except KeyboardInterrupt: pass
+        return
+    if len(argv) >= 3 and argv[1] == 'check':
+        findings = saturation(load_samples(argv[2]))
+        for text in findings: print(f" [!] {text}")
+        sys.exit(EXIT_SATURATED if findings else 0)
+    print("Usage: host_monitor.py run <host.csv> [--container=NAME_PREFIX] [--pattern=CMD] [--interval=1]\n"
+          "       host_monitor.py check <host.csv>")
+    sys.exit(1)
+
+if __name__ == "__main__":
+    main()
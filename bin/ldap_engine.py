@@ -0,0 +1,611 @@
+#!/usr/bin/env python3
+# Techton LDAP Engine
+# Asyncio LDAP load generator speaking BER over plain sockets. Unlike the k6
+# templates (dial + bind + close on every iteration) it keeps long-lived,
+# pre-dialed connections in per-worker pools, pipelines searches on them and
+# schedules operations on an open-model arrival clock. Results are written in
+# the k6 CSV format, so report_gen, the live analyzer and the safety guard
+# read them unchanged.
+#
+#   ldap_engine.py run --target=HOST[:PORT] --mode=LOGIN --dn=DN --password=PW
+#                      [--base=DN] [--rate=100] [--duration=60] [--ramp=10]
+#                      [--profile=LINEAR|SPIKE|POISSON] [--connections=50]
+#                      [--workers=4] [--pipeline=8] [--connect=pool|per-request]
+#                      [--users=users.tsv] [--out=results.csv]
+#   ldap_engine.py check --target=HOST[:PORT] --dn=DN --password=PW
+import sys
+import os
+import csv
+import math
+import time
+import random
+import signal
+import asyncio
+from fractions import Fraction
+
+from report_gen import LatencyHistogram, split_options, format_id_number
+from user_list import read_users
+
+# Configuration
+LDAP_PORT = 389
+DEFAULT_RATE = 100 # Operations per second at full load
+DEFAULT_CONNECTIONS = 50
+DEFAULT_WORKERS = 4
+DEFAULT_PIPELINE = 8 # Outstanding searches per connection once the pool is full
+DEFAULT_TIMEOUT = 10 # Seconds per dial / operation
+SCHEDULE_STEP = 0.01 # Resolution of the arrival clock (seconds)
+SPIKE_BASE = 0.1 # SPIKE profile: share of the rate outside the spike
+PROGRESS_INTERVAL = 1.0
+DRAIN_TIMEOUT = 15 # Seconds to wait for in-flight operations after the last arrival
+WRONG_PASSWORD = "WrongPassword123!"
+MEMBERSHIP_RULE = "1.2.840.113556.1.4.1941" # LDAP_MATCHING_RULE_IN_CHAIN
+TITAN_ATTRS = ["cn", "thumbnailPhoto", "userCertificate", "nTSecurityDescriptor", "jpegPhoto"]
+SCENARIOS = {'LINEAR': 'linear_ramp', 'SPIKE': 'spike_attack', 'POISSON': 'realistic_poisson'}
+K6_CSV_HEADER = ['metric_name', 'timestamp', 'metric_value', 'check', 'error', 'error_code',
+                 'expected_response', 'group', 'method', 'name', 'proto', 'scenario', 'service',
+                 'status', 'subproto', 'tls_version', 'url', 'extra_tags', 'metadata']
+# mode -> (operation kind, check name)
+OPERATIONS = {
+    'LOGIN': ('bind', 'bind'),
+    'PASSWORD_SPRAY': ('bind', 'handled failure'),
+    'SEARCH_COMPLEX': ('search', 'search'),
+    'WRITE_STRESS': ('search', 'write simulation'),
+    'MEMBERSHIP': ('search', 'recursive search'),
+    'TITAN_STRESS': ('search', 'titan search'),
+}
+RESULT_CODES = {
+    0: 'success', 1: 'operationsError', 2: 'protocolError', 3: 'timeLimitExceeded',
+    4: 'sizeLimitExceeded', 10: 'referral', 11: 'adminLimitExceeded', 32: 'noSuchObject',
+    34: 'invalidDNSyntax', 48: 'inappropriateAuthentication', 49: 'invalidCredentials',
+    50: 'insufficientAccessRights', 51: 'busy', 52: 'unavailable', 53: 'unwillingToPerform',
+    80: 'other',
+}
+
+# --- BER ---
+# Protocol op tags (RFC 4511, [APPLICATION n])
+OP_BIND = 0x60
+OP_BIND_RESPONSE = 0x61
+OP_UNBIND = 0x42
+OP_SEARCH = 0x63
+OP_SEARCH_ENTRY = 0x64
+OP_SEARCH_DONE = 0x65
+OP_SEARCH_REFERENCE = 0x73
+SCOPES = {'base': 0, 'one': 1, 'sub': 2}
+
+def ber_length(n):
+    if n < 0x80: return bytes([n])
+    raw = n.to_bytes((n.bit_length() + 7) // 8, 'big')
+    return bytes([0x80 | len(raw)]) + raw
+
+def ber(tag, payload):
+    return bytes([tag]) + ber_length(len(payload)) + payload
+
+def ber_int(value, tag=0x02):
+    return ber(tag, value.to_bytes(max(1, (value.bit_length() + 8) // 8), 'big', signed=True))
+
+def ber_str(value, tag=0x04):
+    return ber(tag, value.encode('utf-8') if isinstance(value, str) else value)
+
+def ber_bool(value, tag=0x01):
+    return ber(tag, b'\xff' if value else b'\x00')
+
+def ber_seq(*items, tag=0x30):
+    return ber(tag, b''.join(items))
+
+def read_tlv(data, pos):
+    # (tag, value start, value end) of the element at `pos`
+    tag, n = data[pos], data[pos + 1]
+    pos += 2
+    if n & 0x80:
+        k = n & 0x7f
+        n = int.from_bytes(data[pos:pos + k], 'big')
+        pos += k
+    if pos + n > len(data):
+        raise ValueError("Truncated BER element")
+    return tag, pos, pos + n
+
+def _unescape(value):
+    # RFC 4515 value escapes: \2a, \28, \29, \5c, \00
+    out = bytearray()
+    raw = value.encode('utf-8')
+    i = 0
+    while i < len(raw):
+        if raw[i] == 0x5c and i + 3 <= len(raw):
+            out.append(int(raw[i + 1:i + 3], 16))
+            i += 3
+        else:
+            out.append(raw[i])
+            i += 1
+    return bytes(out)
+
+def _filter_item(item):
+    if ':=' in item:
+        # Extensible match: attr[:dn][:rule]:=value
+        head, value = item.split(':=', 1)
+        parts = head.split(':')
+        rule = next((p for p in parts[1:] if p and p.lower() != 'dn'), None)
+        payload = ber_str(rule, 0x81) if rule else b''
+        if parts[0]: payload += ber_str(parts[0], 0x82)
+        payload += ber_str(_unescape(value), 0x83)
+        if any(p.lower() == 'dn' for p in parts[1:]): payload += ber_bool(True, 0x84)
+        return ber(0xa9, payload)
+    for token, tag in (('>=', 0xa5), ('<=', 0xa6), ('~=', 0xa8)):
+        if token in item:
+            attr, value = item.split(token, 1)
+            return ber(tag, ber_str(attr) + ber_str(_unescape(value)))
+    attr, eq, value = item.partition('=')
+    if not attr or not eq:
+        raise ValueError(f"Invalid filter item: {item}")
+    if value == '*':
+        return ber_str(attr, 0x87)
+    if '*' in value:
+        parts = value.split('*')
+        subs = ber_str(_unescape(parts[0]), 0x80) if parts[0] else b''
+        subs += b''.join(ber_str(_unescape(p), 0x81) for p in parts[1:-1] if p)
+        if parts[-1]: subs += ber_str(_unescape(parts[-1]), 0x82)
+        return ber(0xa4, ber_str(attr) + ber_seq(subs))
+    return ber(0xa3, ber_str(attr) + ber_str(_unescape(value)))
+
+def _parse_filter(text, i):
+    if text[i] != '(':
+        raise ValueError(f"Invalid LDAP filter: {text}")
+    i += 1
+    if text[i] in '&|':
+        tag = 0xa0 if text[i] == '&' else 0xa1
+        i += 1
+        parts = []
+        while text[i] == '(':
+            part, i = _parse_filter(text, i)
+            parts.append(part)
+        node = ber(tag, b''.join(parts))
+    elif text[i] == '!':
+        part, i = _parse_filter(text, i + 1)
+        node = ber(0xa2, part)
+    else:
+        end = text.index(')', i)
+        node = _filter_item(text[i:end])
+        i = end
+    if text[i] != ')':
+        raise ValueError(f"Invalid LDAP filter: {text}")
+    return node, i + 1
+
+def encode_filter(text):
+    # RFC 4515 string filter -> BER Filter
+    text = text.strip()
+    try:
+        node, end = _parse_filter(text, 0)
+    except IndexError:
+        raise ValueError(f"Invalid LDAP filter: {text}")
+    if end != len(text):
+        raise ValueError(f"Invalid LDAP filter: {text}")
+    return node
+
+def bind_request(dn, password):
+    return ber(OP_BIND, ber_int(3) + ber_str(dn) + ber_str(password, 0x80))
+
+def search_request(base, filter_ber, scope='sub', attrs=(), size_limit=0, time_limit=0):
+    return ber(OP_SEARCH, ber_str(base) + ber_int(SCOPES[scope], 0x0a) + ber_int(0, 0x0a) +
+               ber_int(size_limit) + ber_int(time_limit) + ber_bool(False) + filter_ber +
+               ber_seq(*(ber_str(a) for a in attrs)))
+
+def result_name(code):
+    return f"{RESULT_CODES.get(code, 'resultCode')} ({code})"
+
+async def read_message(reader):
+    # One LDAPMessage (SEQUENCE) from the stream, returned without its header
+    head = await reader.readexactly(2)
+    n = head[1]
+    if n & 0x80:
+        n = int.from_bytes(await reader.readexactly(n & 0x7f), 'big')
+    return await reader.readexactly(n)
+
+# --- Client ---
+class LdapConnection:
+    # One TCP connection. A background reader matches responses to requests by
+    # message ID, so several requests can be outstanding at once (pipelining).
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 1
+        self.pending = {}
+        self.inflight = 0
+        self.exclusive = False
+        self.closed = False
+        self.task = asyncio.get_running_loop().create_task(self._read_loop())
+
+    @classmethod
+    async def open(cls, host, port, timeout=DEFAULT_TIMEOUT):
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        return cls(reader, writer)
+
+    async def _read_loop(self):
+        try:
+            while True:
+                body = await read_message(self.reader)
+                _, s, e = read_tlv(body, 0)
+                msgid = int.from_bytes(body[s:e], 'big', signed=True)
+                op, s, e = read_tlv(body, e)
+                slot = self.pending.get(msgid)
+                if slot is None: continue
+                if op == OP_SEARCH_ENTRY:
+                    slot[1] += 1
+                    continue
+                if op == OP_SEARCH_REFERENCE: continue
+                # LDAPResult: resultCode, matchedDN, diagnosticMessage
+                _, cs, ce = read_tlv(body, s)
+                _, ms, me = read_tlv(body, ce)
+                _, ds, de = read_tlv(body, me)
+                code = int.from_bytes(body[cs:ce], 'big')
+                del self.pending[msgid]
+                if not slot[0].done():
+                    slot[0].set_result((code, slot[1], body[ds:de].decode('utf-8', errors='replace')))
+        except (asyncio.IncompleteReadError, OSError, ValueError, IndexError) as e:
+            self._fail(e)
+        except asyncio.CancelledError:
+            self._fail(ConnectionError("connection closed"))
+
+    def _fail(self, exc):
+        self.closed = True
+        for fut, _ in self.pending.values():
+            if not fut.done(): fut.set_exception(ConnectionError(f"connection lost: {type(exc).__name__}"))
+        self.pending.clear()
+
+    async def request(self, op, timeout=DEFAULT_TIMEOUT):
+        # Returns (resultCode, entries, diagnosticMessage)
+        if self.closed:
+            raise ConnectionError("connection closed")
+        msgid = self.next_id
+        self.next_id = msgid % 0x7fffffff + 1
+        fut = asyncio.get_running_loop().create_future()
+        self.pending[msgid] = [fut, 0]
+        self.writer.write(ber_seq(ber_int(msgid), op))
+        if self.writer.transport.get_write_buffer_size() > 65536:
+            await self.writer.drain()
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        finally:
+            self.pending.pop(msgid, None)
+
+    def close(self):
+        if not self.closed:
+            try: self.writer.write(ber_seq(ber_int(self.next_id), bytes([OP_UNBIND, 0])))
+            except OSError: pass
+        self.closed = True
+        self.writer.close()
+        self.task.cancel()
+
+class ConnectionPool:
+    # Long-lived connections owned by one worker. An idle connection is used
+    # first, then a new one is dialed up to `size`, and only then are requests
+    # pipelined on the least busy connection. Binds change the connection's
+    # identity, so they always get a connection to themselves (RFC 4511 4.2.1).
+    def __init__(self, dial, size, pipeline):
+        self.dial = dial
+        self.size = size
+        self.pipeline = pipeline
+        self.conns = []
+        self.dialing = 0
+        self.cond = asyncio.Condition()
+
+    async def fill(self):
+        # Pre-dial the whole pool so the run measures steady-state operations
+        results = await asyncio.gather(*(self.dial() for _ in range(self.size)), return_exceptions=True)
+        self.conns = [c for c in results if isinstance(c, LdapConnection)]
+        return len(self.conns)
+
+    def _pick(self, exclusive):
+        self.conns = [c for c in self.conns if not c.closed]
+        idle = next((c for c in self.conns if c.inflight == 0), None)
+        if idle or exclusive: return idle
+        if len(self.conns) + self.dialing < self.size: return None
+        busy = [c for c in self.conns if not c.exclusive and c.inflight < self.pipeline]
+        return min(busy, key=lambda c: c.inflight) if busy else None
+
+    async def acquire(self, exclusive=False):
+        async with self.cond:
+            while True:
+                conn = self._pick(exclusive)
+                if conn:
+                    conn.inflight += 1
+                    conn.exclusive = exclusive
+                    return conn
+                if len(self.conns) + self.dialing < self.size: break
+                await self.cond.wait()
+            self.dialing += 1
+        try:
+            conn = await self.dial()
+        finally:
+            async with self.cond:
+                self.dialing -= 1
+                self.cond.notify()
+        async with self.cond:
+            conn.inflight = 1
+            conn.exclusive = exclusive
+            self.conns.append(conn)
+        return conn
+
+    async def release(self, conn):
+        async with self.cond:
+            conn.inflight -= 1
+            conn.exclusive = False
+            self.cond.notify()
+
+    def close(self):
+        for conn in self.conns: conn.close()
+        self.conns = []
+
+# --- Load model ---
+def rate_at(profile, t, rate, duration, ramp):
+    if profile == 'LINEAR':
+        return rate * min(1.0, t / ramp) if ramp > 0 else rate
+    if profile == 'SPIKE':
+        return rate if duration / 3 <= t < 2 * duration / 3 else rate * SPIKE_BASE
+    return rate
+
+def run_length(profile, duration, ramp):
+    return duration + ramp if profile == 'LINEAR' else duration
+
+def arrival_schedule(profile, rate, duration, ramp=0, rng=None):
+    # Intended start offsets (seconds) of every operation. Open model: the
+    # clock keeps ticking whether or not the target keeps up.
+    rng = rng or random.Random()
+    total = run_length(profile, duration, ramp)
+    if profile == 'POISSON':
+        t = rng.expovariate(rate)
+        while t < total:
+            yield t
+            t += rng.expovariate(rate)
+        return
+    t, credit = 0.0, 0.0
+    while t < total:
+        r = rate_at(profile, t + SCHEDULE_STEP / 2, rate, duration, ramp)
+        if r > 0:
+            credit += r * SCHEDULE_STEP
+            while credit >= 1:
+                credit -= 1
+                yield t + SCHEDULE_STEP * (1 - credit / (r * SCHEDULE_STEP))
+        t += SCHEDULE_STEP
+
+class ResultWriter:
+    # k6 CSV rows: iteration_duration (service time) and corrected_duration
+    # (from the scheduled arrival) per operation, one check per operation
+    # (failed checks carry the LDAP result) and dropped_iterations
+    def __init__(self, path, scenario, op):
+        self.f = open(path, 'w', newline='')
+        self.writer = csv.writer(self.f)
+        self.writer.writerow(K6_CSV_HEADER)
+        self.scenario = scenario
+        self.extra = f"op={op}"
+
+    def _row(self, metric, ts, value, check='', error='', code=''):
+        self.writer.writerow([metric, f"{ts:.3f}", value, check, error, code, '', '', '', '', '',
+                              self.scenario, '', '', '', '', '', self.extra, ''])
+
+    def sample(self, ts, latency_ms, corrected_ms, check, ok, error='', code=''):
+        self._row('iteration_duration', ts, f"{latency_ms:.3f}")
+        self._row('corrected_duration', ts, f"{corrected_ms:.3f}")
+        self._row('checks', ts, 1 if ok else 0, check if ok else f"{check}: {error}", error, code)
+
+    def dropped(self, ts):
+        self._row('dropped_iterations', ts, 1)
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+class LdapEngine:
+    def __init__(self, opts):
+        host, _, port = opts['target'].partition(':')
+        self.host, self.port = host, int(port or LDAP_PORT)
+        self.mode = opts.get('mode', 'LOGIN').upper()
+        if self.mode not in OPERATIONS:
+            raise ValueError(f"Unknown mode {self.mode} (use {', '.join(OPERATIONS)})")
+        self.dn = opts.get('dn', '')
+        self.password = opts.get('password', '')
+        self.base = opts.get('base', '')
+        self.profile = opts.get('profile', 'LINEAR').upper()
+        if self.profile not in SCENARIOS:
+            raise ValueError(f"Unknown profile {self.profile} (use {', '.join(SCENARIOS)})")
+        self.rate = float(opts.get('rate', DEFAULT_RATE))
+        self.duration = float(opts.get('duration', 60))
+        self.ramp = float(opts.get('ramp', 0))
+        connections = int(opts.get('connections', DEFAULT_CONNECTIONS))
+        # Shards started by coordinator.py run their slice of rate and pool
+        segment = opts.get('segment') or os.environ.get('TECHTON_SHARD_SEGMENT')
+        if segment:
+            lo, _, hi = segment.partition(':')
+            share = float(Fraction(hi) - Fraction(lo))
+            self.rate *= share
+            connections = max(1, round(connections * share))
+        self.workers = max(1, min(int(opts.get('workers', DEFAULT_WORKERS)), connections))
+        self.pool_size = math.ceil(connections / self.workers)
+        self.pipeline = max(1, int(opts.get('pipeline', DEFAULT_PIPELINE)))
+        self.per_request = opts.get('connect', 'pool') == 'per-request'
+        self.timeout = float(opts.get('timeout', DEFAULT_TIMEOUT))
+        self.max_inflight = int(opts.get('max-inflight', self.workers * self.pool_size * self.pipeline))
+        self.users = read_users(opts['users'], self.password) if opts.get('users') else []
+        self.out = ResultWriter(opts.get('out', 'results.csv'), SCENARIOS[self.profile], self.mode)
+        self.hist = LatencyHistogram()
+        self.corrected = LatencyHistogram()
+        self.ops = self.failed = self.dropped = self.inflight = 0
+        self.stopping = False
+        self.rng = random.Random()
+        self.filters = {}
+
+    def _filter(self, text):
+        f = self.filters.get(text)
+        if f is None: f = self.filters[text] = encode_filter(text)
+        return f
+
+    async def dial(self):
+        conn = await LdapConnection.open(self.host, self.port, self.timeout)
+        if OPERATIONS[self.mode][0] == 'search':
+            # Search modes run as the service account, bound once per connection
+            code, _, diag = await conn.request(bind_request(self.dn, self.password), self.timeout)
+            if code != 0:
+                conn.close()
+                raise ConnectionError(f"bind {result_name(code)}")
+        return conn
+
+    def operation(self):
+        # (kind, check name, request, expected result codes)
+        kind, check = OPERATIONS[self.mode]
+        if self.mode == 'LOGIN':
+            dn, pw = self.rng.choice(self.users) if self.users else (self.dn, self.password)
+            return kind, check, bind_request(dn, pw), (0,)
+        if self.mode == 'PASSWORD_SPRAY':
+            dn = self.rng.choice(self.users)[0] if self.users else self.dn
+            return kind, check, bind_request(dn, WRONG_PASSWORD), (49,)
+        if self.mode == 'SEARCH_COMPLEX':
+            ch = self.rng.choice("abcdefghijklmnopqrstuvwxyz")
+            return kind, check, search_request(self.base, self._filter(f"(cn=*{ch}*)"), 'sub', ["cn", "mail", "description"]), (0, 4)
+        if self.mode == 'WRITE_STRESS':
+            return kind, check, search_request(self.dn, self._filter("(objectClass=*)"), 'base', ["description"]), (0,)
+        nested = self._filter(f"(&(objectClass=user)(memberOf:{MEMBERSHIP_RULE}:={self.base}))")
+        attrs = TITAN_ATTRS if self.mode == 'TITAN_STRESS' else ["cn"]
+        return kind, check, search_request(self.base, nested, 'sub', attrs), (0, 4)
+
+    async def execute(self, pool, intended):
+        # `intended` is the arrival's slot in the schedule; a loop that falls
+        # behind starts the operation late, and users wait for that too
+        kind, check, request, expected = self.operation()
+        ts = time.time()
+        started = time.perf_counter()
+        ok, error, code = False, '', ''
+        conn = None
+        try:
+            if self.per_request:
+                conn = await self.dial()
+            else:
+                conn = await pool.acquire(exclusive=kind == 'bind')
+            result, _, diag = await conn.request(request, self.timeout)
+            ok = result in expected
+            if not ok: error, code = result_name(result), result
+        except asyncio.TimeoutError:
+            error = "timeout"
+        except asyncio.CancelledError:
+            # Cut off at the end of the drain: still recorded, as a timeout
+            error = "timeout"
+        except (OSError, ConnectionError) as e:
+            error = f"connect: {e}" if conn is None else str(e)
+        finally:
+            if conn is not None:
+                if self.per_request: conn.close()
+                else: await pool.release(conn)
+        done = time.perf_counter()
+        latency = (done - started) * 1000
+        corrected = (done - min(intended, started)) * 1000
+        self.out.sample(ts, latency, corrected, check, ok, error, code)
+        self.hist.record(latency)
+        self.corrected.record(corrected)
+        self.ops += 1
+        if not ok: self.failed += 1
+        self.inflight -= 1
+
+    async def progress(self, start):
+        last_ops, last_t = 0, time.perf_counter()
+        while not self.stopping:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            now = time.perf_counter()
+            rate = (self.ops - last_ops) / (now - last_t)
+            last_ops, last_t = self.ops, now
+            self.out.flush()
+            print(f"running ({now - start:.1f}s), inflight={self.inflight}, ops={self.ops} ({rate:.1f}/s), "
+                  f"failed={self.failed}, dropped={self.dropped}", flush=True)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stop)
+        pools = [ConnectionPool(self.dial, self.pool_size, self.pipeline) for _ in range(self.workers)]
+        if not self.per_request:
+            opened = sum(await asyncio.gather(*(p.fill() for p in pools)))
+            print(f"pool ready: {opened}/{self.workers * self.pool_size} connections "
+                  f"({self.workers} workers, pipeline {self.pipeline})", flush=True)
+        tasks = set()
+        start = time.perf_counter()
+        reporter = loop.create_task(self.progress(start))
+        for i, offset in enumerate(arrival_schedule(self.profile, self.rate, self.duration, self.ramp, self.rng)):
+            delay = offset - (time.perf_counter() - start)
+            # Arrivals less than 1ms away go out with the current batch
+            if delay > 0.001: await asyncio.sleep(delay)
+            elif i % 256 == 0: await asyncio.sleep(0)
+            if self.stopping: break
+            if self.inflight >= self.max_inflight:
+                self.dropped += 1
+                self.out.dropped(time.time())
+                continue
+            self.inflight += 1
+            task = loop.create_task(self.execute(pools[i % self.workers], start + offset))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=DRAIN_TIMEOUT)
+            # Operations still out after the drain are cancelled and recorded as
+            # timeouts before their pools and the result file are closed
+            for task in pending: task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        self.stopping = True
+        reporter.cancel()
+        for p in pools: p.close()
+        self.out.close()
+        self.summary(time.perf_counter() - start)
+
+    def stop(self):
+        self.stopping = True
+
+    def summary(self, elapsed):
+        # k6-style end-of-test lines; techton reads avg= and the check counts
+        h = self.hist
+        passed = self.ops - self.failed
+        pct = passed / self.ops * 100 if self.ops else 0
+        print(f"\n     checks.........................: {pct:.2f}% ✓ {passed} ✗ {self.failed}")
+        print(f"     dropped_iterations.............: {self.dropped}")
+        print(f"     iteration_duration.............: avg={h.mean():.2f}ms min={(h.min or 0):.2f}ms "
+              f"med={h.percentile(50):.2f}ms max={(h.max or 0):.2f}ms p(90)={h.percentile(90):.2f}ms "
+              f"p(95)={h.percentile(95):.2f}ms")
+        c = self.corrected
+        print(f"     corrected_duration.............: avg={c.mean():.2f}ms min={(c.min or 0):.2f}ms "
+              f"med={c.percentile(50):.2f}ms max={(c.max or 0):.2f}ms p(90)={c.percentile(90):.2f}ms "
+              f"p(95)={c.percentile(95):.2f}ms")
+        print(f"     iterations.....................: {format_id_number(self.ops)} {self.ops / elapsed if elapsed else 0:.2f}/s")
+
+async def check_bind(opts):
+    # Single bind used by techton's fail-fast credential validation
+    host, _, port = opts['target'].partition(':')
+    timeout = float(opts.get('timeout', DEFAULT_TIMEOUT))
+    try:
+        conn = await LdapConnection.open(host, int(port or LDAP_PORT), timeout)
+        code, _, diag = await conn.request(bind_request(opts.get('dn', ''), opts.get('password', '')), timeout)
+        conn.close()
+    except (OSError, ConnectionError, asyncio.TimeoutError) as e:
+        print(f"✗ bind success: {type(e).__name__} {e}")
+        return 1
+    if code != 0:
+        print(f"✗ bind success: {result_name(code)} {diag}".rstrip())
+        return 1
+    print("✓ bind success")
+    return 0
+
+def main():
+    argv, opts = split_options(sys.argv)
+    if len(argv) < 2 or argv[1] not in ('run', 'check') or 'target' not in opts:
+        print("Usage: ldap_engine.py run --target=HOST[:PORT] --mode=LOGIN --dn=DN --password=PW [--base=DN] "
+              f"[--rate={DEFAULT_RATE}] [--duration=60] [--ramp=0] [--profile=LINEAR|SPIKE|POISSON] "
+              f"[--connections={DEFAULT_CONNECTIONS}] [--workers={DEFAULT_WORKERS}] [--pipeline={DEFAULT_PIPELINE}] "
+              "[--connect=pool|per-request] [--users=users.tsv] [--out=results.csv]")
+        print("       ldap_engine.py check --target=HOST[:PORT] --dn=DN --password=PW")
+        sys.exit(1)
+    if argv[1] == 'check':
+        sys.exit(asyncio.run(check_bind(opts)))
+    try:
+        engine = LdapEngine(opts)
+    except (ValueError, OSError) as e:
+        print(e)
+        sys.exit(1)
+    asyncio.run(engine.run())
+
+if __name__ == "__main__":
+    main()
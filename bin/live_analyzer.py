@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# Techton Live Analyzer
+# Follows a result file while the engine is still writing it (k6 --out csv,
+# k6 --out json or a JMeter CSV .jtl) and publishes rolling-window latency,
+# throughput and error-rate snapshots for the HUD and mtechton.
+import sys
+import os
+import csv
+import json
+import time
+from collections import deque
+from datetime import datetime
+
+from report_gen import LatencyHistogram, _column, split_options
+
+# Configuration
+WINDOWS = (10, 60) # Rolling windows (seconds) published in every snapshot
+DEFAULT_SNAPSHOT = "/tmp/techton_live.json"
+POLL_INTERVAL = 0.5 # Seconds between file polls / snapshot writes
+READ_CHUNK = 1 << 20
+IDLE_EXIT = 5 # Seconds without new data after the watched PID exits
+
+class RollingWindow:
+    # One slot per second of sample time, only as many as the largest window
+    # needs. Each slot: [latency samples, histogram, checks, failed checks].
+    def __init__(self, span=max(WINDOWS)):
+        self.span = span
+        self.slots = deque()
+        self.latest = None
+        self.first = None
+
+    def _slot(self, sec):
+        if self.latest is None or sec > self.latest:
+            self.latest = sec
+        if self.first is None or sec < self.first:
+            self.first = sec
+        # Drop slots that fell out of the largest window
+        while self.slots and self.slots[0][0] <= self.latest - self.span:
+            self.slots.popleft()
+        for slot in reversed(self.slots):
+            if slot[0] == sec: return slot
+            if slot[0] < sec: break
+        if sec <= self.latest - self.span:
+            return None
+        slot = [sec, 0, LatencyHistogram(), 0, 0]
+        # Samples arrive nearly in order; insert from the right
+        i = len(self.slots)
+        while i > 0 and self.slots[i - 1][0] > sec: i -= 1
+        self.slots.insert(i, slot)
+        return slot
+
+    def add_latency(self, sec, lat):
+        slot = self._slot(sec)
+        if slot is None: return
+        slot[1] += 1
+        slot[2].record(lat)
+
+    def add_check(self, sec, ok):
+        slot = self._slot(sec)
+        if slot is None: return
+        slot[3] += 1
+        if not ok: slot[4] += 1
+
+    def stats(self, window, end=None):
+        # `end` lets callers slide the window past the last sample (wall clock),
+        # so a target that stops answering shows up as a throughput drop.
+        hist = LatencyHistogram()
+        count = checks = fails = 0
+        if end is None or (self.latest is not None and end < self.latest):
+            end = self.latest
+        if end is not None:
+            lo = end - window
+            for sec, n, h, c, f in self.slots:
+                if lo < sec <= end:
+                    count += n
+                    hist.merge(h)
+                    checks += c
+                    fails += f
+        # Early in the run the window is not full yet
+        span = min(window, end - self.first + 1) if end is not None and self.first is not None else window
+        return {
+            'rps': round(count / span, 2) if span > 0 else 0,
+            'samples': count,
+            'error_rate': round(fails / checks * 100, 2) if checks else 0,
+            'checks': checks,
+            'avg': round(hist.mean(), 2),
+            'p50': round(hist.percentile(50), 2),
+            'p95': round(hist.percentile(95), 2),
+            'p99': round(hist.percentile(99), 2),
+            'max': round(hist.max or 0, 2),
+        }
+
+def _iso_to_ms(value):
+    # k6 JSON time: RFC3339 with up to nanosecond fractions
+    text = value.replace('Z', '+00:00')
+    if '.' in text:
+        head, _, rest = text.partition('.')
+        digits = ''.join(ch for ch in rest if ch.isdigit())
+        text = f"{head}.{digits[:6]}{rest[len(digits):]}"
+    return datetime.fromisoformat(text).timestamp() * 1000
+
+class StreamDecoder:
+    # Turns result lines into ('lat', ts_ms, value) / ('check', ts_ms, ok) events
+    def __init__(self):
+        self.kind = None
+        self.header = None
+        self.lat_metric = 'iteration_duration'
+
+    def _start(self, line):
+        if line.startswith('{'):
+            self.kind = 'k6-json'
+            return False
+        self.header = next(csv.reader([line]))
+        if 'timeStamp' in self.header and 'elapsed' in self.header:
+            self.kind = 'jtl-csv'
+            self.i_ts = _column(self.header, 'timeStamp')
+            self.i_el = _column(self.header, 'elapsed')
+            self.i_ok = _column(self.header, 'success')
+        else:
+            self.kind = 'k6-csv'
+            self.i_ts = _column(self.header, 'timestamp', 'timeStamp')
+            self.i_name = _column(self.header, 'metric_name')
+            self.i_val = _column(self.header, 'metric_value')
+        return True
+
+    def _metric(self, name, ts, value):
+        # HTTP scripts report request latency; LDAP scripts only iterations
+        if name == 'http_req_duration' and self.lat_metric != name:
+            self.lat_metric = name
+        if name == self.lat_metric:
+            return [('lat', ts, value)]
+        if name == 'checks':
+            return [('check', ts, value != 0.0)]
+        return []
+
+    def _row(self, row):
+        if self.kind == 'jtl-csv':
+            ts = int(row[self.i_ts])
+            ok = row[self.i_ok] == 'true'
+            return [('lat', ts, float(row[self.i_el])), ('check', ts, ok)]
+        ts = float(row[self.i_ts]) * 1000
+        if ts > 10000000000000: ts /= 1000
+        return self._metric(row[self.i_name], ts, float(row[self.i_val] or 0))
+
+    def _point(self, line):
+        point = json.loads(line)
+        if point.get('type') != 'Point': return []
+        data = point['data']
+        return self._metric(point.get('metric'), _iso_to_ms(data['time']), float(data['value']))
+
+    def decode(self, lines):
+        # Yields events for a batch of complete lines
+        if self.kind is None and lines:
+            if self._start(lines[0]): lines = lines[1:]
+        if self.kind == 'k6-json':
+            rows, handler = lines, self._point
+        else:
+            rows, handler = csv.reader(lines), self._row
+        for row in rows:
+            try:
+                yield from handler(row)
+            except (ValueError, IndexError, KeyError):
+                continue
+
+class FileFollower:
+    # Incremental reader: remembers its offset and keeps partial last lines
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.partial = b''
+        self.inode = None
+        self.decoder = StreamDecoder()
+
+    def read_lines(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return []
+        if self.inode is not None and (st.st_ino != self.inode or st.st_size < self.offset):
+            # File was replaced or truncated: start over
+            self.offset = 0
+            self.partial = b''
+            self.decoder = StreamDecoder()
+        self.inode = st.st_ino
+        if st.st_size == self.offset:
+            return []
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read(READ_CHUNK)
+        self.offset += len(chunk)
+        data = self.partial + chunk
+        lines = data.split(b'\n')
+        self.partial = lines.pop()
+        return [l.decode('utf-8', errors='ignore').rstrip('\r') for l in lines if l]
+
+class LiveAnalyzer:
+    def __init__(self, windows=WINDOWS):
+        self.windows = windows
+        self.window = RollingWindow(max(windows))
+        self.format = None
+        self.total_samples = 0
+        self.total_checks = 0
+        self.total_fails = 0
+        self.last_sample_ts = None
+
+    def feed_lines(self, lines, decoder):
+        for kind, ts, value in decoder.decode(lines):
+            sec = int(ts // 1000)
+            if self.last_sample_ts is None or ts > self.last_sample_ts:
+                self.last_sample_ts = ts
+            if kind == 'lat':
+                self.total_samples += 1
+                self.window.add_latency(sec, value)
+            else:
+                self.total_checks += 1
+                if not value: self.total_fails += 1
+                self.window.add_check(sec, value)
+
+    def snapshot(self):
+        now = time.time()
+        snap = {
+            'updated': round(now, 3),
+            'age_s': round(now - self.last_sample_ts / 1000, 1) if self.last_sample_ts else None,
+            'format': self.format,
+            'total_samples': self.total_samples,
+            'total_error_rate': round(self.total_fails / self.total_checks * 100, 2) if self.total_checks else 0,
+        }
+        for w in self.windows:
+            snap[f'w{w}s'] = self.window.stats(w)
+        return snap
+
+def write_snapshot(path, snap):
+    # JSON for programs plus a flat KEY=VALUE twin that bash can read cheaply
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(snap, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+    flat = []
+    for key, value in snap.items():
+        if isinstance(value, dict):
+            flat.extend(f"{key.upper()}_{k.upper()}={v}" for k, v in value.items())
+        else:
+            flat.append(f"{key.upper()}={'' if value is None else value}")
+    env_path = os.path.splitext(path)[0] + ".env"
+    with open(tmp, 'w') as f:
+        f.write("\n".join(flat) + "\n")
+    os.replace(tmp, env_path)
+
+def read_snapshot(path=DEFAULT_SNAPSHOT):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+def follow(paths, snapshot_path, interval=POLL_INTERVAL, pid=None, on_snapshot=None):
+    # Follows one result file, or several (sharded runs) into one set of
+    # windows. Runs until killed, until on_snapshot returns False, or until
+    # `pid` has exited and the files stayed quiet for IDLE_EXIT seconds.
+    if isinstance(paths, str): paths = [paths]
+    followers = [FileFollower(p) for p in paths]
+    analyzer = LiveAnalyzer()
+    quiet_since = None
+    while True:
+        got_data = False
+        for follower in followers:
+            lines = follower.read_lines()
+            while lines:
+                got_data = True
+                analyzer.feed_lines(lines, follower.decoder)
+                analyzer.format = follower.decoder.kind
+                lines = follower.read_lines()
+        snap = analyzer.snapshot()
+        if snapshot_path: write_snapshot(snapshot_path, snap)
+        if on_snapshot and on_snapshot(analyzer, snap) is False:
+            return analyzer
+        if pid is not None and not _pid_alive(pid):
+            if got_data: quiet_since = None
+            else:
+                quiet_since = quiet_since or time.time()
+                if time.time() - quiet_since >= IDLE_EXIT: return analyzer
+        time.sleep(interval)
+
+def main():
+    argv, opts = split_options(sys.argv)
+    if len(argv) < 2:
+        print("Usage: live_analyzer.py <result_file> [result_file ...] [--snapshot=/tmp/techton_live.json] [--interval=0.5] [--pid=PID]")
+        sys.exit(1)
+    snapshot_path = opts.get('snapshot', DEFAULT_SNAPSHOT)
+    interval = float(opts.get('interval', POLL_INTERVAL))
+    pid = int(opts['pid']) if 'pid' in opts else None
+    try:
+        follow(argv[1:], snapshot_path, interval, pid)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
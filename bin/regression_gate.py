@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# Techton Regression Gate
+# Compares a run against the pinned baseline of its target/mode instead of
+# fixed latency cut-offs. P50/P95/P99 come from the latency histograms and
+# throughput / error rate from the per-second rollups. Confidence intervals on
+# the deltas come from a block bootstrap over time: blocks of consecutive
+# seconds are resampled with replacement, which keeps the autocorrelation of a
+# load test intact. A metric only counts as a regression when the whole
+# interval lies beyond the tolerance, so run-to-run noise does not trip it.
+#
+#   regression_gate.py <run_dir|result_file> [--baseline=run_dir|result_file]
+#                      [--history=results/history.db] [--target=..] [--mode=..]
+#                      [--tolerance=5] [--error-tolerance=0.1] [--confidence=95]
+#                      [--iterations=1000] [--seed=0] [--json] [--out=verdict.json]
+#
+# Exit codes: 0 no regression, 2 regression, 1 no baseline / not enough data.
+import sys
+import os
+import json
+import random
+from bisect import bisect_right
+from itertools import accumulate
+
+from report_gen import load_results, split_options, format_id_number
+from history_db import connect, get_baseline, find_run, result_file
+
+# Configuration
+TOLERANCE_PCT = 5.0 # Practical threshold for latency / throughput changes
+ERROR_TOLERANCE_PP = 0.1 # Practical threshold for the error rate, in percentage points
+CONFIDENCE = 95
+ITERATIONS = 1000
+SEED = 0 # Fixed so the same two runs always get the same verdict
+TARGET_BLOCKS = 30 # Seconds are grouped into about this many blocks
+MIN_BLOCKS = 5
+LATENCY_METRICS = (('p50', 50), ('p95', 95), ('p99', 99))
+VERDICT_FILE = "regression.json"
+EXIT_REGRESSION = 2
+
+class BlockSample:
+    # One run cut into blocks of consecutive seconds. Each block keeps its
+    # latency bucket counts as a dense list over the run's bucket range (slot 0
+    # is the zero bucket) plus success / error / second totals.
+    def __init__(self, data):
+        hist = data.histogram
+        per_sec = data.rollup(1000)
+        n_sec = len(per_sec.count)
+        self.block_s = max(1, -(-n_sec // TARGET_BLOCKS))
+        idxs = sorted(hist.buckets)
+        lo = idxs[0] if idxs else 0
+        width = (idxs[-1] - lo + 1) if idxs else 0
+        gamma = hist.gamma
+        self.values = [0.0] + [2 * gamma ** (lo + i) / (gamma + 1) for i in range(width)]
+        self.counts, self.ok, self.errors, self.seconds = [], [], [], []
+        hists = data.per_second
+        for start in range(0, n_sec, self.block_s):
+            secs = range(start, min(start + self.block_s, n_sec))
+            dense = [0] * (width + 1)
+            for sec in secs:
+                h = hists.get(sec)
+                if h is None: continue
+                dense[0] += h.zero
+                for idx, n in h.buckets.items():
+                    dense[idx - lo + 1] += n
+            self.counts.append(dense)
+            self.ok.append(sum(per_sec.count[s] for s in secs))
+            self.errors.append(sum(per_sec.errors[s] for s in secs))
+            self.seconds.append(len(secs))
+        self.full = self.stats(range(len(self.counts)))
+
+    def __len__(self):
+        return len(self.counts)
+
+    def stats(self, picks):
+        # Percentiles, rate and error rate of the run rebuilt from the picked blocks
+        cum = list(accumulate(sum(col) for col in zip(*(self.counts[b] for b in picks))))
+        total_ok = cum[-1] if cum else 0
+        out = {}
+        for name, pct in LATENCY_METRICS:
+            if not total_ok:
+                out[name] = 0.0
+                continue
+            rank = min(int(total_ok * pct / 100), total_ok - 1)
+            out[name] = self.values[bisect_right(cum, rank)]
+        ok = sum(self.ok[b] for b in picks)
+        errors = sum(self.errors[b] for b in picks)
+        seconds = sum(self.seconds[b] for b in picks)
+        out['rps'] = (ok + errors) / seconds if seconds else 0.0
+        out['error_rate'] = errors / (ok + errors) * 100 if ok + errors else 0.0
+        return out
+
+    def resample(self, rng):
+        return self.stats(rng.choices(range(len(self.counts)), k=len(self.counts)))
+
+def interval(values, confidence):
+    values = sorted(values)
+    tail = (100 - confidence) / 200
+    lo = values[int(tail * (len(values) - 1))]
+    hi = values[int(round((1 - tail) * (len(values) - 1)))]
+    return lo, hi
+
+def relative(cand, base):
+    return (cand - base) / base * 100 if base else 0.0
+
+def compare(base, cand, tolerance=TOLERANCE_PCT, error_tolerance=ERROR_TOLERANCE_PP,
+            confidence=CONFIDENCE, iterations=ITERATIONS, seed=SEED):
+    rng = random.Random(seed)
+    draws = [(base.resample(rng), cand.resample(rng)) for _ in range(iterations)]
+    metrics = {}
+    for name, _ in LATENCY_METRICS + (('rps', None),):
+        lo, hi = interval([relative(c[name], b[name]) for b, c in draws], confidence)
+        if name == 'rps':
+            verdict = "regression" if hi < -tolerance else ("improvement" if lo > tolerance else "no change")
+        else:
+            verdict = "regression" if lo > tolerance else ("improvement" if hi < -tolerance else "no change")
+        metrics[name] = {
+            'baseline': round(base.full[name], 3),
+            'candidate': round(cand.full[name], 3),
+            'delta_pct': round(relative(cand.full[name], base.full[name]), 2),
+            'ci_low': round(lo, 2),
+            'ci_high': round(hi, 2),
+            'verdict': verdict,
+        }
+    # Error rate moves in absolute percentage points
+    lo, hi = interval([c['error_rate'] - b['error_rate'] for b, c in draws], confidence)
+    metrics['error_rate'] = {
+        'baseline': round(base.full['error_rate'], 3),
+        'candidate': round(cand.full['error_rate'], 3),
+        'delta_pp': round(cand.full['error_rate'] - base.full['error_rate'], 3),
+        'ci_low': round(lo, 3),
+        'ci_high': round(hi, 3),
+        'verdict': "regression" if lo > error_tolerance else ("improvement" if hi < -error_tolerance else "no change"),
+    }
+    regressed = [name for name, m in metrics.items() if m['verdict'] == 'regression']
+    return {
+        'verdict': "REGRESSION" if regressed else "PASS",
+        'regressed': regressed,
+        'confidence': confidence,
+        'iterations': iterations,
+        'tolerance_pct': tolerance,
+        'error_tolerance_pp': error_tolerance,
+        'metrics': metrics,
+    }
+
+def resolve(path):
+    if os.path.isdir(path):
+        return result_file(path)[0]
+    return path if os.path.isfile(path) else None
+
+def print_verdict(result):
+    print(f" Baseline  : {result['baseline']}")
+    print(f" Candidate : {result['candidate']}")
+    print(f" {'Metric':<11}{'Baseline':>12}{'Candidate':>12}{'Delta':>10}   {result['confidence']:g}% CI")
+    for name, m in result['metrics'].items():
+        unit, delta = ("pp", m['delta_pp']) if name == 'error_rate' else ("%", m['delta_pct'])
+        ci = f"[{format_id_number(m['ci_low'], 2)}, {format_id_number(m['ci_high'], 2)}]{unit}"
+        print(f" {name:<11}{format_id_number(m['baseline'], 2):>12}{format_id_number(m['candidate'], 2):>12}"
+              f"{format_id_number(delta, 2) + unit:>10}   {ci:<22} {m['verdict']}")
+    color = "\033[31m" if result['verdict'] == "REGRESSION" else "\033[32m"
+    print(f" Verdict: {color}{result['verdict']}\033[0m")
+
+def main():
+    argv, opts = split_options(sys.argv)
+    if len(argv) < 2:
+        print("Usage: regression_gate.py <run_dir|result_file> [--baseline=run_dir|result_file] "
+              "[--history=results/history.db] [--target=..] [--mode=..] [--tolerance=5] "
+              "[--error-tolerance=0.1] [--confidence=95] [--iterations=1000] [--seed=0] [--json] [--out=FILE]")
+        sys.exit(1)
+    candidate = argv[1]
+    baseline = opts.get('baseline') if isinstance(opts.get('baseline'), str) else None
+
+    # Pinned baseline of the run's target/mode from the history index
+    if baseline is None and isinstance(opts.get('history'), str) and os.path.exists(opts['history']):
+        conn = connect(opts['history'])
+        run = find_run(conn, candidate)
+        target = opts.get('target') or (run['target'] if run else None)
+        mode = opts.get('mode') or (run['mode'] if run else None)
+        row = get_baseline(conn, target, mode)
+        conn.close()
+        if row is not None:
+            baseline = row['path']
+    if baseline is None:
+        print("No baseline pinned for this target/mode.")
+        sys.exit(1)
+    base_file, cand_file = resolve(baseline), resolve(candidate)
+    if base_file is None or cand_file is None:
+        print(f"Result file not found for {'baseline' if base_file is None else 'candidate'}.")
+        sys.exit(1)
+    if os.path.abspath(base_file) == os.path.abspath(cand_file):
+        print("Run is its own baseline, nothing to compare.")
+        sys.exit(0)
+
+    base_data, cand_data = load_results(base_file), load_results(cand_file)
+    if not base_data or not cand_data:
+        print("No metric data found in baseline or candidate.")
+        sys.exit(1)
+    base, cand = BlockSample(base_data), BlockSample(cand_data)
+    if len(base) < MIN_BLOCKS or len(cand) < MIN_BLOCKS:
+        print(f"Runs too short for a bootstrap (need at least {MIN_BLOCKS}s of samples).")
+        sys.exit(1)
+
+    result = compare(base, cand, float(opts.get('tolerance', TOLERANCE_PCT)),
+                     float(opts.get('error-tolerance', ERROR_TOLERANCE_PP)),
+                     float(opts.get('confidence', CONFIDENCE)), int(opts.get('iterations', ITERATIONS)),
+                     int(opts.get('seed', SEED)))
+    result = {'baseline': baseline, 'candidate': candidate, **result}
+
+    out = opts.get('out') if isinstance(opts.get('out'), str) else None
+    if out is None and os.path.isdir(candidate):
+        out = os.path.join(candidate, VERDICT_FILE)
+    if out:
+        with open(out, 'w') as f:
+            json.dump(result, f, indent=2)
+    if 'json' in opts:
+        print(json.dumps(result, indent=2))
+    else:
+        print_verdict(result)
+    sys.exit(EXIT_REGRESSION if result['verdict'] == "REGRESSION" else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,612 @@
+// Techton Report Charts
+// Self-contained canvas renderer for the part of the Chart.js API the reports
+// use: line / bar / scatter charts, linear and category axes, extra y axes,
+// legend toggling and tooltips. report_gen.py inlines it into every report,
+// so reports open on air-gapped hosts. Series arrive packed as base64 raw
+// deflate Float32 columns (Chart.series) and charts below the fold are only
+// drawn once they scroll into view (Chart.lazy).
+(function (global) {
+    'use strict';
+
+    // --- Inflate (RFC 1951) for the packed series ---
+    const LEN_BASE = [3, 4, 5, 6, 7, 8, 9, 10, 11, 13, 15, 17, 19, 23, 27, 31, 35, 43, 51, 59, 67, 83, 99, 115, 131, 163, 195, 227, 258];
+    const LEN_EXTRA = [0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4, 4, 5, 5, 5, 5, 0];
+    const DIST_BASE = [1, 2, 3, 4, 5, 7, 9, 13, 17, 25, 33, 49, 65, 97, 129, 193, 257, 385, 513, 769, 1025, 1537, 2049, 3073,
+                       4097, 6145, 8193, 12289, 16385, 24577];
+    const DIST_EXTRA = [0, 0, 0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, 7, 7, 8, 8, 9, 9, 10, 10, 11, 11, 12, 12, 13, 13];
+    const CODE_ORDER = [16, 17, 18, 0, 8, 7, 9, 6, 10, 5, 11, 4, 12, 3, 13, 2, 14, 1, 15];
+
+    function huffman(lengths) {
+        // Canonical code as code counts per length plus symbols in code order
+        const counts = new Uint16Array(16), offsets = new Uint16Array(16), symbols = new Uint16Array(lengths.length);
+        for (let i = 0; i < lengths.length; i++) counts[lengths[i]]++;
+        counts[0] = 0;
+        for (let i = 1; i < 16; i++) offsets[i] = offsets[i - 1] + counts[i - 1];
+        for (let i = 0; i < lengths.length; i++) if (lengths[i]) symbols[offsets[lengths[i]]++] = i;
+        return { counts, symbols };
+    }
+
+    const FIXED = (function () {
+        const lit = new Uint8Array(288), dist = new Uint8Array(30).fill(5);
+        lit.fill(8, 0, 144); lit.fill(9, 144, 256); lit.fill(7, 256, 280); lit.fill(8, 280, 288);
+        return [huffman(lit), huffman(dist)];
+    })();
+
+    function inflate(src) {
+        let pos = 0, tag = 0, bits = 0, len = 0;
+        let out = new Uint8Array(Math.max(1024, src.length * 4));
+        const reserve = (n) => {
+            if (len + n <= out.length) return;
+            const grown = new Uint8Array(Math.max(out.length * 2, len + n));
+            grown.set(out.subarray(0, len));
+            out = grown;
+        };
+        const bit = () => {
+            if (!bits) { tag = src[pos++]; bits = 8; }
+            const b = tag & 1;
+            tag >>= 1; bits--;
+            return b;
+        };
+        const read = (n, base) => {
+            let v = 0;
+            for (let i = 0; i < n; i++) v |= bit() << i;
+            return v + (base || 0);
+        };
+        const decode = (tree) => {
+            let sum = 0, cur = 0, n = 0;
+            do {
+                cur = 2 * cur + bit();
+                n++;
+                sum += tree.counts[n];
+                cur -= tree.counts[n];
+            } while (cur >= 0);
+            return tree.symbols[sum + cur];
+        };
+        let last;
+        do {
+            last = bit();
+            const type = read(2);
+            if (type === 0) {
+                bits = 0; // Stored block: skip to the byte boundary
+                const n = src[pos] | (src[pos + 1] << 8);
+                pos += 4;
+                reserve(n);
+                out.set(src.subarray(pos, pos + n), len);
+                len += n; pos += n;
+                continue;
+            }
+            let lit = FIXED[0], dist = FIXED[1];
+            if (type === 2) {
+                const hlit = read(5, 257), hdist = read(5, 1), hclen = read(4, 4);
+                const codeLengths = new Uint8Array(19);
+                for (let i = 0; i < hclen; i++) codeLengths[CODE_ORDER[i]] = read(3);
+                const codes = huffman(codeLengths);
+                const lengths = new Uint8Array(hlit + hdist);
+                for (let n = 0; n < hlit + hdist;) {
+                    const sym = decode(codes);
+                    if (sym < 16) { lengths[n++] = sym; continue; }
+                    let prev = 0, repeat;
+                    if (sym === 16) { prev = lengths[n - 1]; repeat = read(2, 3); }
+                    else if (sym === 17) repeat = read(3, 3);
+                    else repeat = read(7, 11);
+                    while (repeat--) lengths[n++] = prev;
+                }
+                lit = huffman(lengths.subarray(0, hlit));
+                dist = huffman(lengths.subarray(hlit));
+            }
+            for (;;) {
+                let sym = decode(lit);
+                if (sym < 256) { reserve(1); out[len++] = sym; continue; }
+                if (sym === 256) break;
+                sym -= 257;
+                const n = read(LEN_EXTRA[sym], LEN_BASE[sym]);
+                const d = decode(dist);
+                const back = read(DIST_EXTRA[d], DIST_BASE[d]);
+                reserve(n);
+                for (let i = 0; i < n; i++, len++) out[len] = out[len - back];
+            }
+        } while (!last);
+        return out.subarray(0, len);
+    }
+
+    // --- Helpers ---
+    const PALETTE = ['#38bdf8', '#facc15', '#f87171', '#4ade80', '#a855f7', '#f97316', '#94a3b8'];
+    const FONT = "'Segoe UI', system-ui, sans-serif";
+
+    function niceStep(range, count) {
+        const raw = range / Math.max(1, count);
+        const mag = Math.pow(10, Math.floor(Math.log10(raw)));
+        const f = raw / mag;
+        return (f <= 1 ? 1 : f <= 2 ? 2 : f <= 2.5 ? 2.5 : f <= 5 ? 5 : 10) * mag;
+    }
+
+    function formatNumber(v) {
+        if (!isFinite(v)) return '';
+        const abs = Math.abs(v);
+        if (abs >= 1e6) return (v / 1e6).toFixed(abs >= 1e7 ? 0 : 1) + 'M';
+        if (abs >= 1e4) return (v / 1e3).toFixed(abs >= 1e5 ? 0 : 1) + 'k';
+        return String(Math.round(v * 1000) / 1000);
+    }
+
+    function points(data, labels) {
+        // Any accepted data shape -> { x, y } columns
+        if (data && data.x && data.y && typeof data.length !== 'number') return data;
+        const n = data ? data.length : 0, x = new Float64Array(n), y = new Float64Array(n);
+        for (let i = 0; i < n; i++) {
+            const p = data[i];
+            if (p === null || typeof p === 'number') { x[i] = i; y[i] = p === null ? NaN : p; }
+            else if (Array.isArray(p)) { x[i] = p[0]; y[i] = p[1]; }
+            else { x[i] = p.x; y[i] = p.y; }
+        }
+        return { x, y };
+    }
+
+    // --- Chart ---
+    class Chart {
+        constructor(target, config) {
+            this.canvas = target.canvas || target;
+            this.ctx = this.canvas.getContext('2d');
+            this.type = config.type || 'line';
+            this.options = config.options || {};
+            this.labels = (config.data && config.data.labels) || null;
+            this.horizontal = this.options.indexAxis === 'y';
+            this.datasets = ((config.data && config.data.datasets) || []).map((d, i) => Object.assign({
+                type: this.type === 'scatter' ? 'scatter' : this.type,
+                borderColor: PALETTE[i % PALETTE.length],
+            }, d, { cols: points(d.data, this.labels) }));
+            this.canvas.style.display = 'block';
+            this.canvas.style.width = '100%';
+            this.canvas.style.height = '100%';
+            this.canvas.addEventListener('mousemove', (e) => this.hover(e));
+            this.canvas.addEventListener('mouseleave', () => this.blit());
+            this.canvas.addEventListener('click', (e) => this.click(e));
+            let pending = null;
+            global.addEventListener('resize', () => {
+                clearTimeout(pending);
+                pending = setTimeout(() => this.draw(), 150);
+            });
+            this.draw();
+        }
+
+        scale(id) {
+            return (this.options.scales && this.options.scales[id]) || {};
+        }
+
+        axisOf(d) {
+            return this.horizontal ? (d.xAxisID || 'x') : (d.yAxisID || 'y');
+        }
+
+        category() {
+            return !!this.labels && this.scale(this.horizontal ? 'y' : 'x').type !== 'linear';
+        }
+
+        layout() {
+            const ctx = this.ctx, rect = this.canvas.getBoundingClientRect();
+            const dpr = global.devicePixelRatio || 1;
+            this.width = rect.width; this.height = rect.height;
+            this.canvas.width = Math.round(rect.width * dpr);
+            this.canvas.height = Math.round(rect.height * dpr);
+            ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+            const plugins = this.options.plugins || {};
+            let top = 4;
+            const title = plugins.title || {};
+            if (title.display) {
+                this.titleY = top + ((title.font && title.font.size) || 14);
+                top = this.titleY + 10;
+            }
+            // Legend items wrap onto as many rows as needed
+            ctx.font = `12px ${FONT}`;
+            this.legend = [];
+            let x = 0, row = 0;
+            const rows = [[]];
+            this.datasets.forEach((d, i) => {
+                const w = 18 + ctx.measureText(d.label || '').width + 14;
+                if (x + w > this.width && x > 0) { rows.push([]); row++; x = 0; }
+                rows[row].push({ i, w, x });
+                x += w;
+            });
+            rows.forEach((items, r) => {
+                const total = items.reduce((s, it) => s + it.w, 0), left = (this.width - total) / 2;
+                items.forEach((it) => this.legend.push({ i: it.i, x: left + it.x, y: top + r * 18, w: it.w, h: 16 }));
+            });
+            top += rows.length * 18 + 6;
+
+            // Value ranges per axis over the visible datasets
+            const axes = {};
+            const valueAxis = (id) => axes[id] || (axes[id] = { id, min: Infinity, max: -Infinity, bar: false });
+            const catAxis = this.horizontal ? 'y' : 'x';
+            const index = { id: catAxis, min: Infinity, max: -Infinity };
+            let stacked = 0;
+            this.datasets.forEach((d) => {
+                const a = valueAxis(this.axisOf(d));
+                if (d.type === 'bar') { a.bar = true; stacked++; }
+                if (d.hidden) return;
+                for (let i = 0; i < d.cols.y.length; i++) {
+                    const v = d.cols.y[i], k = d.cols.x[i];
+                    if (isNaN(v)) continue;
+                    if (v < a.min) a.min = v;
+                    if (v > a.max) a.max = v;
+                    if (k < index.min) index.min = k;
+                    if (k > index.max) index.max = k;
+                }
+            });
+            this.bars = stacked;
+            Object.values(axes).forEach((a) => {
+                const s = this.scale(a.id);
+                if (!isFinite(a.min)) { a.min = 0; a.max = 1; }
+                if (a.bar || s.beginAtZero || a.min > 0 && a.min < a.max * 0.25) a.min = Math.min(0, a.min);
+                if (s.min !== undefined) a.min = s.min;
+                if (s.max !== undefined) a.max = s.max;
+                if (a.max <= a.min) a.max = a.min + 1;
+                const step = niceStep(a.max - a.min, 6);
+                if (s.min === undefined) a.min = Math.floor(a.min / step) * step;
+                if (s.max === undefined) a.max = Math.ceil(a.max / step) * step;
+                a.ticks = [];
+                for (let v = a.min; v <= a.max + step / 2; v += step) a.ticks.push(Math.round(v / step) * step);
+                a.position = s.position || (a.id === 'x' || a.id === 'y' ? (this.horizontal ? 'bottom' : 'left') : 'right');
+                a.shown = s.display !== false;
+            });
+            if (this.category()) {
+                index.min = -0.5; index.max = this.labels.length - 0.5;
+            } else if (!isFinite(index.min)) {
+                index.min = 0; index.max = 1;
+            } else if (this.bars) {
+                // Half a bar of room at both ends of a linear bar axis
+                const gap = this.minGap();
+                index.min -= gap / 2; index.max += gap / 2;
+            }
+            if (index.max <= index.min) { index.max = index.min + 1; }
+            this.axes = axes; this.index = index;
+
+            // Axis widths from their tick labels
+            ctx.font = `11px ${FONT}`;
+            const labelWidth = (a) => Math.max(...a.ticks.map((t) => ctx.measureText(this.tick(a.id, t)).width)) + 8;
+            let left = 8, right = 8, bottom = 8;
+            const titled = (id) => { const t = this.scale(id).title; return t && t.display ? 16 : 0; };
+            if (!this.horizontal) {
+                Object.values(axes).forEach((a) => {
+                    if (!a.shown) return;
+                    const w = labelWidth(a) + titled(a.id);
+                    if (a.position === 'right') { a.edge = right; right += w; } else { a.edge = left; left += w; }
+                });
+                if (this.category()) left = Math.max(left, 8);
+                bottom += 18 + titled(catAxis);
+            } else {
+                const w = this.labels ? Math.min(this.width * 0.35, Math.max(...this.labels.map((l) => ctx.measureText(String(l)).width)) + 10) : 40;
+                left += w + titled(catAxis);
+                bottom += 18 + titled('x');
+            }
+            this.area = { left, top, right: this.width - right, bottom: this.height - bottom };
+        }
+
+        minGap() {
+            let gap = Infinity;
+            this.datasets.forEach((d) => {
+                if (d.type !== 'bar') return;
+                for (let i = 1; i < d.cols.x.length; i++) gap = Math.min(gap, Math.abs(d.cols.x[i] - d.cols.x[i - 1]) || Infinity);
+            });
+            return isFinite(gap) ? gap : 1;
+        }
+
+        tick(id, v) {
+            const ticks = this.scale(id).ticks || {};
+            if (this.category() && id === (this.horizontal ? 'y' : 'x')) return String(this.labels[Math.round(v)] ?? '');
+            return ticks.callback ? String(ticks.callback(Math.round(v * 1000) / 1000)) : formatNumber(v);
+        }
+
+        // Data -> pixel mapping along the index axis and a value axis
+        pos(k) {
+            const a = this.area, r = (k - this.index.min) / (this.index.max - this.index.min);
+            return this.horizontal ? a.top + r * (a.bottom - a.top) : a.left + r * (a.right - a.left);
+        }
+
+        val(axis, v) {
+            const a = this.area, r = (v - axis.min) / (axis.max - axis.min);
+            return this.horizontal ? a.left + r * (a.right - a.left) : a.bottom - r * (a.bottom - a.top);
+        }
+
+        draw() {
+            if (!this.canvas.isConnected || !this.canvas.getBoundingClientRect().width) return;
+            this.layout();
+            const ctx = this.ctx, a = this.area, plugins = this.options.plugins || {};
+            ctx.clearRect(0, 0, this.width, this.height);
+            const title = plugins.title || {};
+            if (title.display) {
+                ctx.fillStyle = title.color || '#f8fafc';
+                ctx.font = `bold ${(title.font && title.font.size) || 14}px ${FONT}`;
+                ctx.textAlign = 'center';
+                ctx.fillText(title.text, this.width / 2, this.titleY);
+            }
+            const legendColor = (plugins.legend && plugins.legend.labels && plugins.legend.labels.color) || '#94a3b8';
+            ctx.font = `12px ${FONT}`;
+            ctx.textAlign = 'left';
+            this.legend.forEach((it) => {
+                const d = this.datasets[it.i];
+                const color = Array.isArray(d.backgroundColor) ? d.backgroundColor[0] : (d.type === 'bar' ? d.backgroundColor : d.borderColor);
+                ctx.fillStyle = color || d.borderColor;
+                ctx.fillRect(it.x, it.y + 3, 12, 10);
+                ctx.fillStyle = legendColor;
+                ctx.fillText(d.label || '', it.x + 18, it.y + 12);
+                if (d.hidden) {
+                    ctx.strokeStyle = legendColor;
+                    ctx.beginPath();
+                    ctx.moveTo(it.x + 18, it.y + 8);
+                    ctx.lineTo(it.x + it.w - 14, it.y + 8);
+                    ctx.stroke();
+                }
+            });
+            this.drawAxes();
+            ctx.save();
+            ctx.beginPath();
+            ctx.rect(a.left, a.top, a.right - a.left, a.bottom - a.top);
+            ctx.clip();
+            let slot = 0;
+            const barDatasets = this.datasets.filter((d) => d.type === 'bar' && !d.hidden).length;
+            this.datasets.forEach((d) => { if (!d.hidden && d.type === 'bar') this.drawBars(d, slot++, barDatasets); });
+            this.datasets.forEach((d) => { if (!d.hidden && d.type !== 'bar') this.drawLine(d); });
+            ctx.restore();
+            // Tooltips redraw on top of a copy of the finished chart
+            this.base = document.createElement('canvas');
+            this.base.width = this.canvas.width; this.base.height = this.canvas.height;
+            this.base.getContext('2d').drawImage(this.canvas, 0, 0);
+        }
+
+        drawAxes() {
+            const ctx = this.ctx, a = this.area;
+            const catId = this.horizontal ? 'y' : 'x';
+            ctx.font = `11px ${FONT}`;
+            ctx.lineWidth = 1;
+            // Value axes
+            Object.values(this.axes).forEach((axis) => {
+                const s = this.scale(axis.id), grid = s.grid || {};
+                const tickColor = (s.ticks && s.ticks.color) || '#94a3b8';
+                const primary = axis.id === (this.horizontal ? 'x' : 'y');
+                axis.ticks.forEach((t) => {
+                    const p = this.val(axis, t);
+                    if (grid.drawOnChartArea !== false && (primary || grid.color)) {
+                        ctx.strokeStyle = grid.color || '#334155';
+                        ctx.beginPath();
+                        if (this.horizontal) { ctx.moveTo(p, a.top); ctx.lineTo(p, a.bottom); }
+                        else { ctx.moveTo(a.left, p); ctx.lineTo(a.right, p); }
+                        ctx.stroke();
+                    }
+                    if (!axis.shown) return;
+                    ctx.fillStyle = tickColor;
+                    if (this.horizontal) {
+                        ctx.textAlign = 'center';
+                        ctx.fillText(this.tick(axis.id, t), p, a.bottom + 14);
+                    } else if (axis.position === 'right') {
+                        ctx.textAlign = 'left';
+                        ctx.fillText(this.tick(axis.id, t), a.right + 6 + axis.edge - 8, p + 4);
+                    } else {
+                        ctx.textAlign = 'right';
+                        ctx.fillText(this.tick(axis.id, t), a.left - 6 - (axis.edge - 8), p + 4);
+                    }
+                });
+                const title = s.title;
+                if (axis.shown && title && title.display) {
+                    ctx.fillStyle = title.color || '#64748b';
+                    ctx.textAlign = 'center';
+                    if (this.horizontal) {
+                        ctx.fillText(title.text, (a.left + a.right) / 2, this.height - 6);
+                    } else {
+                        const x = axis.position === 'right' ? this.width - 4 - (axis.edge - 8) : 12 + (axis.edge - 8);
+                        ctx.save();
+                        ctx.translate(x, (a.top + a.bottom) / 2);
+                        ctx.rotate(axis.position === 'right' ? Math.PI / 2 : -Math.PI / 2);
+                        ctx.fillText(title.text, 0, 0);
+                        ctx.restore();
+                    }
+                }
+            });
+            // Index axis
+            const s = this.scale(catId), grid = s.grid || {};
+            ctx.fillStyle = (s.ticks && s.ticks.color) || '#94a3b8';
+            let ticks;
+            if (this.category()) {
+                // Skip labels so the ones drawn do not overlap
+                const room = this.horizontal ? 16 : Math.max(...this.labels.map((l) => ctx.measureText(String(l)).width)) + 12;
+                const length = Math.abs(this.pos(this.index.max) - this.pos(this.index.min));
+                const every = Math.max(1, Math.ceil(this.labels.length * room / length));
+                ticks = this.labels.map((_, i) => i).filter((i) => i % every === 0);
+            } else {
+                const limit = (s.ticks && s.ticks.maxTicksLimit) || 11;
+                const step = niceStep(this.index.max - this.index.min, limit - 1);
+                ticks = [];
+                for (let v = Math.ceil(this.index.min / step) * step; v <= this.index.max; v += step) ticks.push(v);
+            }
+            ticks.forEach((t) => {
+                const p = this.pos(t);
+                if (!this.category() && grid.drawOnChartArea !== false) {
+                    ctx.strokeStyle = grid.color || '#334155';
+                    ctx.beginPath();
+                    if (this.horizontal) { ctx.moveTo(a.left, p); ctx.lineTo(a.right, p); }
+                    else { ctx.moveTo(p, a.top); ctx.lineTo(p, a.bottom); }
+                    ctx.stroke();
+                }
+                if (this.horizontal) {
+                    ctx.textAlign = 'right';
+                    ctx.fillText(this.tick(catId, t), a.left - 6, p + 4);
+                } else {
+                    ctx.textAlign = 'center';
+                    ctx.fillText(this.tick(catId, t), p, a.bottom + 14);
+                }
+            });
+            const title = s.title;
+            if (title && title.display) {
+                ctx.fillStyle = title.color || '#64748b';
+                ctx.textAlign = 'center';
+                if (this.horizontal) {
+                    ctx.save();
+                    ctx.translate(12, (a.top + a.bottom) / 2);
+                    ctx.rotate(-Math.PI / 2);
+                    ctx.fillText(title.text, 0, 0);
+                    ctx.restore();
+                } else {
+                    ctx.fillText(title.text, (a.left + a.right) / 2, this.height - 6);
+                }
+            }
+        }
+
+        drawBars(d, slot, count) {
+            const ctx = this.ctx, axis = this.axes[this.axisOf(d)], cols = d.cols;
+            const band = Math.abs(this.pos(this.category() ? 1 : this.minGap()) - this.pos(0));
+            const width = Math.max(1, band * 0.8 / count);
+            const zero = this.val(axis, Math.max(axis.min, Math.min(axis.max, 0)));
+            for (let i = 0; i < cols.x.length; i++) {
+                if (isNaN(cols.y[i])) continue;
+                ctx.fillStyle = Array.isArray(d.backgroundColor) ? d.backgroundColor[i] : (d.backgroundColor || d.borderColor);
+                const c = this.pos(cols.x[i]) - band * 0.4 + slot * width, v = this.val(axis, cols.y[i]);
+                if (this.horizontal) ctx.fillRect(Math.min(zero, v), c, Math.abs(v - zero), width);
+                else ctx.fillRect(c, Math.min(zero, v), width, Math.abs(zero - v));
+            }
+        }
+
+        drawLine(d) {
+            const ctx = this.ctx, axis = this.axes[this.axisOf(d)], cols = d.cols, n = cols.x.length;
+            const line = d.type !== 'scatter' || d.showLine;
+            if (line && n) {
+                ctx.beginPath();
+                let open = false, first = null, lastX = 0;
+                for (let i = 0; i < n; i++) {
+                    if (isNaN(cols.y[i])) { open = false; continue; }
+                    const x = this.pos(cols.x[i]), y = this.val(axis, cols.y[i]);
+                    if (!open) { ctx.moveTo(x, y); if (first === null) first = x; open = true; }
+                    else ctx.lineTo(x, y);
+                    lastX = x;
+                }
+                if (d.fill && d.backgroundColor) {
+                    ctx.save();
+                    ctx.lineTo(lastX, this.area.bottom);
+                    ctx.lineTo(first, this.area.bottom);
+                    ctx.fillStyle = d.backgroundColor;
+                    ctx.fill();
+                    ctx.restore();
+                    // Re-trace the outline without the closing edges
+                    ctx.beginPath();
+                    open = false;
+                    for (let i = 0; i < n; i++) {
+                        if (isNaN(cols.y[i])) { open = false; continue; }
+                        const x = this.pos(cols.x[i]), y = this.val(axis, cols.y[i]);
+                        if (!open) { ctx.moveTo(x, y); open = true; } else ctx.lineTo(x, y);
+                    }
+                }
+                ctx.strokeStyle = d.borderColor;
+                ctx.lineWidth = d.borderWidth || 2;
+                ctx.setLineDash(d.borderDash || []);
+                ctx.stroke();
+                ctx.setLineDash([]);
+            }
+            const radius = d.pointRadius !== undefined ? d.pointRadius : 3;
+            if (!radius) return;
+            ctx.fillStyle = d.backgroundColor || d.borderColor;
+            ctx.strokeStyle = d.borderColor;
+            ctx.lineWidth = 2;
+            for (let i = 0; i < n; i++) {
+                if (isNaN(cols.y[i])) continue;
+                const x = this.pos(cols.x[i]), y = this.val(axis, cols.y[i]);
+                ctx.beginPath();
+                if (d.pointStyle === 'crossRot') {
+                    ctx.moveTo(x - radius, y - radius); ctx.lineTo(x + radius, y + radius);
+                    ctx.moveTo(x + radius, y - radius); ctx.lineTo(x - radius, y + radius);
+                    ctx.stroke();
+                } else {
+                    ctx.arc(x, y, radius, 0, Math.PI * 2);
+                    ctx.fill();
+                }
+            }
+        }
+
+        blit() {
+            if (!this.base) return;
+            this.ctx.save();
+            this.ctx.setTransform(1, 0, 0, 1, 0, 0);
+            this.ctx.drawImage(this.base, 0, 0);
+            this.ctx.restore();
+        }
+
+        click(e) {
+            const r = this.canvas.getBoundingClientRect(), x = e.clientX - r.left, y = e.clientY - r.top;
+            const hit = this.legend.find((it) => x >= it.x && x <= it.x + it.w && y >= it.y && y <= it.y + it.h);
+            if (!hit) return;
+            const d = this.datasets[hit.i];
+            d.hidden = !d.hidden;
+            this.draw();
+        }
+
+        hover(e) {
+            // Nearest point of every visible dataset along the index axis
+            const r = this.canvas.getBoundingClientRect(), mx = e.clientX - r.left, my = e.clientY - r.top, a = this.area;
+            this.blit();
+            if (mx < a.left || mx > a.right || my < a.top || my > a.bottom) return;
+            const at = this.horizontal ? my : mx;
+            const callback = ((this.options.plugins || {}).tooltip || {}).callbacks || {};
+            let key = null, best = Infinity;
+            const lines = [];
+            this.datasets.forEach((d) => {
+                if (d.hidden || !d.cols.x.length) return;
+                let pick = -1, dist = Infinity;
+                for (let i = 0; i < d.cols.x.length; i++) {
+                    if (isNaN(d.cols.y[i])) continue;
+                    const g = Math.abs(this.pos(d.cols.x[i]) - at);
+                    if (g < dist) { dist = g; pick = i; }
+                }
+                if (pick < 0) return;
+                if (dist < best) { best = dist; key = d.cols.x[pick]; }
+                const context = { dataset: d, dataIndex: pick, parsed: { x: d.cols.x[pick], y: d.cols.y[pick] } };
+                const value = callback.label ? callback.label(context) : formatNumber(d.cols.y[pick]);
+                lines.push({ text: `${d.label || ''}: ${value}`, color: d.type === 'bar' && !Array.isArray(d.backgroundColor) ? d.backgroundColor : d.borderColor });
+            });
+            if (!lines.length || best > 40) return;
+            const ctx = this.ctx, head = this.tick(this.horizontal ? 'y' : 'x', key);
+            ctx.font = `12px ${FONT}`;
+            const w = Math.max(ctx.measureText(head).width, ...lines.map((l) => ctx.measureText(l.text).width)) + 28;
+            const h = 22 + lines.length * 16;
+            const x = mx + 12 + w > this.width ? mx - 12 - w : mx + 12, y = Math.min(my, this.height - h - 4);
+            ctx.fillStyle = 'rgba(15, 23, 42, 0.92)';
+            ctx.fillRect(x, y, w, h);
+            ctx.fillStyle = '#f8fafc';
+            ctx.textAlign = 'left';
+            ctx.fillText(head, x + 8, y + 15);
+            lines.forEach((l, i) => {
+                ctx.fillStyle = l.color || '#94a3b8';
+                ctx.fillRect(x + 8, y + 24 + i * 16, 10, 10);
+                ctx.fillStyle = '#e2e8f0';
+                ctx.fillText(l.text, x + 22, y + 33 + i * 16);
+            });
+        }
+    }
+
+    // {n: names, l: lengths, d: base64 raw deflate of little-endian Float32
+    // xs then ys per series} -> {name: {x, y}}
+    Chart.series = function (packed) {
+        const raw = atob(packed.d), bytes = new Uint8Array(raw.length);
+        for (let i = 0; i < raw.length; i++) bytes[i] = raw.charCodeAt(i);
+        const data = inflate(bytes);
+        const values = new Float32Array(data.buffer.slice(data.byteOffset, data.byteOffset + data.length));
+        const out = {};
+        let offset = 0;
+        packed.n.forEach((name, i) => {
+            const n = packed.l[i];
+            out[name] = { x: values.subarray(offset, offset + n), y: values.subarray(offset + n, offset + 2 * n) };
+            offset += 2 * n;
+        });
+        return out;
+    };
+
+    // Builds the chart when its container first comes near the viewport
+    Chart.lazy = function (id, build) {
+        const canvas = document.getElementById(id);
+        if (!canvas) return;
+        if (!('IntersectionObserver' in global)) { build(canvas); return; }
+        const observer = new IntersectionObserver((entries) => {
+            if (!entries.some((e) => e.isIntersecting)) return;
+            observer.disconnect();
+            build(canvas);
+        }, { rootMargin: '200px' });
+        observer.observe(canvas.parentNode);
+    };
+
+    Chart.inflate = inflate;
+    global.Chart = Chart;
+})(window);
@@ -1,10 +1,20 @@
 #!/usr/bin/env python3
 import sys
+import re
 import csv
 import json
-import statistics
+import zlib
+import base64
+from html import escape
 import os
+import math
+import time
+import mmap
+import struct
+import xml.etree.ElementTree as ET
+from array import array
 from datetime import datetime
+from itertools import chain, islice
 
 def format_id_number(value, decimal_places=None):
     if isinstance(value, (int, float)):
@@ -31,6 +41,33 @@ def format_id_number(value, decimal_places=None):
     return str(value)
 
 # Configuration
+HEAD_SCAN_ROWS = 50 # Rows inspected to choose http_req_duration vs iteration_duration
+CORRECTED_METRIC = "corrected_duration" # Completion minus intended start (open-model profiles)
+DROPPED_METRIC = "dropped_iterations"
+# Per-phase timings of the k6 LDAP templates, in the order an iteration runs them
+PHASE_METRICS = {'ldap_dial_duration': "Dial (TCP connect)", 'ldap_bind_duration': "Bind (service account)",
+                 'ldap_op_duration': "Operation"}
+DROPPED_WARN_PCT = 1 # Share of scheduled iterations dropped before the run counts as saturated
+HIST_ACCURACY = 0.01 # Relative error bound of latency histogram buckets (1%)
+UNTAGGED_KEY = "(untagged)"
+REPORT_PERCENTILES = (50, 90, 95, 99, 99.9)
+SIDECAR_SUFFIX = ".tcol" # Columnar cache written next to the raw result file
+SIDECAR_MAGIC = b"TCOL\n"
+SIDECAR_VERSION = 6
+TICK_MS = 100 # Finest time bucket; every other resolution is folded from it
+MAX_BUCKET_MS = 60000
+MAX_CHART_POINTS = 1500 # Upper bound of points embedded per chart series
+CHART_LIB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "report_chart.js") # Inlined into every report
+PLACEHOLDER = re.compile(r"\{\{ (\w+) \}\}")
+# Tags that make up a breakdown key when --group-by is not given
+DEFAULT_GROUP_BY = {
+    'k6': ('scenario', 'group', 'name', 'op'),
+    'jtl-csv': ('label',),
+    'jtl-xml': ('label',),
+}
+MAX_BREAKDOWN_KEYS = 20 # Rows shown in the per-operation table/chart
+JTL_XML_ATTRS = {'label': 'lb', 'responseCode': 'rc', 'responseMessage': 'rm', 'threadName': 'tn', 'dataType': 'dt'}
+
 TEMPLATE_HTML = """
 
 <!DOCTYPE html>
@@ -39,7 +76,7 @@ TEMPLATE_HTML = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Techton Audit Report</title>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
+    <script>{{ chart_lib }}</script>
     <style>
         :root {
             --bg-color: #0f172a;
@@ -191,6 +228,13 @@ TEMPLATE_HTML = """
             <div class="stat-label">Avg Latency</div>
             <div class="stat-value {{ latency_class }}">{{ avg_latency }}</div>
             <div class="sub-stat">P90: {{ p90_latency }} / P95: {{ p95_latency }}</div>
+            <div class="sub-stat">P99: {{ p99_latency }} / P99.9: {{ p999_latency }}</div>
+        </div>
+        <div class="card">
+            <div class="stat-label">Dropped Iterations</div>
+            <div class="stat-value {{ dropped_class }}">{{ dropped_count }}</div>
+            <div class="sub-stat">{{ dropped_percentage }}% of scheduled arrivals</div>
+            <div class="sub-stat">Corrected P99: {{ corrected_p99 }}</div>
         </div>
     </div>
 
@@ -211,6 +255,73 @@ TEMPLATE_HTML = """
         <canvas id="throughputChart"></canvas>
     </div>
 
+    <div class="table-container" style="{{ phase_style }}">
+        <h3 style="margin-top: 0;">Where Time Is Spent</h3>
+        <table>
+            <thead>
+                <tr>
+                    <th>Phase</th>
+                    <th>Samples</th>
+                    <th>Per Iteration</th>
+                    <th>Share</th>
+                    <th>Avg</th>
+                    <th>P50</th>
+                    <th>P95</th>
+                    <th>P99</th>
+                </tr>
+            </thead>
+            <tbody>
+                {{ phase_rows }}
+            </tbody>
+        </table>
+    </div>
+
+    <div class="chart-container" style="{{ host_style }}">
+        <canvas id="hostChart"></canvas>
+    </div>
+
+    <div class="table-container">
+        <h3 style="margin-top: 0;">Service Time vs Corrected Latency</h3>
+        <table>
+            <thead>
+                <tr>
+                    <th>Metric</th>
+                    <th>Service Time</th>
+                    <th>Corrected (from intended start)</th>
+                </tr>
+            </thead>
+            <tbody>
+                {{ omission_rows }}
+            </tbody>
+        </table>
+    </div>
+
+    <div class="table-container">
+        <h3 style="margin-top: 0;">Operation Breakdown</h3>
+        <table>
+            <thead>
+                <tr>
+                    <th>{{ breakdown_title }}</th>
+                    <th>Requests</th>
+                    <th>Req/s</th>
+                    <th>Errors</th>
+                    <th>Avg</th>
+                    <th>P50</th>
+                    <th>P95</th>
+                    <th>P99</th>
+                    <th>Max</th>
+                </tr>
+            </thead>
+            <tbody>
+                {{ breakdown_rows }}
+            </tbody>
+        </table>
+    </div>
+
+    <div class="chart-container">
+        <canvas id="breakdownChart"></canvas>
+    </div>
+
     <div class="table-container">
         <h3 style="margin-top: 0;">{{ error_section_title }}</h3>
         <table>
@@ -227,26 +338,42 @@ TEMPLATE_HTML = """
     </div>
 
     <script>
-        const ctxLat = document.getElementById('latencyChart').getContext('2d');
-        const latencyChart = new Chart(ctxLat, {
+        const S = Chart.series({{ series }});
+        const latencyChart = new Chart(document.getElementById('latencyChart'), {
             type: 'line',
             data: {
-                labels: {{ time_labels }},
                 datasets: [{
                     label: 'Avg Latency (seconds)',
-                    data: {{ latency_data }},
+                    data: S.latency,
                     borderColor: '#38bdf8',
                     backgroundColor: 'rgba(56, 189, 248, 0.1)',
                     tension: 0.4,
                     fill: true,
                     pointRadius: 2
+                },
+                {
+                    label: 'P95 Latency (seconds)',
+                    data: S.p95,
+                    borderColor: '#facc15',
+                    tension: 0.4,
+                    fill: false,
+                    pointRadius: 0
+                },
+                {
+                    label: 'P99 Latency (seconds)',
+                    data: S.p99,
+                    borderColor: '#f87171',
+                    tension: 0.4,
+                    fill: false,
+                    pointRadius: 0
                 }]
             },
             options: {
                 responsive: true,
                 maintainAspectRatio: false,
                 interaction: {
-                    mode: 'index',
+                    mode: 'nearest',
+                    axis: 'x',
                     intersect: false,
                 },
                 plugins: {
@@ -267,35 +394,51 @@ TEMPLATE_HTML = """
                         title: { display: true, text: 'Seconds', color: '#64748b' }
                     },
                     x: { 
+                        type: 'linear',
                         grid: { color: '#334155' }, 
-                        ticks: { color: '#94a3b8', maxTicksLimit: 20 },
-                        title: { display: true, text: 'Test Duration (s)', color: '#64748b' }
+                        ticks: { color: '#94a3b8', maxTicksLimit: 20, callback: function(value) { return value + 's'; } },
+                        title: { display: true, text: 'Test Duration (s), {{ bucket }} buckets', color: '#64748b' }
                     }
                 }
             }
         });
 
-        const ctxTp = document.getElementById('throughputChart').getContext('2d');
-        const throughputChart = new Chart(ctxTp, {
+        // Charts further down are drawn when they scroll into view
+        Chart.lazy('throughputChart', (canvas) => new Chart(canvas, {
             type: 'bar',
             data: {
-                labels: {{ time_labels }},
                 datasets: [{
                     label: 'Successful Requests/s',
-                    data: {{ throughput_data }},
+                    data: S.throughput,
                     backgroundColor: '#22c55e',
                 },
                 {
                     label: 'Errors/s',
-                    data: {{ error_data }},
+                    data: S.errors,
                     backgroundColor: '#ef4444',
+                },
+                {
+                    label: 'Dropped/s',
+                    data: S.dropped,
+                    backgroundColor: '#a855f7',
+                    hidden: {{ dropped_hidden }},
+                },
+                {
+                    type: 'line',
+                    label: 'Generator CPU %',
+                    data: S.host_cpu,
+                    borderColor: '#f97316',
+                    pointRadius: 0,
+                    yAxisID: 'y1',
+                    hidden: {{ host_hidden }},
                 }]
             },
             options: {
                 responsive: true,
                 maintainAspectRatio: false,
                 interaction: {
-                    mode: 'index',
+                    mode: 'nearest',
+                    axis: 'x',
                     intersect: false,
                 },
                 plugins: {
@@ -308,172 +451,1086 @@ TEMPLATE_HTML = """
                         ticks: { color: '#94a3b8' },
                         title: { display: true, text: 'Requests per Second', color: '#64748b' }
                     },
+                    y1: {
+                        display: {{ host_shown }},
+                        position: 'right',
+                        min: 0,
+                        max: 100,
+                        grid: { drawOnChartArea: false },
+                        ticks: { color: '#94a3b8' },
+                        title: { display: true, text: 'Generator CPU %', color: '#64748b' }
+                    },
                     x: { 
+                        type: 'linear',
                         grid: { color: '#334155' }, 
-                        ticks: { color: '#94a3b8', maxTicksLimit: 20 },
+                        ticks: { color: '#94a3b8', maxTicksLimit: 20, callback: function(value) { return value + 's'; } },
+                        title: { display: true, text: 'Test Duration (s), {{ bucket }} buckets', color: '#64748b' }
+                    }
+                }
+            }
+        }));
+
+        Chart.lazy('hostChart', (canvas) => new Chart(canvas, {
+            type: 'line',
+            data: {
+                datasets: [
+                    { label: 'CPU %', data: S.host_cpu, borderColor: '#f97316', pointRadius: 0 },
+                    { label: 'Hottest Core %', data: S.host_core, borderColor: '#facc15', pointRadius: 0 },
+                    { label: 'Softirq %', data: S.host_softirq, borderColor: '#a855f7', pointRadius: 0 },
+                    { label: 'CPU Throttled %', data: S.host_throttled, borderColor: '#ef4444', pointRadius: 0 },
+                    { label: 'Ephemeral Ports %', data: S.host_ports, borderColor: '#38bdf8', pointRadius: 0 },
+                    { label: 'File Descriptors %', data: S.host_fds, borderColor: '#22c55e', pointRadius: 0 },
+                    { label: 'TIME_WAIT Sockets', data: S.host_time_wait, borderColor: '#94a3b8', borderDash: [4, 4], pointRadius: 0, yAxisID: 'y1' }
+                ]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                interaction: {
+                    mode: 'nearest',
+                    axis: 'x',
+                    intersect: false,
+                },
+                plugins: {
+                    legend: { labels: { color: '#94a3b8' } },
+                    title: { display: true, text: 'Generator Host (Load Generator Saturation)', color: '#f8fafc', font: { size: 16 } }
+                },
+                scales: {
+                    y: {
+                        min: 0,
+                        max: 100,
+                        grid: { color: '#334155' },
+                        ticks: { color: '#94a3b8' },
+                        title: { display: true, text: 'Percent', color: '#64748b' }
+                    },
+                    y1: {
+                        position: 'right',
+                        grid: { drawOnChartArea: false },
+                        ticks: { color: '#94a3b8' },
+                        title: { display: true, text: 'Sockets', color: '#64748b' }
+                    },
+                    x: {
+                        type: 'linear',
+                        grid: { color: '#334155' },
+                        ticks: { color: '#94a3b8', maxTicksLimit: 20, callback: function(value) { return value + 's'; } },
                         title: { display: true, text: 'Test Duration (s)', color: '#64748b' }
                     }
                 }
             }
-        });
+        }));
+
+        Chart.lazy('breakdownChart', (canvas) => new Chart(canvas, {
+            type: 'bar',
+            data: {
+                labels: {{ breakdown_labels }},
+                datasets: [{
+                    label: 'P50',
+                    data: {{ breakdown_p50 }},
+                    backgroundColor: '#38bdf8',
+                },
+                {
+                    label: 'P95',
+                    data: {{ breakdown_p95 }},
+                    backgroundColor: '#facc15',
+                },
+                {
+                    label: 'P99',
+                    data: {{ breakdown_p99 }},
+                    backgroundColor: '#f87171',
+                }]
+            },
+            options: {
+                indexAxis: 'y',
+                responsive: true,
+                maintainAspectRatio: false,
+                plugins: {
+                    legend: { labels: { color: '#94a3b8' } },
+                    title: { display: true, text: 'Latency by Operation', color: '#f8fafc', font: { size: 16 } }
+                },
+                scales: {
+                    x: { 
+                        grid: { color: '#334155' }, 
+                        ticks: { color: '#94a3b8', callback: function(value) { return value + 's'; } },
+                        title: { display: true, text: 'Seconds', color: '#64748b' }
+                    },
+                    y: { 
+                        grid: { color: '#334155' }, 
+                        ticks: { color: '#94a3b8' }
+                    }
+                }
+            }
+        }));
     </script>
 </body>
 </html>
 """
 
-def parse_csv(file_path):
-    data = []
-    has_http = False
-    
+class LatencyHistogram:
+    # Log-bucketed latency histogram with bounded relative error (DDSketch style).
+    # Every value v > 0 lands in bucket ceil(log(v) / log(gamma)); the bucket's
+    # representative value is within `accuracy` of anything stored in it.
+    # Two histograms with the same accuracy merge exactly by adding bucket counts.
+    def __init__(self, accuracy=HIST_ACCURACY):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value, n=1):
+        if value <= 0:
+            self.zero += n
+            value = 0.0
+        else:
+            idx = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[idx] = self.buckets.get(idx, 0) + n
+        self.count += n
+        self.total += value * n
+        if self.min is None or value < self.min: self.min = value
+        if self.max is None or value > self.max: self.max = value
+
+    def merge(self, other):
+        if other.accuracy != self.accuracy:
+            raise ValueError(f"Cannot merge histograms with accuracy {self.accuracy} and {other.accuracy}")
+        for idx, n in other.buckets.items():
+            self.buckets[idx] = self.buckets.get(idx, 0) + n
+        self.zero += other.zero
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min): self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max): self.max = other.max
+        return self
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def percentile(self, pct):
+        if not self.count: return 0
+        # Same rank convention as indexing a sorted list at int(n * q)
+        rank = min(int(self.count * pct / 100), self.count - 1)
+        if rank < self.zero: return 0.0
+        seen = self.zero
+        for idx in sorted(self.buckets):
+            seen += self.buckets[idx]
+            if seen > rank:
+                value = 2 * self.gamma ** idx / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def percentiles(self, pcts=REPORT_PERCENTILES):
+        return {p: self.percentile(p) for p in pcts}
+
+    def to_dict(self):
+        return {
+            'accuracy': self.accuracy,
+            'zero': self.zero,
+            'count': self.count,
+            'sum': self.total,
+            'min': self.min,
+            'max': self.max,
+            'buckets': {str(k): v for k, v in sorted(self.buckets.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        h = cls(d.get('accuracy', HIST_ACCURACY))
+        h.buckets = {int(k): v for k, v in d.get('buckets', {}).items()}
+        h.zero = d.get('zero', 0)
+        h.count = d.get('count', 0)
+        h.total = d.get('sum', 0.0)
+        h.min = d.get('min')
+        h.max = d.get('max')
+        return h
+
+def save_histograms(path, overall, per_second):
+    doc = {
+        'overall': overall.to_dict(),
+        'per_second': {str(k): h.to_dict() for k, h in sorted(per_second.items())},
+    }
+    with open(path, 'w') as f:
+        json.dump(doc, f, separators=(',', ':'))
+
+def time_offset(ts, start_ts, width_ms):
+    # Epoch-millisecond timestamps; anything smaller is treated as seconds
+    if ts > 1000000000000: offset = int((ts - start_ts) / width_ms)
+    else: offset = int((ts - start_ts) * 1000 / width_ms)
+    return offset if offset > 0 else 0
+
+def second_offset(ts, start_ts):
+    return time_offset(ts, start_ts, 1000)
+
+def parse_bucket(value):
+    # "100ms", "250ms", "1s", "10s", "1m" or plain milliseconds
+    text = str(value).strip().lower()
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            reader = csv.DictReader(f)
-            rows = list(reader)
-            if not rows: return []
-            
-            for row in rows[:50]:
-                if row.get('metric_name') == 'http_req_duration':
-                    has_http = True
-                    break
-            
-            for row in rows:
-                item = {}
+        if text.endswith('ms'): width = float(text[:-2])
+        elif text.endswith('s'): width = float(text[:-1]) * 1000
+        elif text.endswith('m'): width = float(text[:-1]) * 60000
+        else: width = float(text)
+    except ValueError:
+        raise ValueError(f"Invalid bucket width: {value}")
+    width = int(round(width))
+    if width < TICK_MS or width > MAX_BUCKET_MS or width % TICK_MS:
+        raise ValueError(f"Bucket width must be a multiple of {TICK_MS}ms between {TICK_MS}ms and {MAX_BUCKET_MS // 1000}s")
+    return width
+
+def bucket_label(width_ms):
+    if width_ms % 60000 == 0: return f"{width_ms // 60000}m"
+    if width_ms % 1000 == 0: return f"{width_ms // 1000}s"
+    return f"{width_ms}ms"
+
+class Rollup:
+    # Time-bucketed series at one resolution. Index i covers
+    # [i * width_ms, (i + 1) * width_ms) from the first sample.
+    def __init__(self, width_ms):
+        self.width_ms = width_ms
+        self.count = array('I')
+        self.lat_sum = array('d')
+        self.errors = array('I')
+        self.lat_max = array('f')
+        self.dropped = array('I')
+        self.p95 = array('f')
+        self.p99 = array('f')
+
+    def __len__(self):
+        return len(self.count)
+
+    def starts(self):
+        return [i * self.width_ms / 1000 for i in range(len(self.count))]
+
+def fold(column, factor, reducer=sum):
+    # Reduce consecutive runs of `factor` elements of a column
+    if factor == 1: return column
+    return array(column.typecode if isinstance(column, array) else column.format,
+                 (reducer(column[i:i + factor]) for i in range(0, len(column), factor)))
+
+def lttb(xs, ys, threshold):
+    # Largest-Triangle-Three-Buckets: indices of `threshold` points that keep
+    # the visual shape of the series (peaks survive, flat runs collapse).
+    n = len(ys)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    picked = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        nxt_lo, nxt_hi = hi, min(int((i + 2) * every) + 1, n)
+        span = nxt_hi - nxt_lo
+        avg_x = sum(xs[nxt_lo:nxt_hi]) / span
+        avg_y = sum(ys[nxt_lo:nxt_hi]) / span
+        ax, ay = xs[a], ys[a]
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        picked.append(best)
+        a = best
+    picked.append(n - 1)
+    return picked
+
+def minmax_envelope(ys, max_points):
+    # Keep the min and max of each group (in time order) so bursts and drops
+    # are still visible after downsampling.
+    n = len(ys)
+    if n <= max_points:
+        return list(range(n))
+    groups = max(max_points // 2, 1)
+    size = n / groups
+    picked = []
+    for g in range(groups):
+        lo, hi = int(g * size), int((g + 1) * size)
+        if hi <= lo: continue
+        seg = range(lo, hi)
+        i_min = min(seg, key=ys.__getitem__)
+        i_max = max(seg, key=ys.__getitem__)
+        picked.extend(sorted({i_min, i_max}))
+    return picked
+
+def chart_points(xs, ys, indices, ndigits=3):
+    return [[round(xs[i], 1), round(ys[i], ndigits)] for i in indices]
+
+def histogram_path(output_file):
+    return os.path.splitext(output_file)[0] + "_histogram.json"
+
+def percentile_label(pct):
+    return f"P{pct:g}"
+
+class KeyStats:
+    # Aggregates for one breakdown key (a combination of tag values)
+    def __init__(self, accuracy=HIST_ACCURACY):
+        self.histogram = LatencyHistogram(accuracy)
+        self.count = 0
+        self.errors = 0
+
+    def to_dict(self):
+        return {'count': self.count, 'errors': self.errors, 'histogram': self.histogram.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d):
+        k = cls()
+        k.count = d['count']
+        k.errors = d['errors']
+        k.histogram = LatencyHistogram.from_dict(d['histogram'])
+        return k
+
+def format_key(names, values):
+    # "linear_ramp" for a single tag, "scenario=linear_ramp, op=bind" otherwise
+    if len(names) == 1:
+        return values[0] or UNTAGGED_KEY
+    parts = [f"{n}={v}" for n, v in zip(names, values) if v]
+    return ", ".join(parts) if parts else UNTAGGED_KEY
+
+def parse_extra_tags(raw):
+    # k6 puts non-standard tags into extra_tags as "k1=v1&k2=v2"
+    tags = {}
+    if raw:
+        for pair in raw.split('&'):
+            k, _, v = pair.partition('=')
+            if k: tags[k] = v
+    return tags
+
+def key_reader(header, group_by, extra_column=None):
+    # Build a row -> key string function for the tag columns in `header`;
+    # tags missing from the header are looked up in the extra-tags column.
+    cols = [_column(header, name) for name in group_by]
+    i_extra = _column(header, extra_column) if extra_column else None
+    cache = {}
+
+    def key_of(row):
+        n = len(row)
+        extra = None
+        values = []
+        for name, i in zip(group_by, cols):
+            if i is not None:
+                values.append(row[i] if i < n else '')
+            elif i_extra is not None and i_extra < n:
+                if extra is None: extra = parse_extra_tags(row[i_extra])
+                values.append(extra.get(name, ''))
+            else:
+                values.append('')
+        values = tuple(values)
+        key = cache.get(values)
+        if key is None:
+            key = cache[values] = format_key(group_by, values)
+        return key
+    return key_of
+
+class SampleColumns:
+    # Streaming aggregation of parsed samples: rows are folded into 100ms ticks,
+    # per-second histograms and per-key stats as they arrive and then dropped,
+    # so memory grows with run length and key count, not with the sample count.
+    # Error messages are interned; error_counts is keyed by message index.
+    def __init__(self):
+        self.samples = 0
+        self.messages = ['']
+        self._message_ids = {'': 0}
+        self.keys = []
+        self._key_ids = {}
+        self.key_stats = []
+        self.group_by = ()
+        self.histogram = LatencyHistogram()
+        self.per_second = {}
+        self.ticks = {}
+        self.error_counts = {}
+        self.start_ts = None
+        # Coordinated-omission view: latency from the intended start and the
+        # arrivals the generator never sent, next to the service-time columns
+        self.corrected = LatencyHistogram()
+        self.dropped_ticks = {}
+        self.phases = {}
+
+    def __len__(self):
+        return self.samples
+
+    def intern_key(self, key):
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            key_id = len(self.keys)
+            self._key_ids[key] = key_id
+            self.keys.append(key)
+            self.key_stats.append(KeyStats(self.histogram.accuracy))
+        return key_id
+
+    def intern(self, msg):
+        msg_id = self._message_ids.get(msg)
+        if msg_id is None:
+            msg_id = len(self.messages)
+            self._message_ids[msg] = msg_id
+            self.messages.append(msg)
+        return msg_id
+
+    def append(self, ts, lat, ok, msg='', key=UNTAGGED_KEY):
+        msg_id = self.intern(msg) if msg else 0
+        key_id = self.intern_key(key)
+        self.samples += 1
+        if self.start_ts is None: self.start_ts = ts
+
+        stats = self.key_stats[key_id]
+        stats.count += 1
+        if ok: stats.histogram.record(lat)
+        else: stats.errors += 1
+
+        tick = time_offset(ts, self.start_ts, TICK_MS)
+        bucket = self.ticks.get(tick)
+        if bucket is None:
+            bucket = self.ticks[tick] = [0, 0.0, 0, 0.0]
+        if ok:
+            bucket[0] += 1
+            bucket[1] += lat
+            if lat > bucket[3]: bucket[3] = lat
+            self.histogram.record(lat)
+            offset = second_offset(ts, self.start_ts)
+            sec = self.per_second.get(offset)
+            if sec is None:
+                sec = self.per_second[offset] = LatencyHistogram(self.histogram.accuracy)
+            sec.record(lat)
+        else:
+            bucket[2] += 1
+            if msg_id: self.error_counts[msg_id] = self.error_counts.get(msg_id, 0) + 1
+
+    def append_dropped(self, ts, n=1):
+        if self.start_ts is None: self.start_ts = ts
+        tick = time_offset(ts, self.start_ts, TICK_MS)
+        self.dropped_ticks[tick] = self.dropped_ticks.get(tick, 0) + n
+
+    def summarize(self):
+        summary = RunSummary()
+        summary.total = len(self)
+        summary.success_count = self.histogram.count
+        summary.start_ts = self.start_ts
+        summary.histogram = self.histogram
+        summary.corrected = self.corrected
+        summary.dropped = sum(self.dropped_ticks.values())
+        summary.phases = self.phases
+        summary.error_counts = {self.messages[k]: v for k, v in self.error_counts.items()}
+        summary.group_by = list(self.group_by)
+        summary.breakdown = dict(zip(self.keys, self.key_stats))
+        summary._per_second = self.per_second
+        # Dense 100ms ticks: the single pass every coarser resolution folds from
+        n_ticks = max(max(self.ticks, default=-1), max(self.dropped_ticks, default=-1)) + 1
+        for t in range(n_ticks):
+            count, lat_sum, errors, lat_max = self.ticks.get(t, (0, 0.0, 0, 0.0))
+            summary.tick_count.append(count)
+            summary.tick_lat_sum.append(lat_sum)
+            summary.tick_errors.append(errors)
+            summary.tick_lat_max.append(lat_max)
+            summary.tick_dropped.append(self.dropped_ticks.get(t, 0))
+        if self.per_second:
+            for sec in range(max(self.per_second) + 1):
+                sec_hist = self.per_second.get(sec)
+                summary.sec_p95.append(sec_hist.percentile(95) if sec_hist else 0)
+                summary.sec_p99.append(sec_hist.percentile(99) if sec_hist else 0)
+        return summary
+
+class RunSummary:
+    # Everything the report needs, without touching individual samples: totals,
+    # the overall histogram and dense per-second rollups indexed by offset.
+    def __init__(self):
+        self.total = 0
+        self.success_count = 0
+        self.start_ts = None
+        self.histogram = LatencyHistogram()
+        self.corrected = LatencyHistogram()
+        self.dropped = 0
+        self.phases = {}
+        self.tick_count = array('I')
+        self.tick_lat_sum = array('d')
+        self.tick_errors = array('I')
+        self.tick_lat_max = array('f')
+        self.tick_dropped = array('I')
+        self.sec_p95 = array('f')
+        self.sec_p99 = array('f')
+        self.error_counts = {}
+        self.group_by = []
+        self.breakdown = {}
+        self._per_second = None
+        self._per_second_loader = None
+        self._rollups = {}
+        self.from_cache = False
+
+    def __len__(self):
+        return self.total
+
+    @property
+    def error_count(self):
+        return self.total - self.success_count
+
+    @property
+    def per_second(self):
+        if self._per_second is None:
+            self._per_second = self._per_second_loader() if self._per_second_loader else {}
+        return self._per_second
+
+    def rollup(self, width_ms):
+        # Fold the 100ms ticks into `width_ms` buckets. Percentiles come from the
+        # per-second histograms (merged exactly above 1s); below 1s each bucket
+        # reports the percentile of the second it falls in.
+        cached = self._rollups.get(width_ms)
+        if cached is not None: return cached
+        r = Rollup(width_ms)
+        factor = width_ms // TICK_MS
+        r.count = fold(self.tick_count, factor)
+        r.lat_sum = fold(self.tick_lat_sum, factor)
+        r.errors = fold(self.tick_errors, factor)
+        r.lat_max = fold(self.tick_lat_max, factor, max)
+        r.dropped = fold(self.tick_dropped, factor)
+        n_sec = len(self.sec_p95)
+        if width_ms <= 1000:
+            for i in range(len(r.count)):
+                sec = i * width_ms // 1000
+                r.p95.append(self.sec_p95[sec] if sec < n_sec else 0)
+                r.p99.append(self.sec_p99[sec] if sec < n_sec else 0)
+        else:
+            per_sec = width_ms // 1000
+            hists = self.per_second
+            for i in range(len(r.count)):
+                merged = LatencyHistogram(self.histogram.accuracy)
+                for sec in range(i * per_sec, (i + 1) * per_sec):
+                    h = hists.get(sec)
+                    if h is not None: merged.merge(h)
+                r.p95.append(merged.percentile(95))
+                r.p99.append(merged.percentile(99))
+        self._rollups[width_ms] = r
+        return r
+
+    def header_dict(self):
+        return {
+            'total': self.total,
+            'success_count': self.success_count,
+            'start_ts': self.start_ts,
+            'histogram': self.histogram.to_dict(),
+            'corrected': self.corrected.to_dict(),
+            'dropped': self.dropped,
+            'phases': {k: h.to_dict() for k, h in self.phases.items()},
+            'error_counts': self.error_counts,
+            'group_by': self.group_by,
+            'breakdown': {k: v.to_dict() for k, v in self.breakdown.items()},
+        }
+
+def _column(header, *names):
+    for name in names:
+        if name in header:
+            return header.index(name)
+    return None
+
+def parse_csv(file_path, group_by=None):
+    data = SampleColumns()
+    data.group_by = tuple(group_by or DEFAULT_GROUP_BY['k6'])
+
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='ignore', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header: return data
+
+            i_ts = _column(header, 'timestamp', 'timeStamp')
+            i_name = _column(header, 'metric_name')
+            i_val = _column(header, 'metric_value')
+            i_check = _column(header, 'check')
+            if i_ts is None or i_name is None or i_val is None:
+                return data
+
+            # Peek at the first rows once to decide which metric carries latency,
+            # then replay them in front of the rest of the stream.
+            head = list(islice(reader, HEAD_SCAN_ROWS))
+            has_http = any(len(row) > i_name and row[i_name] == 'http_req_duration' for row in head)
+            lat_metric = 'http_req_duration' if has_http else 'iteration_duration'
+            width = max(i_ts, i_name, i_val) + 1
+            key_of = key_reader(header, data.group_by, 'extra_tags')
+            side_metrics = {CORRECTED_METRIC, DROPPED_METRIC, *PHASE_METRICS}
+
+            for row in chain(head, reader):
+                if len(row) < width: continue
+                m_name = row[i_name]
+                if m_name != lat_metric and m_name not in side_metrics and (has_http or m_name != 'checks'):
+                    continue
                 try:
-                    ts = float(row.get('timestamp', row.get('timeStamp', 0))) * 1000
+                    ts = float(row[i_ts] or 0) * 1000
                     if ts > 10000000000000: ts /= 1000
-                    item['ts'] = int(ts)
-                    m_name = row.get('metric_name')
-                    m_val = float(row.get('metric_value', 0))
-                    
-                    if has_http:
-                        if m_name == 'http_req_duration':
-                             item['lat'] = m_val
-                             item['success'] = True
-                             item['msg'] = ''
-                             data.append(item)
-                    else:
-                        if m_name == 'iteration_duration':
-                             item['lat'] = m_val
-                             item['success'] = True
-                             item['msg'] = ''
-                             data.append(item)
-                        elif m_name == 'checks':
-                             msg = row.get('check', 'Check Failed')
-                             if m_val == 0.0 and "success" not in msg:
-                                 item['lat'] = 0
-                                 item['success'] = False
-                                 item['msg'] = msg
-                                 data.append(item)
+                    m_val = float(row[i_val] or 0)
                 except ValueError:
                     continue
+
+                if m_name == lat_metric:
+                    data.append(int(ts), m_val, True, '', key_of(row))
+                elif m_name == CORRECTED_METRIC:
+                    data.corrected.record(m_val)
+                elif m_name == DROPPED_METRIC:
+                    data.append_dropped(int(ts), int(m_val))
+                elif m_name in PHASE_METRICS:
+                    phase = data.phases.get(m_name)
+                    if phase is None: phase = data.phases[m_name] = LatencyHistogram()
+                    phase.record(m_val)
+                else:
+                    msg = row[i_check] if i_check is not None and len(row) > i_check and row[i_check] else 'Check Failed'
+                    if m_val == 0.0 and "success" not in msg:
+                        data.append(int(ts), 0, False, msg, key_of(row))
     except Exception as e:
         print(f"CSV Parse Error: {e}")
-        return []
+        return SampleColumns()
     return data
 
+def _jtl_message(success, code, message, failure):
+    if success: return ''
+    return failure or message or (f"Response code {code}" if code else 'Sample Failed')
+
+def parse_jtl_csv(file_path, group_by=None):
+    # JMeter CSV results (saveConfig fieldNames=true): timeStamp is epoch ms,
+    # elapsed is the sample time in ms.
+    data = SampleColumns()
+    data.group_by = tuple(group_by or DEFAULT_GROUP_BY['jtl-csv'])
+
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='ignore', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header: return data
+
+            i_ts = _column(header, 'timeStamp')
+            i_el = _column(header, 'elapsed')
+            i_ok = _column(header, 'success')
+            i_code = _column(header, 'responseCode')
+            i_msg = _column(header, 'responseMessage')
+            i_fail = _column(header, 'failureMessage')
+            if i_ts is None or i_el is None or i_ok is None:
+                return data
+            width = max(i_ts, i_el, i_ok) + 1
+            key_of = key_reader(header, data.group_by)
+
+            def field(row, i):
+                return row[i] if i is not None and i < len(row) else ''
+
+            for row in reader:
+                if len(row) < width: continue
+                try:
+                    ts = int(row[i_ts])
+                    elapsed = float(row[i_el])
+                except ValueError:
+                    continue
+                ok = row[i_ok] == 'true'
+                msg = _jtl_message(ok, field(row, i_code), field(row, i_msg), field(row, i_fail))
+                data.append(ts, elapsed, ok, msg, key_of(row))
+    except Exception as e:
+        print(f"JTL Parse Error: {e}")
+        return SampleColumns()
+    return data
+
+def parse_jtl_xml(file_path, group_by=None):
+    # JMeter XML results: <sample>/<httpSample> elements with t (elapsed ms),
+    # ts (epoch ms), s (success), rc/rm and optional <failureMessage> children.
+    # Only top-level samples count; sub-results are folded into their parent.
+    data = SampleColumns()
+    data.group_by = tuple(group_by or DEFAULT_GROUP_BY['jtl-xml'])
+    attrs = [JTL_XML_ATTRS.get(name, name) for name in data.group_by]
+    depth = 0
+    root = None
+
+    try:
+        for event, elem in ET.iterparse(file_path, events=('start', 'end')):
+            if root is None: root = elem
+            if elem.tag not in ('sample', 'httpSample'):
+                continue
+            if event == 'start':
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 0:
+                try:
+                    ts = int(elem.get('ts', 0))
+                    elapsed = float(elem.get('t', 0))
+                except ValueError:
+                    root.clear()
+                    continue
+                ok = elem.get('s') == 'true'
+                failure = ''
+                if not ok:
+                    for assertion in elem.iter('assertionResult'):
+                        text = assertion.findtext('failureMessage')
+                        if text:
+                            failure = text
+                            break
+                msg = _jtl_message(ok, elem.get('rc', ''), elem.get('rm', ''), failure)
+                key = format_key(data.group_by, [elem.get(a, '') for a in attrs])
+                data.append(ts, elapsed, ok, msg, key)
+                # Drop finished samples so memory stays flat on large files
+                root.clear()
+    except Exception as e:
+        print(f"JTL Parse Error: {e}")
+        return SampleColumns()
+    return data
+
+def detect_format(file_path):
+    # 'k6', 'jtl-csv' or 'jtl-xml', judged from the first line of the file
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        first = f.readline().lstrip('\ufeff').strip()
+    if first.startswith('<'):
+        return 'jtl-xml'
+    header = next(csv.reader([first]), [])
+    if 'timeStamp' in header and 'elapsed' in header:
+        return 'jtl-csv'
+    return 'k6'
+
+PARSERS = {
+    'k6': parse_csv,
+    'jtl-csv': parse_jtl_csv,
+    'jtl-xml': parse_jtl_xml,
+}
+
+def parse_results(file_path, group_by=None):
+    return PARSERS[detect_format(file_path)](file_path, group_by)
+
+def sidecar_path(source_path):
+    return source_path + SIDECAR_SUFFIX
+
+def _source_stamp(source_path):
+    st = os.stat(source_path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+def write_sidecar(source_path, summary):
+    # Layout: magic, uint32 header length, JSON header, then 8-byte aligned raw
+    # columns (native byte order). Column offsets are relative to the data start.
+    blobs = [
+        ('tick_count', summary.tick_count), ('tick_lat_sum', summary.tick_lat_sum),
+        ('tick_errors', summary.tick_errors), ('tick_lat_max', summary.tick_lat_max),
+        ('tick_dropped', summary.tick_dropped), ('sec_p95', summary.sec_p95), ('sec_p99', summary.sec_p99),
+    ]
+    per_second = json.dumps({str(k): h.to_dict() for k, h in summary.per_second.items()},
+                            separators=(',', ':')).encode('utf-8')
+
+    layout = {}
+    offset = 0
+    for name, col in blobs:
+        nbytes = len(col) * col.itemsize
+        layout[name] = [col.typecode, offset, len(col)]
+        offset += nbytes + (-nbytes % 8)
+    header = {
+        'version': SIDECAR_VERSION,
+        'byteorder': sys.byteorder,
+        'source': _source_stamp(source_path),
+        'columns': layout,
+        'summary': summary.header_dict(),
+        'per_second': [offset, len(per_second)],
+    }
+    head = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    prefix = len(SIDECAR_MAGIC) + 4 + len(head)
+
+    target = sidecar_path(source_path)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(SIDECAR_MAGIC)
+            f.write(struct.pack('<I', len(head)))
+            f.write(head)
+            f.write(b'\0' * (-prefix % 8))
+            for name, col in blobs:
+                col.tofile(f)
+                f.write(b'\0' * (-(len(col) * col.itemsize) % 8))
+            f.write(per_second)
+        os.replace(tmp, target)
+    except OSError as e:
+        # Read-only run directories still get a report, just no cache
+        print(f"Cache Write Skipped: {e}")
+        if os.path.exists(tmp): os.remove(tmp)
+
+def load_sidecar(source_path, group_by=None):
+    # Returns a RunSummary whose tick columns are zero-copy memoryviews over an mmap,
+    # or None when the sidecar is missing, stale or from another layout.
+    path = sidecar_path(source_path)
+    try:
+        if not os.path.exists(path): return None
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mm)
+        if view[:len(SIDECAR_MAGIC)] != SIDECAR_MAGIC: return None
+        (head_len,) = struct.unpack_from('<I', mm, len(SIDECAR_MAGIC))
+        head_start = len(SIDECAR_MAGIC) + 4
+        header = json.loads(bytes(view[head_start:head_start + head_len]))
+        if header.get('version') != SIDECAR_VERSION or header.get('byteorder') != sys.byteorder:
+            return None
+        if header.get('source') != _source_stamp(source_path):
+            return None
+        wanted = list(group_by or DEFAULT_GROUP_BY[detect_format(source_path)])
+        if header['summary'].get('group_by') != wanted:
+            return None
+        base = head_start + head_len
+        base += -base % 8
+
+        def column(name):
+            typecode, offset, length = header['columns'][name]
+            nbytes = length * array(typecode).itemsize
+            return view[base + offset:base + offset + nbytes].cast(typecode)
+
+        meta = header['summary']
+        summary = RunSummary()
+        summary.total = meta['total']
+        summary.success_count = meta['success_count']
+        summary.start_ts = meta['start_ts']
+        summary.histogram = LatencyHistogram.from_dict(meta['histogram'])
+        summary.corrected = LatencyHistogram.from_dict(meta['corrected'])
+        summary.dropped = meta['dropped']
+        summary.phases = {k: LatencyHistogram.from_dict(d) for k, d in meta['phases'].items()}
+        summary.error_counts = meta['error_counts']
+        summary.group_by = meta['group_by']
+        summary.breakdown = {k: KeyStats.from_dict(d) for k, d in meta['breakdown'].items()}
+        for name in ('tick_count', 'tick_lat_sum', 'tick_errors', 'tick_lat_max', 'tick_dropped',
+                     'sec_p95', 'sec_p99'):
+            setattr(summary, name, column(name))
+
+        ps_offset, ps_len = header['per_second']
+        def per_second_loader():
+            raw = json.loads(bytes(view[base + ps_offset:base + ps_offset + ps_len]))
+            return {int(k): LatencyHistogram.from_dict(d) for k, d in raw.items()}
+        summary._per_second_loader = per_second_loader
+        summary.from_cache = True
+        return summary
+    except (OSError, ValueError, KeyError, struct.error) as e:
+        print(f"Cache Read Skipped: {e}")
+        return None
+
+def load_results(source_path, use_cache=True, group_by=None):
+    # Parse a result file (k6 CSV or JMeter JTL) once; later calls reuse the
+    # validated sidecar as long as it was built with the same breakdown tags.
+    if use_cache:
+        summary = load_sidecar(source_path, group_by)
+        if summary is not None: return summary
+    summary = parse_results(source_path, group_by).summarize()
+    if use_cache and summary.total:
+        write_sidecar(source_path, summary)
+    return summary
+
+def merge_histograms_cli(args):
+    # report_gen.py merge-hist <out.json> <in.json> [in.json ...]
+    if len(args) < 2:
+        print("Usage: report_gen.py merge-hist <output_json> <histogram_json> [histogram_json ...]")
+        sys.exit(1)
+    merged = LatencyHistogram()
+    per_second = {}
+    for path in args[1:]:
+        with open(path, 'r') as f:
+            doc = json.load(f)
+        merged.merge(LatencyHistogram.from_dict(doc.get('overall', {})))
+        for sec, d in doc.get('per_second', {}).items():
+            sec = int(sec)
+            h = LatencyHistogram.from_dict(d)
+            if sec in per_second: per_second[sec].merge(h)
+            else: per_second[sec] = h
+    save_histograms(args[0], merged, per_second)
+    stats = " / ".join(f"{percentile_label(p)}: {v:.3f}ms" for p, v in merged.percentiles().items())
+    print(f"Merged {len(args) - 1} histograms ({format_id_number(merged.count)} samples) -> {args[0]}")
+    print(f"{stats} / Max: {(merged.max or 0):.3f}ms")
+
+def summary_cli(args):
+    # report_gen.py summary <result_file> -- console stats for the history viewer
+    if len(args) < 1:
+        print("Usage: report_gen.py summary <result_file>")
+        sys.exit(1)
+    if not os.path.exists(args[0]):
+        print(" No data points found.")
+        return
+    data = load_results(args[0])
+    if not data:
+        print(" No data points found.")
+        return
+    hist = data.histogram
+    avg = hist.mean()
+    err_rate = data.error_count / data.total * 100
+    print(f" Total Requests  : {data.total}")
+    print(f" Avg Latency     : {avg:.2f} ms")
+    for p, v in hist.percentiles().items():
+        print(f" {percentile_label(p) + ' Latency':<16}: {v:.2f} ms")
+    print(f" Max Latency     : {(hist.max or 0):.2f} ms")
+    print(f" Error Rate      : {err_rate:.2f}%")
+    if data.corrected.count:
+        corrected = data.corrected
+        print(f" Corrected P95/P99: {corrected.percentile(95):.2f} / {corrected.percentile(99):.2f} ms (from intended start)")
+    dropped_pct = data.dropped / (data.total + data.dropped) * 100
+    if data.dropped:
+        print(f" Dropped Iters   : {data.dropped} ({dropped_pct:.2f}% of scheduled)")
+    if avg > 2000: print(" \033[31m[!] CRITICAL: High Latency (>2s)\033[0m")
+    elif dropped_pct > DROPPED_WARN_PCT: print(" \033[33m[!] SATURATED: Arrivals dropped, service time understates latency\033[0m")
+    elif avg > 500: print(" \033[33m[!] WARNING: Moderate Latency (>500ms)\033[0m")
+    else: print(" \033[32m[OK] Latency is healthy\033[0m")
+
+class PhaseTimer:
+    # --profile: wall time of each report phase (and peak RSS), printed and,
+    # with --profile=FILE, saved as JSON for bench.py
+    def __init__(self):
+        self.phases = {}
+        self.started = self.last = time.perf_counter()
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases[name] = round(now - self.last, 4)
+        self.last = now
+
+    def report(self, **extra):
+        import resource
+        return {
+            'phases': self.phases,
+            'total_s': round(self.last - self.started, 4),
+            'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            **extra,
+        }
+
+def js_literal(value):
+    # JSON that is safe to inline inside a <script> block
+    return json.dumps(value).replace("</", "<\\/")
+
+def render_template(template, fields):
+    # Fills every {{ name }} in one pass over the template. Inserted values are
+    # not scanned again, and a name without a field is a template bug (KeyError).
+    return PLACEHOLDER.sub(lambda m: fields[m.group(1)], template)
+
+def chart_library():
+    with open(CHART_LIB, 'r') as f:
+        return f.read()
+
+def pack_series(series):
+    # {name: [[x, y], ...]} -> one base64 blob of raw-deflated little-endian
+    # float32 columns (xs, then ys, per series), decoded by Chart.series()
+    values = array('f')
+    for points in series.values():
+        values.extend(p[0] for p in points)
+        values.extend(p[1] for p in points)
+    if sys.byteorder != 'little': values.byteswap()
+    packer = zlib.compressobj(9, zlib.DEFLATED, -15)
+    packed = packer.compress(values.tobytes()) + packer.flush()
+    return js_literal({'n': list(series), 'l': [len(p) for p in series.values()],
+                       'd': base64.b64encode(packed).decode('ascii')})
+
+def split_options(argv):
+    # Separate --name=value / --flag options from positional arguments
+    args, opts = [], {}
+    for arg in argv:
+        if arg.startswith('--'):
+            name, _, value = arg[2:].partition('=')
+            opts[name] = value if value else True
+        else:
+            args.append(arg)
+    return args, opts
+
 def main():
-    if len(sys.argv) < 5:
-        print("Usage: report_gen.py <csv_file> <target> <mode> <output_html> [vus] [duration]")
+    if len(sys.argv) > 1 and sys.argv[1] == 'merge-hist':
+        merge_histograms_cli(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'summary':
+        summary_cli(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'compare':
+        # report_gen.py compare <output_html> <run_dir> [...] -- see compare_report.py
+        import compare_report
+        sys.argv = [sys.argv[0]] + sys.argv[2:]
+        compare_report.main()
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'gate':
+        # report_gen.py gate <run_dir> [--baseline=..|--history=..] -- see regression_gate.py
+        import regression_gate
+        sys.argv = [sys.argv[0]] + sys.argv[2:]
+        regression_gate.main()
+        return
+
+    argv, opts = split_options(sys.argv)
+    if len(argv) < 5:
+        print("Usage: report_gen.py <result_file> <target> <mode> <output_html> [vus] [duration] [--bucket=1s] [--group-by=tag,tag] [--no-cache]\n"
+              "       [--profile[=phases.json]] [--cprofile=report.prof]")
         sys.exit(1)
+    timer = PhaseTimer()
+    profiler = None
+    if isinstance(opts.get('cprofile'), str):
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
 
-    csv_file = sys.argv[1]
-    target = sys.argv[2]
-    mode = sys.argv[3]
-    output_file = sys.argv[4]
+    result_file = argv[1]
+    target = argv[2]
+    mode = argv[3]
+    output_file = argv[4]
     
     vus = 0
     duration = 0
-    if len(sys.argv) > 5:
-        vus = int(sys.argv[5])
-    if len(sys.argv) > 6:
+    if len(argv) > 5:
+        vus = int(argv[5])
+    if len(argv) > 6:
         try:
-            duration = int(str(sys.argv[6]).replace("s", ""))
+            duration = int(str(argv[6]).replace("s", ""))
         except:
             duration = 60
 
-    if not os.path.exists(csv_file):
+    try:
+        bucket_ms = parse_bucket(opts.get('bucket', '1s'))
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    if not os.path.exists(result_file):
         with open(output_file, 'w') as f:
-            f.write(f"<h1>Error: Data file not found at {csv_file}</h1>")
+            f.write(f"<h1>Error: Data file not found at {result_file}</h1>")
         sys.exit(0)
 
-    data = parse_csv(csv_file)
+    group_by = [t.strip() for t in opts['group-by'].split(',') if t.strip()] if isinstance(opts.get('group-by'), str) else None
+    data = load_results(result_file, use_cache='no-cache' not in opts, group_by=group_by)
     if not data:
         with open(output_file, 'w') as f:
-            f.write(f"<h1>No metric data found in {csv_file}</h1>")
+            f.write(f"<h1>No metric data found in {result_file}</h1>")
         sys.exit(0)
+    timer.mark('cache' if data.from_cache else 'parse')
 
     # Analysis
-    total_reqs = len(data)
-    latencies = [d['lat'] for d in data if d['success']]
+    total_reqs = data.total
+    hist = data.histogram
+    pcts = {p: v / 1000 for p, v in hist.percentiles().items()}
     
     # Latency calc in seconds
-    avg_lat_ms = statistics.mean(latencies) if latencies else 0
-    max_lat_ms = max(latencies) if latencies else 0
-    
-    avg_lat_s = avg_lat_ms / 1000
-    max_lat_s = max_lat_ms / 1000
-
-    p90_lat_s = 0
-    p95_lat_s = 0
-    if latencies:
-        latencies.sort()
-        p90_lat_s = (latencies[int(len(latencies) * 0.9)]) / 1000
-        p95_lat_s = (latencies[int(len(latencies) * 0.95)]) / 1000
-
-    errors = [d for d in data if not d['success']]
-    error_count = len(errors)
-    success_count = total_reqs - error_count
+    avg_lat_s = hist.mean() / 1000
+    max_lat_s = (hist.max or 0) / 1000
+    p90_lat_s = pcts[90]
+    p95_lat_s = pcts[95]
+    p99_lat_s = pcts[99]
+    p999_lat_s = pcts[99.9]
+
+    success_count = data.success_count
+    error_count = data.error_count
     
     success_percentage = (success_count / total_reqs * 100) if total_reqs > 0 else 0
     fail_percentage = (error_count / total_reqs * 100) if total_reqs > 0 else 0
 
-    # Group by Second
-    start_ts = data[0]['ts']
-    time_series = {}
-    for d in data:
-        ts = d['ts']
-        if ts > 1000000000000: offset = int((ts - start_ts) / 1000)
-        else: offset = int(ts - start_ts)
-        if offset < 0: offset = 0
-        
-        if offset not in time_series:
-            time_series[offset] = {'count': 0, 'lat_sum': 0, 'errors': 0}
-        
-        if d['success']:
-            time_series[offset]['count'] += 1
-            time_series[offset]['lat_sum'] += d['lat']
-        else:
-            time_series[offset]['errors'] += 1
-
-    sorted_secs = sorted(time_series.keys())
-    chart_labels = []
-    chart_lat = []
-    chart_tp = []
-    chart_err = []
-    
+    # Throughput stats always come from the 1s rollup
+    per_sec = data.rollup(1000)
     peak_rps = 0
-    
-    if sorted_secs:
-        max_sec = sorted_secs[-1]
-        for s in range(max_sec + 1):
-            if s in time_series:
-                item = time_series[s]
-                total_in_sec = item['count'] + item['errors']
-                if total_in_sec > peak_rps: peak_rps = total_in_sec
-                
-                chart_labels.append(f"{s}s")
-                # Convert lat to seconds for chart
-                avg_sec_lat = (item['lat_sum'] / item['count']) / 1000 if item['count'] > 0 else 0
-                chart_lat.append(round(avg_sec_lat, 3))
-                chart_tp.append(item['count'])
-                chart_err.append(item['errors'])
-            else:
-                chart_labels.append(f"{s}s")
-                chart_lat.append(0)
-                chart_tp.append(0)
-                chart_err.append(0)
+    active_secs = 0
+    for count, errors in zip(per_sec.count, per_sec.errors):
+        total_in_sec = count + errors
+        if total_in_sec: active_secs += 1
+        if total_in_sec > peak_rps: peak_rps = total_in_sec
+
+    # Chart series at the selected resolution, rates normalised to per second
+    series = data.rollup(bucket_ms)
+    width_s = bucket_ms / 1000
+    xs = series.starts()
+    # Convert lat to seconds for chart
+    lat_avg = [(lat_sum / count) / 1000 if count > 0 else 0 for count, lat_sum in zip(series.count, series.lat_sum)]
+    lat_p95 = [v / 1000 for v in series.p95]
+    lat_p99 = [v / 1000 for v in series.p99]
+    tp_rate = [count / width_s for count in series.count]
+    err_rate = [errors / width_s for errors in series.errors]
+    drop_rate = [dropped / width_s for dropped in series.dropped]
 
-    actual_duration = len(sorted_secs)
+    # Shape-preserving downsampling keeps the embedded arrays bounded
+    chart_lat = chart_points(xs, lat_avg, lttb(xs, lat_avg, MAX_CHART_POINTS))
+    chart_p95 = chart_points(xs, lat_p95, lttb(xs, lat_p95, MAX_CHART_POINTS))
+    chart_p99 = chart_points(xs, lat_p99, lttb(xs, lat_p99, MAX_CHART_POINTS))
+    chart_tp = chart_points(xs, tp_rate, minmax_envelope(tp_rate, MAX_CHART_POINTS), 1)
+    chart_err = chart_points(xs, err_rate, minmax_envelope(err_rate, MAX_CHART_POINTS), 1)
+    chart_drop = chart_points(xs, drop_rate, minmax_envelope(drop_rate, MAX_CHART_POINTS), 1)
+
+    actual_duration = active_secs
     rps = int(total_reqs / actual_duration) if actual_duration > 0 else 0
     
     premature_stop = actual_duration < (duration - 5)
@@ -489,6 +1546,28 @@ def main():
     if fail_percentage > 5:
         status_label = "UNSTABLE"
         recommendations.append(f"High Failure Rate ({format_id_number(fail_percentage, 2)}%). Check AD logs for authentication rejections.")
+
+    # Arrivals the generator never sent are requests users would have waited
+    # on; without them the service-time percentiles look healthier than the run
+    dropped = data.dropped
+    corrected = data.corrected
+    dropped_percentage = dropped / (total_reqs + dropped) * 100 if total_reqs + dropped else 0
+    if dropped_percentage > DROPPED_WARN_PCT:
+        if status_label == "COMPLETED": status_label = "SATURATED"
+        recommendations.append(f"{format_id_number(dropped_percentage, 2)}% of scheduled arrivals ({format_id_number(dropped)}) were dropped. "
+                               "The target or the generator could not keep up with the arrival rate; read the corrected latency, not the service time.")
+    # Generator host samples (host_monitor.py) from the run directory: a
+    # saturated generator caps throughput no matter how the target is doing
+    import host_monitor
+    host = host_monitor.load_samples(os.path.join(os.path.dirname(os.path.abspath(result_file)), host_monitor.HOST_CSV))
+    host_findings = host_monitor.saturation(host)
+    if host_findings:
+        if status_label in ("COMPLETED", "SATURATED"): status_label = "CLIENT-BOUND"
+        recommendations.append("The load generator itself was saturated, so throughput and latency reflect the generator, not the target. "
+                               "Add generator processes or hosts: " + "; ".join(host_findings) + ".")
+    if corrected.count and corrected.percentile(99) > 2 * hist.percentile(99) > 0:
+        recommendations.append(f"Corrected P99 ({format_id_number(corrected.percentile(99) / 1000, 3)}s) is more than twice the service-time P99. "
+                               "Requests queued before they were sent.")
     
     if avg_lat_s > 2.0:
          recommendations.append("High Latency (>2s) detected. User experience is severely degraded.")
@@ -502,15 +1581,12 @@ def main():
         col_1_title = "Error Message"
         col_2_title = "Count"
         
-        error_counts = {}
-        for e in errors:
-            msg = e.get('msg', 'Unknown Error')
-            error_counts[msg] = error_counts.get(msg, 0) + 1
+        error_counts = data.error_counts
         sorted_errors = sorted(error_counts.items(), key=lambda x: x[1], reverse=True)[:5]
         
         rows_html = ""
         for msg, count in sorted_errors:
-            rows_html += f"<tr><td>{msg}</td><td>{format_id_number(count)}</td></tr>"
+            rows_html += f"<tr><td>{escape(msg)}</td><td>{format_id_number(count)}</td></tr>"
         
         rows_html += '<tr><td colspan="2" style="font-size: 0.8rem; color: var(--text-secondary); padding-top: 15px;">This table shows the most frequent error messages, which may indicate specific problems with authentication, network, or server configuration.</td></tr>'
 
@@ -523,53 +1599,163 @@ def main():
         rows_html = (
             f"<tr><td><strong>Peak Throughput</strong></td><td>{format_id_number(peak_rps)} Req/s</td></tr>"
             f"<tr><td><strong>Average Throughput</strong></td><td>{format_id_number(rps)} Req/s</td></tr>"
+            f"<tr><td><strong>P50 Latency</strong></td><td>{format_id_number(pcts[50], 3)}s</td></tr>"
             f"<tr><td><strong>P90 Latency</strong></td><td>{format_id_number(p90_lat_s, 3)}s</td></tr>"
             f"<tr><td><strong>P95 Latency</strong></td><td>{format_id_number(p95_lat_s, 3)}s</td></tr>"
-            f"<tr><td><strong>Stability Score</strong></td><td><span class='text-success'>100%</span></td></tr>"
+            f"<tr><td><strong>P99 Latency</strong></td><td>{format_id_number(p99_lat_s, 3)}s</td></tr>"
+            f"<tr><td><strong>P99.9 Latency</strong></td><td>{format_id_number(p999_lat_s, 3)}s</td></tr>"
+            f"<tr><td><strong>Max Latency</strong></td><td>{format_id_number(max_lat_s, 3)}s</td></tr>"
+            f"<tr><td><strong>Stability Score</strong></td><td><span class='text-success'>{format_id_number(100 - dropped_percentage, 1)}%</span></td></tr>"
+        )
+
+    # Service time next to latency measured from the intended start
+    if corrected.count:
+        omission_rows = f"<tr><td><strong>Avg</strong></td><td>{format_id_number(avg_lat_s, 3)}s</td><td>{format_id_number(corrected.mean() / 1000, 3)}s</td></tr>"
+        for p, v in corrected.percentiles().items():
+            omission_rows += (f"<tr><td><strong>{percentile_label(p)}</strong></td><td>{format_id_number(pcts[p], 3)}s</td>"
+                              f"<td>{format_id_number(v / 1000, 3)}s</td></tr>")
+        omission_rows += f"<tr><td><strong>Max</strong></td><td>{format_id_number(max_lat_s, 3)}s</td><td>{format_id_number((corrected.max or 0) / 1000, 3)}s</td></tr>"
+    else:
+        omission_rows = ('<tr><td colspan="3" style="color: var(--text-secondary);">No intended-start samples in this run. '
+                         'Only open-model profiles (constant arrival rate) record corrected latency.</td></tr>')
+    omission_rows += (f"<tr><td><strong>Dropped Iterations</strong></td><td colspan=\"2\">{format_id_number(dropped)} "
+                      f"({format_id_number(dropped_percentage, 2)}% of {format_id_number(total_reqs + dropped)} scheduled)</td></tr>")
+
+    # Dial / bind / operation split: per-iteration cost shows how much a
+    # connection strategy amortises connection setup
+    phases = [(name, data.phases[name]) for name in PHASE_METRICS if name in data.phases]
+    phase_total = sum(h.total for _, h in phases)
+    iterations = max((h.count for _, h in phases), default=0)
+    phase_rows = ""
+    for name, h in phases:
+        phase_rows += (
+            f"<tr><td>{PHASE_METRICS[name]}</td><td>{format_id_number(h.count)}</td>"
+            f"<td>{format_id_number(h.total / iterations, 3)} ms</td>"
+            f"<td>{format_id_number(h.total / phase_total * 100 if phase_total else 0, 1)}%</td>"
+            f"<td>{format_id_number(h.mean() / 1000, 3)}s</td>"
+            f"<td>{format_id_number(h.percentile(50) / 1000, 3)}s</td>"
+            f"<td>{format_id_number(h.percentile(95) / 1000, 3)}s</td>"
+            f"<td>{format_id_number(h.percentile(99) / 1000, 3)}s</td></tr>"
         )
 
+    # Host series on the run's time axis
+    host_xs = [round(h['ts'] - (data.start_ts or 0) / 1000, 3) for h in host]
+    host_series = {}
+    for column in ('cpu_pct', 'core_max_pct', 'softirq_pct', 'cg_throttled_pct', 'ports_pct', 'fds_pct', 'tcp_time_wait'):
+        ys = [h[column] for h in host]
+        host_series[column] = chart_points(host_xs, ys, lttb(host_xs, ys, MAX_CHART_POINTS), 1)
+
+    # Per-operation breakdown (busiest keys first)
+    breakdown = sorted(data.breakdown.items(), key=lambda kv: kv[1].count, reverse=True)[:MAX_BREAKDOWN_KEYS]
+    breakdown_rows = ""
+    bd_labels, bd_p50, bd_p95, bd_p99 = [], [], [], []
+    for key, st in breakdown:
+        h = st.histogram
+        key_rps = st.count / actual_duration if actual_duration > 0 else 0
+        key_err = st.errors / st.count * 100 if st.count else 0
+        err_class = "text-danger" if key_err > 5 else ("text-warning" if key_err > 0 else "text-success")
+        breakdown_rows += (
+            f"<tr><td>{escape(key)}</td><td>{format_id_number(st.count)}</td>"
+            f"<td>{format_id_number(key_rps, 1)}</td>"
+            f"<td><span class='{err_class}'>{format_id_number(key_err, 2)}%</span></td>"
+            f"<td>{format_id_number(h.mean() / 1000, 3)}s</td>"
+            f"<td>{format_id_number(h.percentile(50) / 1000, 3)}s</td>"
+            f"<td>{format_id_number(h.percentile(95) / 1000, 3)}s</td>"
+            f"<td>{format_id_number(h.percentile(99) / 1000, 3)}s</td>"
+            f"<td>{format_id_number((h.max or 0) / 1000, 3)}s</td></tr>"
+        )
+        bd_labels.append(key)
+        bd_p50.append(round(h.percentile(50) / 1000, 3))
+        bd_p95.append(round(h.percentile(95) / 1000, 3))
+        bd_p99.append(round(h.percentile(99) / 1000, 3))
+    breakdown_title = " / ".join(data.group_by) if data.group_by else "Operation"
+
     lat_class = "text-success"
     if avg_lat_s > 0.5: lat_class = "text-warning"
     if avg_lat_s > 2.0: lat_class = "text-danger"
     
     grade_class = "text-success"
     if status_label != "COMPLETED": grade_class = "text-danger"
-    if status_label == "UNSTABLE": grade_class = "text-warning"
+    if status_label in ("UNSTABLE", "SATURATED", "CLIENT-BOUND"): grade_class = "text-warning"
+    dropped_class = "text-danger" if dropped_percentage > DROPPED_WARN_PCT else ("text-warning" if dropped else "text-success")
     
     recs_html = "".join([f"<li>{r}</li>" for r in recommendations])
     if not recs_html: recs_html = "<li>No specific issues detected. System performing within normal parameters.</li>"
 
-    html = TEMPLATE_HTML.replace("{{ target }}", target) \
-                        .replace("{{ date }}", datetime.now().strftime("%Y-%m-%d %H:%M")) \
-                        .replace("{{ mode }}", mode) \
-                        .replace("{{ total_requests }}", format_id_number(total_reqs)) \
-                        .replace("{{ rps }}", format_id_number(rps)) \
-                        .replace("{{ success_count }}", format_id_number(success_count)) \
-                        .replace("{{ fail_count }}", format_id_number(error_count)) \
-                        .replace("{{ success_percentage }}", format_id_number(success_percentage, 1)) \
-                        .replace("{{ fail_percentage }}", format_id_number(fail_percentage, 1)) \
-                        .replace("{{ avg_latency }}", f"{format_id_number(avg_lat_s, 3)}s") \
-                        .replace("{{ max_latency }}", f"{format_id_number(max_lat_s, 3)}s") \
-                        .replace("{{ p90_latency }}", f"{format_id_number(p90_lat_s, 3)}s") \
-                        .replace("{{ p95_latency }}", f"{format_id_number(p95_lat_s, 3)}s") \
-                        .replace("{{ latency_class }}", lat_class) \
-                        .replace("{{ grade }}", status_label) \
-                        .replace("{{ grade_class }}", grade_class) \
-                        .replace("{{ summary }}", status_msg) \
-                        .replace("{{ recommendations_list }}", recs_html) \
-                        .replace("{{ time_labels }}", json.dumps(chart_labels)) \
-                        .replace("{{ latency_data }}", json.dumps(chart_lat)) \
-                        .replace("{{ throughput_data }}", json.dumps(chart_tp)) \
-                        .replace("{{ error_data }}", json.dumps(chart_err)) \
-                        .replace("{{ error_section_title }}", error_section_title) \
-                        .replace("{{ col_1_title }}", col_1_title) \
-                        .replace("{{ col_2_title }}", col_2_title) \
-                        .replace("{{ error_rows }}", rows_html)
+    timer.mark('analysis')
+    series = {'latency': chart_lat, 'p95': chart_p95, 'p99': chart_p99, 'throughput': chart_tp, 'errors': chart_err,
+              'dropped': chart_drop, 'host_cpu': host_series['cpu_pct'], 'host_core': host_series['core_max_pct'],
+              'host_softirq': host_series['softirq_pct'], 'host_throttled': host_series['cg_throttled_pct'],
+              'host_ports': host_series['ports_pct'], 'host_fds': host_series['fds_pct'],
+              'host_time_wait': host_series['tcp_time_wait']}
+    html = render_template(TEMPLATE_HTML, {
+        'chart_lib': chart_library(),
+        'target': target,
+        'date': datetime.now().strftime("%Y-%m-%d %H:%M"),
+        'mode': mode,
+        'total_requests': format_id_number(total_reqs),
+        'rps': format_id_number(rps),
+        'success_count': format_id_number(success_count),
+        'fail_count': format_id_number(error_count),
+        'success_percentage': format_id_number(success_percentage, 1),
+        'fail_percentage': format_id_number(fail_percentage, 1),
+        'avg_latency': f"{format_id_number(avg_lat_s, 3)}s",
+        'p90_latency': f"{format_id_number(p90_lat_s, 3)}s",
+        'p95_latency': f"{format_id_number(p95_lat_s, 3)}s",
+        'p99_latency': f"{format_id_number(p99_lat_s, 3)}s",
+        'p999_latency': f"{format_id_number(p999_lat_s, 3)}s",
+        'latency_class': lat_class,
+        'dropped_count': format_id_number(dropped),
+        'dropped_percentage': format_id_number(dropped_percentage, 2),
+        'dropped_class': dropped_class,
+        'corrected_p99': f"{format_id_number(corrected.percentile(99) / 1000, 3)}s" if corrected.count else "n/a",
+        'omission_rows': omission_rows,
+        'grade': status_label,
+        'grade_class': grade_class,
+        'summary': status_msg,
+        'recommendations_list': recs_html,
+        'bucket': bucket_label(bucket_ms),
+        'series': pack_series(series),
+        'dropped_hidden': "false" if dropped else "true",
+        'host_style': "" if host else "display: none;",
+        'phase_style': "" if phases else "display: none;",
+        'phase_rows': phase_rows,
+        'host_hidden': "false" if host else "true",
+        'host_shown': "true" if host else "false",
+        'error_section_title': error_section_title,
+        'col_1_title': col_1_title,
+        'col_2_title': col_2_title,
+        'error_rows': rows_html,
+        'breakdown_title': escape(breakdown_title),
+        'breakdown_rows': breakdown_rows,
+        'breakdown_labels': js_literal(bd_labels),
+        'breakdown_p50': json.dumps(bd_p50),
+        'breakdown_p95': json.dumps(bd_p95),
+        'breakdown_p99': json.dumps(bd_p99),
+    })
 
+    timer.mark('render')
     with open(output_file, 'w') as f:
         f.write(html)
+
+    # Keep the histograms so runs/shards can be merged later without the raw CSV
+    hist_file = histogram_path(output_file)
+    if not (data.from_cache and os.path.exists(hist_file)):
+        save_histograms(hist_file, hist, data.per_second)
+    timer.mark('write')
     
     print(f"Report generated: {output_file}")
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(opts['cprofile'])
+        print(f"cProfile stats: {opts['cprofile']}")
+    if 'profile' in opts:
+        profile = timer.report(samples=total_reqs, from_cache=data.from_cache)
+        print("Phases: " + " / ".join(f"{name} {secs:.3f}s" for name, secs in profile['phases'].items())
+              + f" / total {profile['total_s']:.3f}s / peak RSS {format_id_number(profile['peak_rss_kb'] / 1024, 1)} MB")
+        if isinstance(opts['profile'], str):
+            with open(opts['profile'], 'w') as f:
+                json.dump(profile, f, indent=2)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
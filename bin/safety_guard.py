@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# Techton Safety Guard
+# Engine-independent auto-abort: follows the live result stream, evaluates SLO
+# rules on rolling windows every tick and stops the techton_* container or
+# engine process as soon as one is breached. Also publishes the live snapshot,
+# so it replaces live_analyzer.py when a guard is wanted.
+import sys
+import os
+import re
+import json
+import time
+import subprocess
+from collections import deque
+from datetime import datetime
+
+from report_gen import split_options
+from live_analyzer import follow, DEFAULT_SNAPSHOT
+from host_monitor import command_pids
+
+# Configuration
+GUARD_INTERVAL = 0.25 # Evaluation tick (seconds)
+WARMUP_S = 10 # Seconds of data before any rule may fire
+MIN_WINDOW_SAMPLES = 20 # Fewer samples than this in a window is noise
+FLUSH_LAG_S = 2 # k6/JMeter flush result files about once per second
+ALIVE_CHECK_S = 1.0 # How often the guard checks that the engine still runs
+DEFAULT_RULES = "p95>5000@10s,error_rate>20@10s"
+
+# <metric>[_drop|_rise] <op> <value> [@<window>s]
+#   p95>5000@10s        P95 above 5000 ms over the last 10 s
+#   error_rate>20@10s   more than 20% failed checks
+#   rps_drop>80@10s     throughput collapsed by >80% from its best 10 s window
+#   p99_rise>3@10s      P99 tripled compared with the previous 10 s
+RULE_PATTERN = re.compile(r'^(avg|p50|p95|p99|max|rps|error_rate)(_drop|_rise)?\s*([<>])\s*([0-9.]+)(?:@([0-9]+)s)?$')
+MAX_WINDOW_S = 60
+
+class Rule:
+    def __init__(self, text):
+        m = RULE_PATTERN.match(text.strip())
+        if not m:
+            raise ValueError(f"Invalid guard rule: {text}")
+        self.text = text.strip()
+        self.metric, self.kind, self.op = m.group(1), m.group(2) or '', m.group(3)
+        self.threshold = float(m.group(4))
+        self.window = int(m.group(5) or 10)
+        if not 1 <= self.window <= MAX_WINDOW_S:
+            raise ValueError(f"Guard rule window must be 1-{MAX_WINDOW_S}s: {text}")
+        self.peak = None
+        self.history = deque()
+
+    def _enough(self, stats):
+        if self.metric == 'error_rate':
+            return stats['checks'] >= MIN_WINDOW_SAMPLES
+        if self.metric == 'rps':
+            return True
+        return stats['samples'] >= MIN_WINDOW_SAMPLES
+
+    def value(self, stats, end):
+        # Returns the compared value, or None while there is not enough data
+        current = stats[self.metric]
+        if self.kind == '_drop':
+            if stats['samples'] >= MIN_WINDOW_SAMPLES and (self.peak is None or current > self.peak):
+                self.peak = current
+            if not self.peak: return None
+            return (self.peak - current) / self.peak * 100
+        if not self._enough(stats):
+            return None
+        if self.kind == '_rise':
+            self.history.append((end, current))
+            while self.history and self.history[0][0] < end - self.window:
+                self.history.popleft()
+            past = self.history[0]
+            if past[0] > end - self.window or past[1] <= 0: return None
+            return current / past[1]
+        return current
+
+    def breached(self, value):
+        return value > self.threshold if self.op == '>' else value < self.threshold
+
+class Guard:
+    # `planned` is the length of the load window in seconds (ramp-up plus
+    # steady state, without ramp-down); `alive` reports whether the engine is
+    # still running. Both bound evaluation to the engine's own lifetime.
+    def __init__(self, rules, stop, log_path=None, trigger_path=None, warmup=WARMUP_S, planned=None, alive=None):
+        self.rules = rules
+        self.stop = stop
+        self.log_path = log_path
+        self.trigger_path = trigger_path
+        self.warmup = warmup
+        self.planned = planned
+        self.alive = alive
+        self.alive_checked = 0.0
+        self.triggered = None
+
+    def log(self, line):
+        stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        print(f"[{stamp}] {line}", flush=True)
+        if self.log_path:
+            with open(self.log_path, 'a') as f:
+                f.write(f"[{stamp}] {line}\n")
+
+    def check(self, analyzer, snap):
+        window = analyzer.window
+        if window.latest is None:
+            return True
+        now = time.time()
+        if self.alive and now - self.alive_checked >= ALIVE_CHECK_S:
+            self.alive_checked = now
+            if not self.alive():
+                # Engine is gone: the quiet tail is the end of the run, not a stall
+                self.log("Engine exited, guard disarmed")
+                return False
+        # The wall clock keeps the windows moving when the target stalls and no
+        # samples arrive, but only up to the planned end: ramp-down and engine
+        # shutdown are not a throughput collapse, so rps rules stop there
+        end = max(window.latest, int(now) - FLUSH_LAG_S)
+        throughput = True
+        if self.planned:
+            plan_end = window.first + self.planned - 1
+            if window.latest > plan_end: end, throughput = window.latest, False
+            else: end = min(end, plan_end)
+        if end - window.first + 1 < self.warmup:
+            return True
+        for rule in self.rules:
+            if rule.metric == 'rps' and not throughput:
+                continue
+            stats = window.stats(rule.window, end)
+            value = rule.value(stats, end)
+            if value is None or not rule.breached(value):
+                continue
+            self.triggered = {
+                'rule': rule.text,
+                'value': round(value, 3),
+                'threshold': rule.threshold,
+                'window_s': rule.window,
+                'stats': stats,
+                'time': round(time.time(), 3),
+            }
+            # Stop first, explain afterwards: every millisecond counts for the DC
+            self.stop()
+            self.log(f"ABORT {rule.text}: value={value:.3f} threshold={rule.threshold:g} "
+                     f"window={rule.window}s stats={json.dumps(stats, separators=(',', ':'))}")
+            if self.trigger_path:
+                with open(self.trigger_path, 'w') as f:
+                    json.dump(self.triggered, f, indent=2)
+            return False
+        return True
+
+def make_stopper(container=None, pid=None, pattern=None):
+    def stop():
+        if container:
+            # SIGTERM lets the engine flush; docker escalates to SIGKILL after 1s
+            subprocess.Popen(['docker', 'stop', '-t', '1', container],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if pid:
+            try: os.kill(pid, 15)
+            except OSError: pass
+        if pattern:
+            for p in command_pids(pattern):
+                try: os.kill(p, 15)
+                except OSError: pass
+    return stop
+
+def make_alive(container=None, pid=None, pattern=None):
+    def alive():
+        if container:
+            try:
+                out = subprocess.run(['docker', 'ps', '-q', '--filter', f"name=^{container}$"],
+                                     capture_output=True, text=True).stdout
+            except OSError:
+                out = ''
+            if out.strip(): return True
+        if pid:
+            try:
+                os.kill(pid, 0)
+                return True
+            except OSError:
+                pass
+        if pattern and command_pids(pattern):
+            return True
+        return False
+    return alive
+
+def parse_rules(text):
+    return [Rule(r) for r in text.split(',') if r.strip()]
+
+def main():
+    argv, opts = split_options(sys.argv)
+    if len(argv) < 2 or not any(k in opts for k in ('container', 'pid', 'pattern')):
+        print("Usage: safety_guard.py <result_file> [result_file ...] (--container=NAME | --pid=PID | --pattern=CMD) "
+              f"[--rules={DEFAULT_RULES}] [--log=guard.log] [--trigger=guard.json] "
+              f"[--snapshot={DEFAULT_SNAPSHOT}] [--interval={GUARD_INTERVAL}] [--warmup={WARMUP_S}] [--planned=SECONDS]")
+        sys.exit(1)
+    try:
+        rules = parse_rules(opts.get('rules', DEFAULT_RULES))
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    target = (opts.get('container'), int(opts['pid']) if 'pid' in opts else None, opts.get('pattern'))
+    planned = int(opts['planned']) if 'planned' in opts else None
+    guard = Guard(rules, make_stopper(*target), opts.get('log'), opts.get('trigger'),
+                  int(opts.get('warmup', WARMUP_S)), planned, make_alive(*target))
+    guard.log(f"Guard armed on {', '.join(argv[1:])}: {', '.join(r.text for r in rules)}")
+    try:
+        follow(argv[1:], opts.get('snapshot', DEFAULT_SNAPSHOT), float(opts.get('interval', GUARD_INTERVAL)),
+               on_snapshot=guard.check)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+# Techton Stand-In Target
+# Lightweight asyncio LDAP + DNS server with known behavior, for testing the
+# engines without a DC and for calibrating how many operations/s one generator
+# host can really produce. LDAP answers binds, searches (substring and
+# matching-rule-in-chain filters) and unbinds; DNS answers every question with
+# NXDOMAIN (or an A record). Latency distributions, a server thread pool,
+# error injection, unanswered requests, a connection limit and blob attribute
+# sizes (TITAN_STRESS) are configurable.
+#
+#   stand_in.py serve [--ldap-port=10389] [--dns-port=10053] [--listen=127.0.0.1]
+#                     [--latency=fixed:1] [--bind-latency=..] [--search-latency=..] [--dns-latency=..]
+#                     [--threads=0] [--error-rate=0] [--error-code=51] [--drop-rate=0]
+#                     [--max-connections=0] [--password=PW] [--entries=3] [--chain-entries=20]
+#                     [--chain-factor=5] [--blob=65536] [--dns-rcode=3] [--processes=1] [--cpus=2,3]
+#   stand_in.py calibrate [--engines=ldap,dns] [--mode=LOGIN] [--cores=1] [--latency=fixed:1]
+#                         [--start=500] [--max=200000] [--budget=900] [--rules=p95>50@5s,error_rate>1@5s]
+#                         [--cmd=TEMPLATE] [--dir=results/calibration_<ts>]
+#
+# Latency specs are in ms: "2" / "fixed:2", "uniform:1:5", "exp:MEAN",
+# "lognormal:MEDIAN:SIGMA". Error and drop rates are percentages.
+import sys
+import os
+import json
+import math
+import time
+import heapq
+import random
+import shutil
+import signal
+import socket
+import struct
+import asyncio
+import subprocess
+import multiprocessing
+from datetime import datetime
+
+from report_gen import split_options, format_id_number
+from ldap_engine import (ber, ber_int, ber_str, ber_seq, read_tlv, read_message, WRONG_PASSWORD, MEMBERSHIP_RULE,
+                         TITAN_ATTRS, OP_BIND, OP_BIND_RESPONSE, OP_UNBIND, OP_SEARCH, OP_SEARCH_ENTRY,
+                         OP_SEARCH_DONE)
+from dns_engine import HEADER, QTYPES
+from capacity import CapacitySearch, render, MANIFEST
+
+# Configuration
+BIN_DIR = os.path.dirname(os.path.abspath(__file__))
+LDAP_PORT = 10389
+DNS_PORT = 10053
+LISTEN = "127.0.0.1"
+DEFAULT_LATENCY = "fixed:1"
+DEFAULT_ENTRIES = 3
+CHAIN_ENTRIES = 20 # Members returned by a matching-rule-in-chain search
+CHAIN_FACTOR = 5 # Nested group expansion costs this many times a plain search
+BLOB_BYTES = 65536 # Size of each thumbnailPhoto / userCertificate / ... value
+BLOB_ATTRS = {a.lower() for a in TITAN_ATTRS} - {'cn'}
+ERROR_CODE = 51 # busy
+DNS_ERROR_RCODE = 2 # SERVFAIL
+DNS_RCODE = 3 # Random labels do not exist
+STATS_INTERVAL = 5
+BIND_REJECT_DIAG = "80090308: LdapErr: DSID-0C09042A, comment: AcceptSecurityContext error, data 52e, v4563"
+# Request tag -> (response tag, resultCode) for operations the engines never load
+OTHER_OPS = {
+    0x66: (0x67, 0),   # modify
+    0x68: (0x69, 0),   # add
+    0x4a: (0x6b, 0),   # delete
+    0x6c: (0x6d, 0),   # modDN
+    0x6e: (0x6f, 6),   # compare -> compareTrue
+    0x77: (0x78, 53),  # extended (StartTLS, WhoAmI) -> unwillingToPerform
+}
+OP_ABANDON = 0x50
+# Calibration
+CALIBRATION_RULES = "p95>50@5s,error_rate>1@5s" # Against a 1ms target, a slow P95 is generator lag
+CALIBRATION_START = 500
+CALIBRATION_MAX = 200000
+CALIBRATION_BUDGET = 900 # Seconds per engine
+MAX_DROPPED_PCT = 1.0
+READY_TIMEOUT = 10
+
+class Latency:
+    # Service time distribution parsed from a spec string; sample() in seconds
+    def __init__(self, spec):
+        self.spec = str(spec)
+        kind, _, args = self.spec.partition(':')
+        if not args:
+            kind, args = 'fixed', kind
+        try:
+            values = [float(v) for v in args.split(':')]
+        except ValueError:
+            raise ValueError(f"Invalid latency spec: {spec}")
+        shapes = {'fixed': 1, 'uniform': 2, 'exp': 1, 'lognormal': 2}
+        if kind not in shapes or len(values) != shapes[kind] or min(values) < 0:
+            raise ValueError(f"Invalid latency spec: {spec} (use fixed:MS, uniform:LO:HI, exp:MEAN, lognormal:MEDIAN:SIGMA)")
+        self.kind, self.values = kind, values
+
+    def sample(self, rng):
+        v = self.values
+        if self.kind == 'fixed': ms = v[0]
+        elif self.kind == 'uniform': ms = rng.uniform(v[0], v[1])
+        elif self.kind == 'exp': ms = rng.expovariate(1 / v[0]) if v[0] else 0.0
+        else: ms = rng.lognormvariate(math.log(v[0]), v[1]) if v[0] else 0.0
+        return ms / 1000
+
+class ServerCore:
+    # State shared by the LDAP and DNS listeners of one process: the thread
+    # pool model, error injection and counters. With --threads=N a request
+    # waits for the earliest of N busy slots, like a DC's LDAP thread pool;
+    # 0 serves everything in parallel.
+    def __init__(self, opts):
+        base = opts.get('latency', DEFAULT_LATENCY)
+        self.latency = {op: Latency(opts.get(f'{op}-latency', base)) for op in ('bind', 'search', 'dns')}
+        self.threads = int(opts.get('threads', 0))
+        self.free_at = [0.0] * self.threads
+        self.error_rate = float(opts.get('error-rate', 0)) / 100
+        self.drop_rate = float(opts.get('drop-rate', 0)) / 100
+        self.rng = random.Random()
+        self.served = self.errors = self.dropped = 0
+
+    def schedule(self, op, now, factor=1.0):
+        # Delay until the response is sent, or None when it is never answered
+        if self.drop_rate and self.rng.random() < self.drop_rate:
+            self.dropped += 1
+            return None
+        service = self.latency[op].sample(self.rng) * factor
+        if not self.threads:
+            return service
+        start = max(now, self.free_at[0])
+        heapq.heapreplace(self.free_at, start + service)
+        return start + service - now
+
+    def failed(self):
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors += 1
+            return True
+        return False
+
+class LdapServer:
+    def __init__(self, core, opts):
+        self.core = core
+        self.password = opts.get('password') if isinstance(opts.get('password'), str) else None
+        self.entries = int(opts.get('entries', DEFAULT_ENTRIES))
+        self.chain_entries = int(opts.get('chain-entries', CHAIN_ENTRIES))
+        self.chain_factor = float(opts.get('chain-factor', CHAIN_FACTOR))
+        self.error_code = int(opts.get('error-code', ERROR_CODE))
+        self.max_connections = int(opts.get('max-connections', 0))
+        self.blob = os.urandom(int(opts.get('blob', BLOB_BYTES)))
+        self.connections = self.refused = 0
+        self.loop = None
+
+    def result(self, msgid, tag, code, diag=''):
+        return ber_seq(ber_int(msgid), ber(tag, ber_int(code, 0x0a) + ber_str('') + ber_str(diag)))
+
+    def bind(self, msgid, body, s):
+        # version, name, simple [0] password
+        _, vs, ve = read_tlv(body, s)
+        _, ns, ne = read_tlv(body, ve)
+        _, ps, pe = read_tlv(body, ne)
+        password = body[ps:pe].decode('utf-8', errors='replace')
+        if self.password is not None: accepted = password == self.password
+        else: accepted = bool(password) and password != WRONG_PASSWORD
+        if accepted: return self.result(msgid, OP_BIND_RESPONSE, 0)
+        return self.result(msgid, OP_BIND_RESPONSE, 49, BIND_REJECT_DIAG)
+
+    def search(self, msgid, body, s, e):
+        # base, scope, deref, sizeLimit, timeLimit, typesOnly, filter, attributes
+        fields = []
+        pos = s
+        while pos < e:
+            tag, vs, ve = read_tlv(body, pos)
+            fields.append((tag, vs, ve))
+            pos = ve
+        base = body[fields[0][1]:fields[0][2]].decode('utf-8', errors='replace')
+        scope = int.from_bytes(body[fields[1][1]:fields[1][2]], 'big')
+        attrs, pos = [], fields[7][1]
+        while pos < fields[7][2]:
+            _, vs, ve = read_tlv(body, pos)
+            attrs.append(body[vs:ve].decode('utf-8', errors='replace'))
+            pos = ve
+        _, fs, fe = fields[6]
+        # Nested group expansion (LDAP_MATCHING_RULE_IN_CHAIN) is the expensive one
+        chain = MEMBERSHIP_RULE.encode() in body[fs:fe]
+        count = 1 if scope == 0 else (self.chain_entries if chain else self.entries)
+        size_limit = int.from_bytes(body[fields[3][1]:fields[3][2]], 'big')
+        code = 0
+        if size_limit and count > size_limit:
+            count, code = size_limit, 4 # sizeLimitExceeded
+        out = []
+        for i in range(count):
+            dn = base if scope == 0 else f"cn=user{i},{base}"
+            values = []
+            for attr in attrs or ['cn']:
+                value = self.blob if attr.lower() in BLOB_ATTRS else f"{attr}-{i}".encode()
+                values.append(ber_seq(ber_str(attr), ber_seq(ber(0x04, value), tag=0x31)))
+            out.append(ber_seq(ber_int(msgid), ber(OP_SEARCH_ENTRY, ber_str(dn) + ber_seq(*values))))
+        out.append(self.result(msgid, OP_SEARCH_DONE, code))
+        return b''.join(out), chain
+
+    def respond(self, writer, msgid, op, body, s, e):
+        if op == OP_BIND:
+            kind, factor = 'bind', 1.0
+            response = self.bind(msgid, body, s)
+        elif op == OP_SEARCH:
+            kind = 'search'
+            response, chain = self.search(msgid, body, s, e)
+            factor = self.chain_factor if chain else 1.0
+        elif op in OTHER_OPS:
+            kind, factor = 'search', 1.0
+            tag, code = OTHER_OPS[op]
+            response = self.result(msgid, tag, code)
+        else:
+            return
+        delay = self.core.schedule(kind, self.loop.time(), factor)
+        if delay is None: return
+        if self.core.failed():
+            tag = OP_SEARCH_DONE if op == OP_SEARCH else OTHER_OPS.get(op, (OP_BIND_RESPONSE,))[0]
+            response = self.result(msgid, tag, self.error_code)
+        self.loop.call_later(delay, self.send, writer, response)
+
+    def send(self, writer, data):
+        if not writer.is_closing():
+            writer.write(data)
+            self.core.served += 1
+
+    async def handle(self, reader, writer):
+        if self.max_connections and self.connections >= self.max_connections:
+            # Over the limit: accepted and reset, like a DC past MaxConnections
+            self.refused += 1
+            writer.transport.abort()
+            return
+        self.connections += 1
+        try:
+            while True:
+                body = await read_message(reader)
+                _, s, e = read_tlv(body, 0)
+                msgid = int.from_bytes(body[s:e], 'big', signed=True)
+                op, s, e = read_tlv(body, e)
+                if op == OP_UNBIND: break
+                if op == OP_ABANDON: continue
+                self.respond(writer, msgid, op, body, s, e)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, IndexError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+class DnsServer(asyncio.DatagramProtocol):
+    def __init__(self, core, opts):
+        self.core = core
+        self.rcode = int(opts.get('dns-rcode', DNS_RCODE))
+        self.transport = None
+        self.loop = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if len(data) < HEADER.size + 5: return
+        qid, flags = struct.unpack_from('>HH', data)
+        pos = HEADER.size
+        while pos < len(data) and data[pos]:
+            pos += data[pos] + 1
+        question = data[HEADER.size:pos + 5]
+        qtype = struct.unpack_from('>H', data, pos + 1)[0] if pos + 3 <= len(data) else 0
+        delay = self.core.schedule('dns', self.loop.time())
+        if delay is None: return
+        rcode = DNS_ERROR_RCODE if self.core.failed() else self.rcode
+        answer = b''
+        if rcode == 0 and qtype == QTYPES['A']:
+            answer = struct.pack('>HHHIH4s', 0xc00c, 1, 1, 60, 4, bytes([10, 0, 0, 1]))
+        # QR, opcode and RD echoed, RA set
+        reply = HEADER.pack(qid, 0x8000 | (flags & 0x7900) | 0x0080 | rcode, 1, 1 if answer else 0, 0, 0)
+        self.loop.call_later(delay, self.send, reply + question + answer, addr)
+
+    def send(self, data, addr):
+        self.transport.sendto(data, addr)
+        self.core.served += 1
+
+async def serve(opts, reuse_port):
+    loop = asyncio.get_running_loop()
+    core = ServerCore(opts)
+    listen = opts.get('listen', LISTEN)
+    stop = loop.create_future()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, lambda: stop.done() or stop.set_result(None))
+    ldap = dns = None
+    ldap_port, dns_port = int(opts.get('ldap-port', LDAP_PORT)), int(opts.get('dns-port', DNS_PORT))
+    if ldap_port:
+        ldap = LdapServer(core, opts)
+        ldap.loop = loop
+        server = await asyncio.start_server(ldap.handle, listen, ldap_port, reuse_port=reuse_port, backlog=4096)
+    if dns_port:
+        dns = DnsServer(core, opts)
+        dns.loop = loop
+        await loop.create_datagram_endpoint(lambda: dns, local_addr=(listen, dns_port), reuse_port=reuse_port)
+    print(f"stand-in {os.getpid()} listening: ldap={listen}:{ldap_port or '-'} dns={listen}:{dns_port or '-'}", flush=True)
+    last, last_t = 0, loop.time()
+    while not stop.done():
+        await asyncio.wait([stop], timeout=STATS_INTERVAL)
+        now = loop.time()
+        rate = (core.served - last) / (now - last_t)
+        last, last_t = core.served, now
+        conns = f", connections={ldap.connections}, refused={ldap.refused}" if ldap else ""
+        print(f"stand-in {os.getpid()}: {rate:.0f} responses/s, served={core.served}, errors={core.errors}, "
+              f"unanswered={core.dropped}{conns}", flush=True)
+    if ldap: server.close()
+
+def serve_process(opts, reuse_port, cpus):
+    if cpus:
+        try: os.sched_setaffinity(0, cpus)
+        except (AttributeError, OSError): pass
+    asyncio.run(serve(opts, reuse_port))
+
+def parse_cpus(text):
+    if not isinstance(text, str) or not text: return None
+    cpus = set()
+    for part in text.split(','):
+        lo, _, hi = part.partition('-')
+        cpus.update(range(int(lo), int(hi or lo) + 1))
+    return cpus
+
+def run_server(opts):
+    # One process per --processes sharing the ports with SO_REUSEPORT
+    for key in ('latency', 'bind-latency', 'search-latency', 'dns-latency'):
+        if key in opts: Latency(opts[key]) # Fail fast on a bad spec
+    processes = max(1, int(opts.get('processes', 1)))
+    cpus = parse_cpus(opts.get('cpus'))
+    if processes == 1:
+        serve_process(opts, False, cpus)
+        return
+    workers = [multiprocessing.Process(target=serve_process, args=(opts, True, cpus)) for _ in range(processes)]
+    for w in workers: w.start()
+
+    def stop(*args):
+        for w in workers:
+            if w.is_alive(): w.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for w in workers: w.join()
+
+# --- Calibration ---
+def wait_ready(port, timeout=READY_TIMEOUT):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection((LISTEN, port), 0.5).close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+def engine_commands(opts, ldap_port, dns_port):
+    py = sys.executable
+    mode = opts.get('mode', 'LOGIN').upper()
+    commands = {
+        'ldap': (f"{py} {os.path.join(BIN_DIR, 'ldap_engine.py')} run --target={LISTEN}:{ldap_port} --mode={mode} "
+                 "--dn=cn=calibration,dc=techton,dc=local --password=calibration --base=dc=techton,dc=local "
+                 "--rate={rate} --duration={duration} --out={output}"),
+        'dns': (f"{py} {os.path.join(BIN_DIR, 'dns_engine.py')} run --target={LISTEN}:{dns_port} "
+                "--rate={rate} --duration={duration} --out={output}"),
+    }
+    if isinstance(opts.get('cmd'), str):
+        commands['custom'] = opts['cmd']
+    return commands
+
+def calibrate(opts):
+    # Capacity search of each engine against a fast stand-in. The engine is
+    # pinned to --cores CPUs and the stand-in to the rest, so the first
+    # limit hit is the generator's own (lag, dropped arrivals, shortfall).
+    run_dir = opts.get('dir') or os.path.join(os.path.dirname(BIN_DIR), "results",
+                                               f"calibration_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    os.makedirs(run_dir, exist_ok=True)
+    cores = max(1, int(opts.get('cores', 1)))
+    available = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count() or 1))
+    engine_cpus = available[:cores]
+    server_cpus = available[cores:]
+    shared = not server_cpus
+    if shared:
+        print(f"calibrate: only {len(available)} CPU(s), the stand-in shares them with the engine; "
+              "rates are a lower bound", flush=True)
+    taskset = shutil.which('taskset')
+    pin = f"{taskset} -c {','.join(map(str, engine_cpus))} " if taskset and not shared else ""
+    ldap_port, dns_port = int(opts.get('ldap-port', LDAP_PORT)), int(opts.get('dns-port', DNS_PORT))
+    server_argv = [sys.executable, os.path.abspath(__file__), 'serve', f"--ldap-port={ldap_port}",
+                   f"--dns-port={dns_port}", f"--latency={opts.get('latency', DEFAULT_LATENCY)}",
+                   "--password=calibration", f"--processes={max(1, len(server_cpus))}"]
+    if server_cpus: server_argv.append(f"--cpus={','.join(map(str, server_cpus))}")
+    commands = engine_commands(opts, ldap_port, dns_port)
+    wanted = [e.strip() for e in opts.get('engines', 'ldap,dns').split(',') if e.strip() in commands]
+    if 'custom' in commands and 'custom' not in wanted: wanted.append('custom')
+
+    results = {}
+    with open(os.path.join(run_dir, "stand_in.log"), 'w') as log:
+        server = subprocess.Popen(server_argv, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            if not wait_ready(ldap_port):
+                print("calibrate: stand-in did not come up, see stand_in.log")
+                return 1
+            for engine in wanted:
+                engine_dir = os.path.join(run_dir, engine)
+                os.makedirs(engine_dir, exist_ok=True)
+                print(f"calibrate: {engine} on {cores} core(s)", flush=True)
+                search = CapacitySearch(engine_dir, pin + commands[engine], opts.get('rules', CALIBRATION_RULES),
+                                        int(opts.get('start', CALIBRATION_START)), int(opts.get('max', CALIBRATION_MAX)),
+                                        budget=int(opts.get('budget', CALIBRATION_BUDGET)),
+                                        max_dropped=MAX_DROPPED_PCT)
+                result = search.run()
+                with open(os.path.join(engine_dir, MANIFEST), 'w') as f:
+                    json.dump(result, f, indent=2)
+                render(engine_dir, result)
+                results[engine] = {
+                    'max_sustainable_rps': result['max_sustainable_rps'],
+                    'per_core_rps': round(result['max_sustainable_rps'] / cores, 1),
+                    'first_failing_rate': result['first_failing_rate'],
+                    'first_failure': result['first_failure'],
+                    'steps': len(result['steps']),
+                }
+                if search.stopping: break
+        finally:
+            server.terminate()
+            server.wait()
+
+    summary = {
+        'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'host': socket.gethostname(),
+        'cpus': len(available),
+        'engine_cores': cores,
+        'shared_cpus': shared,
+        'stand_in_latency': opts.get('latency', DEFAULT_LATENCY),
+        'rules': opts.get('rules', CALIBRATION_RULES),
+        'engines': results,
+    }
+    with open(os.path.join(run_dir, "calibration.json"), 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f"\n {'Engine':<8}{'Max ops/s':>14}{'Per core':>14}   Limit")
+    for engine, r in results.items():
+        print(f" {engine:<8}{format_id_number(r['max_sustainable_rps'], 1):>14}{format_id_number(r['per_core_rps'], 1):>14}"
+              f"   {r['first_failure'] or 'not reached'}")
+    print(f"Calibration saved: {os.path.join(run_dir, 'calibration.json')}")
+    return 0
+
+def main():
+    argv, opts = split_options(sys.argv)
+    if len(argv) >= 2 and argv[1] == 'serve':
+        try:
+            run_server(opts)
+        except (ValueError, OSError) as e:
+            print(e)
+            sys.exit(1)
+        return
+    if len(argv) >= 2 and argv[1] == 'calibrate':
+        try:
+            sys.exit(calibrate(opts))
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+    print(f"Usage: stand_in.py serve [--ldap-port={LDAP_PORT}] [--dns-port={DNS_PORT}] [--listen={LISTEN}] "
+          f"[--latency={DEFAULT_LATENCY}] [--bind-latency=..] [--search-latency=..] [--dns-latency=..] [--threads=0] "
+          f"[--error-rate=0] [--error-code={ERROR_CODE}] [--drop-rate=0] [--max-connections=0] [--password=PW] "
+          f"[--entries={DEFAULT_ENTRIES}] [--chain-entries={CHAIN_ENTRIES}] [--chain-factor={CHAIN_FACTOR}] "
+          f"[--blob={BLOB_BYTES}] [--dns-rcode={DNS_RCODE}] [--processes=1] [--cpus=2,3]")
+    print("       stand_in.py calibrate [--engines=ldap,dns] [--mode=LOGIN] [--cores=1] "
+          f"[--latency={DEFAULT_LATENCY}] [--start={CALIBRATION_START}] [--max={CALIBRATION_MAX}] "
+          f"[--budget={CALIBRATION_BUDGET}] [--rules={CALIBRATION_RULES}] [--cmd=TEMPLATE] [--dir=DIR]")
+    sys.exit(1)
+
+if __name__ == "__main__":
+    main()
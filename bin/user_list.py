@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# Techton User List Generator
+# Builds the Multi-User account list with bulk buffered writes. Rows are
+# "DN<TAB>password": DNs are full of commas, tabs never appear in them, so
+# engines split each row once at load time. With --shards the list is written
+# pre-split (users_0.tsv, users_1.tsv, ...) so every generator process only
+# loads its own slice.
+#
+#   user_list.py generate <out_dir> [--count=1000] [--prefix=user] [--base=DN]
+#                         [--password=P|random] [--seed=N] [--shards=1] [--start=1]
+#   user_list.py split <users_file> <out_dir> --shards=N
+import sys
+import os
+import csv
+import time
+import random
+
+from report_gen import split_options, format_id_number
+
+# Configuration
+USERS_FILE = "users.tsv"
+SHARD_FILE = "users_{}.tsv"
+DEFAULT_COUNT = 1000
+DEFAULT_PREFIX = "user"
+DEFAULT_BASE = "OU=User,OU=BRIN,DC=net,DC=brin,DC=go,DC=id"
+DEFAULT_PASSWORD = "P@ssw0rd123"
+DIGITS = 3 # user001 ... user999, user1000 (same numbering as before)
+CHUNK_ROWS = 65536 # Rows joined per write
+PASSWORD_CHARS = "abcdefghijkmnopqrstuvwxyzABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+PASSWORD_LENGTH = 12
+PASSWORD_SUFFIX = "#7" # Keeps random passwords within AD complexity rules
+
+def shard_ranges(start, count, shards):
+    # Contiguous [lo, hi) account numbers per shard, sizes differing by at most one
+    return [(start + count * i // shards, start + count * (i + 1) // shards) for i in range(shards)]
+
+def shard_paths(out_dir, shards):
+    if shards <= 1:
+        return [os.path.join(out_dir, USERS_FILE)]
+    return [os.path.join(out_dir, SHARD_FILE.format(i)) for i in range(shards)]
+
+def generate(out_dir, count, prefix=DEFAULT_PREFIX, base=DEFAULT_BASE, password=DEFAULT_PASSWORD,
+             seed=None, shards=1, start=1):
+    # One random stream over all accounts in order, so a seed gives the same
+    # passwords however the list is split
+    rng = random.Random(seed)
+    suffix = f",{base}\t" if base else "\t"
+    paths = shard_paths(out_dir, shards)
+    os.makedirs(out_dir, exist_ok=True)
+    for path, (lo, hi) in zip(paths, shard_ranges(start, count, max(1, shards))):
+        with open(path, 'w', buffering=1 << 20) as f:
+            for chunk in range(lo, hi, CHUNK_ROWS):
+                ids = range(chunk, min(chunk + CHUNK_ROWS, hi))
+                if password == 'random':
+                    rows = [f"CN={prefix}{i:0{DIGITS}d}{suffix}{''.join(rng.choices(PASSWORD_CHARS, k=PASSWORD_LENGTH))}{PASSWORD_SUFFIX}\n"
+                            for i in ids]
+                else:
+                    tail = f"{suffix}{password}\n"
+                    rows = [f"CN={prefix}{i:0{DIGITS}d}{tail}" for i in ids]
+                f.write(''.join(rows))
+    return paths
+
+def read_users(path, password=DEFAULT_PASSWORD):
+    # (dn, password) pairs from a users.tsv or a legacy "DN,Password" CSV. In
+    # the CSV the DN's own commas are unquoted, so the password is the last
+    # field only when it does not look like an RDN.
+    users = []
+    with open(path, 'r', encoding='utf-8', errors='ignore', newline='') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if not line: continue
+            if '\t' in line:
+                dn, _, pw = line.partition('\t')
+                users.append((dn.strip(), pw or password))
+                continue
+            row = [c.strip() for c in next(csv.reader([line]))]
+            if not row or not row[0] or row[0].lower() == 'dn': continue
+            if len(row) > 1 and '=' not in row[-1]:
+                users.append((','.join(row[:-1]), row[-1]))
+            else:
+                users.append((','.join(row), password))
+    return users
+
+def split(path, out_dir, shards, password=DEFAULT_PASSWORD):
+    users = read_users(path, password)
+    paths = shard_paths(out_dir, shards)
+    os.makedirs(out_dir, exist_ok=True)
+    for p, (lo, hi) in zip(paths, shard_ranges(0, len(users), max(1, shards))):
+        with open(p, 'w', buffering=1 << 20) as f:
+            f.write(''.join(f"{dn}\t{pw}\n" for dn, pw in users[lo:hi]))
+    return paths, len(users)
+
+def main():
+    argv, opts = split_options(sys.argv)
+    shards = int(opts.get('shards', 1))
+    if len(argv) >= 3 and argv[1] == 'generate':
+        count = int(opts.get('count', DEFAULT_COUNT))
+        seed = opts.get('seed')
+        started = time.time()
+        paths = generate(argv[2], count, opts.get('prefix', DEFAULT_PREFIX), opts.get('base', DEFAULT_BASE),
+                         opts.get('password', DEFAULT_PASSWORD), int(seed) if seed is not None else None,
+                         shards, int(opts.get('start', 1)))
+        print(f"Generated {format_id_number(count)} users in {len(paths)} file(s) "
+              f"({time.time() - started:.2f}s): {', '.join(os.path.basename(p) for p in paths)}")
+        return
+    if len(argv) >= 4 and argv[1] == 'split':
+        paths, n = split(argv[2], argv[3], shards, opts.get('password', DEFAULT_PASSWORD))
+        print(f"Split {format_id_number(n)} users into {len(paths)} file(s): {', '.join(os.path.basename(p) for p in paths)}")
+        return
+    print("Usage: user_list.py generate <out_dir> [--count=1000] [--prefix=user] [--base=DN] "
+          "[--password=P|random] [--seed=N] [--shards=1] [--start=1]")
+    print("       user_list.py split <users_file> <out_dir> --shards=N")
+    sys.exit(1)
+
+if __name__ == "__main__":
+    main()
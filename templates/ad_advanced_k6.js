@@ -1,5 +1,7 @@
 import ldap from 'k6/x/ldap';
 import { check, sleep } from 'k6';
+import exec from 'k6/execution';
+import { Trend } from 'k6/metrics';
 
 // --- INJECTED CONFIGURATION ---
 const target_ip = '__TARGET_IP__';
@@ -7,6 +9,8 @@ const root_dn = '__ROOT_DN__';
 const user_dn = '__USER_DN__';
 const password = '__PASSWORD__';
 const mode = '__ADV_MODE__'; // SEARCH_COMPLEX, WRITE_STRESS, MEMBERSHIP
+const conn_strategy = '__CONN_STRATEGY__'; // iteration, vu, rotate
+const rotate_size = __ROTATE_SIZE__; // Connections each VU takes turns on in rotate mode
 
 export const options = {
   scenarios: {
@@ -15,15 +19,72 @@ export const options = {
   thresholds: __THRESHOLDS_BODY__
 };
 
+// Arrival-rate executors start each iteration at its scheduled time (or drop
+// it), so time from iteration start to the end of the operation is the latency
+// from the intended start. report_gen shows it next to iteration_duration.
+const open_model = Object.values(options.scenarios)[0].executor.endsWith('arrival-rate');
+const corrected_duration = new Trend('corrected_duration', true);
+
+// Where an iteration spends its time: TCP dial, service-account bind and the
+// operation itself. Dial and bind are only recorded when they happen.
+const dial_duration = new Trend('ldap_dial_duration', true);
+const bind_duration = new Trend('ldap_bind_duration', true);
+const op_duration = new Trend('ldap_op_duration', true);
+
+// Bound connections kept across iterations (vu / rotate). In rotate mode each
+// VU holds rotate_size connections and uses them strictly in turn, one at a
+// time: the DC carries VUs x rotate_size open sessions (connection-count load,
+// like many mostly idle clients) and behind a load-balanced VIP every VU
+// spreads its operations over several backends. k6 VUs are separate JS
+// runtimes and cannot share sockets.
+const slots = [];
+let next_slot = 0;
+
+function connect() {
+  let t = Date.now();
+  const client = ldap.dialURL(`ldap://${target_ip}:389`);
+  dial_duration.add(Date.now() - t);
+  if (!client) return null;
+  try {
+    t = Date.now();
+    client.bind(user_dn, password);
+    bind_duration.add(Date.now() - t);
+  } catch (e) {
+    client.close();
+    throw e;
+  }
+  return client;
+}
+
+function acquire() {
+  if (conn_strategy !== 'vu' && conn_strategy !== 'rotate') {
+    const client = connect();
+    return client ? { client: client, slot: -1 } : null;
+  }
+  const slot = conn_strategy === 'rotate' ? next_slot++ % rotate_size : 0;
+  if (!slots[slot]) slots[slot] = connect();
+  return slots[slot] ? { client: slots[slot], slot: slot } : null;
+}
+
+function release(conn, broken) {
+  if (conn.slot >= 0 && !broken) return;
+  try { conn.client.close(); } catch (e) {}
+  if (conn.slot >= 0) slots[conn.slot] = null;
+}
+
 export default function () {
-  let client = null;
+  const started = Date.now();
+  let conn = null;
+  let broken = false;
+  // Tag every metric of this VU with the operation so report_gen can break it down
+  exec.vu.metrics.tags.op = mode;
   
   try {
-    client = ldap.dialURL(`ldap://${target_ip}:389`);
-    if (!client) return;
-
-    // 1. Authenticate
-    client.bind(user_dn, password);
+    // 1. Connection, authenticated as the service account when it was opened
+    conn = acquire();
+    if (!conn) return;
+    const client = conn.client;
+    const op_started = Date.now();
 
     if (mode === 'SEARCH_COMPLEX') {
       // Simulating heavy filters that force full table scans
@@ -86,11 +147,14 @@ export default function () {
         'titan success': (res) => res !== null,
       });
     }
+    op_duration.add(Date.now() - op_started);
 
   } catch (e) {
-    // Error handling
+    // A failed connection is dropped and redialled by the next iteration
+    broken = true;
   } finally {
-    if (client) client.close();
+    if (conn) release(conn, broken);
+    if (open_model) corrected_duration.add(Date.now() - started);
   }
   
   // Realism: Think Time (0.5s to 2.5s)
@@ -1,17 +1,24 @@
 import ldap from 'k6/x/ldap';
 import { check, sleep } from 'k6';
 import { SharedArray } from 'k6/data';
+import exec from 'k6/execution';
+import { Trend } from 'k6/metrics';
 
 // --- CONFIGURATION ---
 const target_ip = '__TARGET_IP__';
 const use_csv = __USE_CSV__; // Boolean flag injected by Techton
 const single_user_dn = '__USER_DN__';
 const single_password = '__PASSWORD__';
+const user_shards = __USER_SHARDS__; // >1: the list is pre-split per generator process
+const conn_strategy = '__CONN_STRATEGY__'; // iteration, vu, rotate
+const rotate_size = __ROTATE_SIZE__; // Connections each VU takes turns on in rotate mode
 
-// Load CSV if enabled
+// Load the user list once (rows "DN<TAB>password"); SharedArray keeps a single
+// copy for all VUs. Sharded runs only read this process's slice.
+const user_file = user_shards > 1 ? `./users_${__ENV.TECHTON_SHARD_INDEX || 0}.tsv` : './users.tsv';
 const user_data = new SharedArray('users', function () {
   if (use_csv) {
-    return open('./users.csv').split('\n').slice(1); // Skip header
+    return open(user_file).split('\n').filter((row) => row).map((row) => row.split('\t'));
   }
   return [];
 });
@@ -23,8 +30,56 @@ export const options = {
   thresholds: __THRESHOLDS_BODY__
 };
 
+// Arrival-rate executors start each iteration at its scheduled time (or drop
+// it), so time from iteration start to the end of the bind is the latency
+// from the intended start. report_gen shows it next to iteration_duration.
+const open_model = Object.values(options.scenarios)[0].executor.endsWith('arrival-rate');
+const corrected_duration = new Trend('corrected_duration', true);
+
+// Where an iteration spends its time: TCP dial and the user bind (the
+// operation of this template). Dial is only recorded when it happens.
+const dial_duration = new Trend('ldap_dial_duration', true);
+const op_duration = new Trend('ldap_op_duration', true);
+
+// Connections kept across iterations (vu / rotate) and re-bound as the next
+// user. In rotate mode each VU holds rotate_size connections and uses them
+// strictly in turn, one at a time: the DC carries VUs x rotate_size open
+// sessions (connection-count load, like many mostly idle clients) and behind
+// a load-balanced VIP every VU spreads its binds over several backends.
+// k6 VUs are separate JS runtimes and cannot share sockets.
+const slots = [];
+let next_slot = 0;
+
+function dial() {
+  const t = Date.now();
+  const client = ldap.dialURL(`ldap://${target_ip}:389`);
+  dial_duration.add(Date.now() - t);
+  return client;
+}
+
+function acquire() {
+  if (conn_strategy !== 'vu' && conn_strategy !== 'rotate') {
+    const client = dial();
+    return client ? { client: client, slot: -1 } : null;
+  }
+  const slot = conn_strategy === 'rotate' ? next_slot++ % rotate_size : 0;
+  if (!slots[slot]) slots[slot] = dial();
+  return slots[slot] ? { client: slots[slot], slot: slot } : null;
+}
+
+function release(conn, broken) {
+  if (conn.slot >= 0 && !broken) return;
+  try { conn.client.close(); } catch (e) {}
+  if (conn.slot >= 0) slots[conn.slot] = null;
+}
+
 export default function () {
-  if (__ITER == 0) sleep(Math.random() * 2); 
+  const started = Date.now();
+  let done = 0;
+  // Desynchronise closed-model VUs; arrival-rate executors already spread starts
+  if (__ITER == 0 && !open_model) sleep(Math.random() * 2); 
+  // Tag every metric of this VU with the operation so report_gen can break it down
+  exec.vu.metrics.tags.op = 'BIND';
 
   // Determine Credentials
   let dn, pass;
@@ -32,36 +87,39 @@ export default function () {
   if (use_csv && user_data.length > 0) {
       // Pick random user from list
       const row = user_data[Math.floor(Math.random() * user_data.length)];
-      if (!row) return; // Skip empty lines
-      const cols = row.split(',');
-      dn = cols[0].trim();
-      pass = cols[1] ? cols[1].trim() : single_password; // Use CSV pass or default
+      dn = row[0];
+      pass = row[1] || single_password; // Use list pass or default
   } else {
       dn = single_user_dn;
       pass = single_password;
   }
 
-  let client = null;
+  let conn = null;
+  let broken = false;
   
   try {
-    // 1. Dial
+    // 1. Dial (once per VU / pool slot unless the strategy is per iteration)
     try {
-        client = ldap.dialURL(`ldap://${target_ip}:389`);
+        conn = acquire();
     } catch (e) {
+        done = Date.now();
         sleep(1);
         return;
     }
 
-    if (!client) throw new Error("Client null");
+    if (!conn) throw new Error("Client null");
 
     // 2. Bind
     let bind_success = false;
+    const op_started = Date.now();
     try {
-        client.bind(dn, pass);
+        conn.client.bind(dn, pass);
         bind_success = true;
     } catch(err) {
-         // Expected for wrong password/stress
+         // Expected for wrong password/stress; a dead socket is redialled
+         broken = String(err).includes('Network Error');
     }
+    op_duration.add(Date.now() - op_started);
 
     check(bind_success, {
       'bind success': (ok) => ok === true,
@@ -69,10 +127,10 @@ export default function () {
 
   } catch (e) {
     // Suppress
+    broken = true;
   } finally {
-    if (client) {
-        try { client.close(); } catch(e) {}
-    }
+    if (conn) release(conn, broken);
+    if (open_model) corrected_duration.add((done || Date.now()) - started);
   }
   
   sleep(Math.random() * 0.5 + 0.1); 